@@ -0,0 +1,96 @@
+# Event loop stalls and wall time of four reports made in one asyncio loop, with blocking FigPager calls
+# and with AsyncFigPager
+# Usage: python benchmarks/bench_async.py [pages]
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from figpager import AsyncFigPager, FigPager
+
+LAYOUT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "report.ini"
+)
+REPORTS = 4
+
+
+def draw(fp, page):
+    x = np.linspace(0, 10, 2000)
+    for panel in range(4):
+        ax = fp.add_subplot()
+        ax.plot(x, np.sin(x * (page + panel + 1)))
+        ax.set_title("Panel {}".format(panel))
+
+
+async def blocking_report(outfile, pages):
+    fp = FigPager(
+        "letter", 2, 2, layout=LAYOUT, outfile=outfile, dpi=150, overwrite=True
+    )
+    for page in range(pages):
+        if page:
+            fp.add_page()
+        draw(fp, page)
+        # yield to the loop between pages as a well behaved coroutine would
+        await asyncio.sleep(0)
+    fp.close()
+
+
+async def async_report(outfile, pages):
+    async with AsyncFigPager(
+        "letter", 2, 2, layout=LAYOUT, outfile=outfile, dpi=150, overwrite=True
+    ) as fp:
+        for page in range(pages):
+            if page:
+                await fp.add_page()
+            await fp.run(draw, page)
+
+
+async def measure(report, folder, pages):
+    gaps = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last - 0.01)
+            last = now
+
+    beat = asyncio.ensure_future(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            report(os.path.join(folder, "r{}.png".format(i)), pages)
+            for i in range(REPORTS)
+        ]
+    )
+    total = time.perf_counter() - start
+    stop.set()
+    await beat
+    return total, max(gaps), np.percentile(gaps, 99)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    folder = tempfile.mkdtemp()
+    print("{} reports of {} pages".format(REPORTS, pages))
+    print(
+        "{:>10} {:>10} {:>16} {:>16}".format(
+            "pager", "wall s", "max stall ms", "p99 stall ms"
+        )
+    )
+    for name, report in [("blocking", blocking_report), ("async", async_report)]:
+        total, worst, p99 = asyncio.run(measure(report, folder, pages))
+        print(
+            "{:>10} {:>10.2f} {:>16.1f} {:>16.1f}".format(
+                name, total, 1000 * worst, 1000 * p99
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Page flip time of the preview browser from cached bitmaps compared to drawing the page figure again
+# Usage: python benchmarks/bench_browser.py [pages]
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+from figpager import FigPager, PageBrowser
+
+LAYOUT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "report.ini"
+)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    browser = PageBrowser(dpi=100, zoom=True)
+    fp = FigPager(
+        "letter", 3, 2, layout=LAYOUT, orientation="portrait", preview=browser
+    )
+    x = np.linspace(0, 10, 1000)
+    add = []
+    for page in range(pages):
+        if page:
+            start = time.perf_counter()
+            fp.add_page()
+            add.append(time.perf_counter() - start)
+        for panel in range(6):
+            fp.add_subplot().plot(x, np.sin(x * (page + panel + 1)))
+    fp.close()
+
+    # decoded from the compressed cache, then from the decoded cache
+    start = time.perf_counter()
+    for page in range(1, pages + 1):
+        browser.image(page)
+    cold = (time.perf_counter() - start) / pages
+    start = time.perf_counter()
+    for page in range(pages - browser.cache_pages + 1, pages + 1):
+        browser.image(page)
+    warm = (time.perf_counter() - start) / browser.cache_pages
+
+    # what a page flip costs when the figure is drawn again
+    fig = browser.figure(pages)
+    start = time.perf_counter()
+    for i in range(10):
+        fig.savefig(io.BytesIO(), format="rgba", dpi=browser.dpi)
+    redraw = (time.perf_counter() - start) / 10
+
+    print("pages {}, add_page {:.1f} ms".format(pages, 1000 * np.mean(add)))
+    print("flip from compressed bitmap {:.1f} ms".format(1000 * cold))
+    print("flip from decoded bitmap {:.3f} ms".format(1000 * warm))
+    print("redraw page figure {:.1f} ms".format(1000 * redraw))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Chosen dpi, page size and save time of pages with a byte budget against a fixed dpi, for A4 to A0 pages
+# Usage: python benchmarks/bench_budget.py [budget KB]
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from figpager import FigPager
+
+
+def draw(outfile, paper_size, **kwargs):
+    fp = FigPager(paper_size, 2, 1, outfile=outfile, dpi=300, overwrite=True, **kwargs)
+    x = np.linspace(0, 100, 5000)
+    ax = fp.add_subplot()
+    ax.plot(x, np.sin(x) + 0.1 * np.random.RandomState(0).randn(len(x)), lw=0.5)
+    fp.add_subplot().imshow(
+        np.add.outer(np.arange(300.0), np.arange(300.0)) ** 0.5,
+        interpolation="bilinear",
+    )
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        fp.close()
+    seconds = time.perf_counter() - start
+    stat = fp.page_stats[0]["targets"][0]
+    # pages of a multipage pdf are only sized with a budget
+    return stat["dpi"], stat["bytes"] or os.path.getsize(outfile), seconds
+
+
+def main():
+    budget = int(float(sys.argv[1]) * 1000) if len(sys.argv) > 1 else 500000
+    folder = tempfile.mkdtemp()
+    print("budget {} KB".format(budget // 1000))
+    print(
+        "{:>6} {:>4} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+            "paper", "ext", "fixed dpi", "KB", "seconds", "budget dpi", "KB", "seconds"
+        )
+    )
+    for ext in ["png", "pdf"]:
+        for paper_size in ["A4", "A2", "A0"]:
+            outfile = os.path.join(folder, "{}.{}".format(paper_size, ext))
+            # a pixel budget that is never reached records the page without changing its dpi or saves
+            fixed_dpi, fixed_bytes, fixed_seconds = draw(
+                outfile, paper_size, max_pixels=10 ** 12
+            )
+            dpi, size, seconds = draw(outfile, paper_size, max_bytes_per_page=budget)
+            print(
+                "{:>6} {:>4} {:>10} {:>10.0f} {:>10.2f} {:>10} {:>10.0f} {:>10.2f}".format(
+                    paper_size,
+                    ext,
+                    fixed_dpi,
+                    fixed_bytes / 1e3,
+                    fixed_seconds,
+                    dpi,
+                    size / 1e3,
+                    seconds,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
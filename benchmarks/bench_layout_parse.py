@@ -0,0 +1,63 @@
+# Scaling benchmark of layout loading for layouts with 10 to 50,000 [Text] and [Lines] entries
+# Usage: python benchmarks/bench_layout_parse.py
+import os
+import tempfile
+import time
+
+from figpager.figpager import load_layout, parse_layout
+
+SIZES = [10, 100, 1000, 10000, 50000]
+
+
+def write_layout(path, entries):
+    """ Write a layout with half the entries as [Text] labels and half as [Lines] labels """
+
+    with open(path, "w") as f:
+        f.write(
+            "[Layout]\n    [[Margin]]\n    source_path = False\n    margin_frame = False\n"
+        )
+        f.write('"""\nblock comment\n"""\n[Boxes]\n[Text]\n')
+        for i in range(entries // 2):
+            f.write("    [[Label {}]]\n".format(i))
+            f.write("    text_position = 1, {}\n".format(i % 10))
+            f.write("    text = 'Label {}'\n".format(i))
+            f.write("    fontsize = 8\n")
+        f.write("[Watermark]\n[Images]\n[Lines]\n")
+        for i in range(entries - entries // 2):
+            f.write("    [[Line {}]]\n".format(i))
+            f.write("    line_position_start = 0, {}\n".format(i % 10))
+            f.write("    line_position_end = 1, {}\n".format(i % 10))
+            f.write("    line_width = 1\n")
+
+
+def main():
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "layout.ini")
+    print(
+        "{:>8} {:>12} {:>12} {:>14}".format(
+            "entries", "parse s", "load s", "load us/entry"
+        )
+    )
+    for entries in SIZES:
+        write_layout(path, entries)
+
+        start = time.time()
+        parse_layout(path)
+        parse_time = time.time() - start
+
+        start = time.time()
+        config = load_layout(path)
+        load_time = time.time() - start
+        assert len(config["Text"]) + len(config["Lines"]) == entries
+
+        print(
+            "{:>8} {:>12.4f} {:>12.4f} {:>14.1f}".format(
+                entries, parse_time, load_time, 1e6 * load_time / entries
+            )
+        )
+    os.remove(path)
+    os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Throughput of overlaying a layout onto an existing PDF compared to a plain pypdf copy of the same file
+# Usage: python benchmarks/bench_overlay.py [pages]
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pypdf
+from matplotlib.backends.backend_pdf import PdfPages
+
+from figpager import LayoutOverlay
+
+LAYOUT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "report.ini"
+)
+
+
+def write_input(path, pages):
+    """ Write a PDF of line plots, rendering one page and copying it so the input is quick to make """
+
+    single = path + ".1"
+    fig, ax = plt.subplots(figsize=(8.5, 11))
+    x = np.linspace(0, 10, 2000)
+    ax.plot(x, np.sin(x) * np.exp(-x / 5))
+    with PdfPages(single) as pdf:
+        pdf.savefig(fig)
+    plt.close(fig)
+
+    page = pypdf.PdfReader(single).pages[0]
+    writer = pypdf.PdfWriter()
+    for i in range(pages):
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    folder = tempfile.mkdtemp()
+    infile = os.path.join(folder, "in.pdf")
+    write_input(infile, pages)
+
+    start = time.perf_counter()
+    reader = pypdf.PdfReader(infile)
+    writer = pypdf.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    with open(os.path.join(folder, "copy.pdf"), "wb") as f:
+        writer.write(f)
+    copy = time.perf_counter() - start
+
+    overlay = LayoutOverlay(LAYOUT)
+    start = time.perf_counter()
+    overlay.apply(infile, os.path.join(folder, "out.pdf"))
+    total = time.perf_counter() - start
+
+    print(
+        "{:>8} {:>12} {:>12} {:>14}".format(
+            "pages", "copy s", "overlay s", "overlay pages/s"
+        )
+    )
+    print(
+        "{:>8} {:>12.2f} {:>12.2f} {:>14.0f}".format(pages, copy, total, pages / total)
+    )
+    print("layout renders: {}".format(len(overlay.templates)))
+
+
+if __name__ == "__main__":
+    main()
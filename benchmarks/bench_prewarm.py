@@ -0,0 +1,57 @@
+# First page latency of a fresh worker process with and without figpager.prewarm
+# Usage: python benchmarks/bench_prewarm.py [runs]
+import json
+import os
+import subprocess
+import sys
+
+LAYOUT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "report.ini"
+)
+
+# run in a fresh interpreter so every run starts with cold caches. prewarm runs before the timed pages
+# as it would in a pool initializer
+WORKER = """
+import io, json, sys, time
+import numpy as np
+from figpager import FigPager, prewarm
+
+if sys.argv[1] == "1":
+    prewarm(layouts=[sys.argv[2]], paper_sizes=["letter"], fonts=["DejaVu Sans"])
+
+times = []
+x = np.linspace(0, 2 * np.pi, 400)
+for page in range(3):
+    start = time.perf_counter()
+    fp = FigPager("letter", 2, 1, layout=sys.argv[2], orientation="portrait")
+    ax = fp.add_subplot()
+    ax.plot(x, np.sin(x))
+    ax.set_title("Page {}".format(page))
+    fp.fig.savefig(io.BytesIO(), format="pdf")
+    fp._release()
+    times.append(time.perf_counter() - start)
+print(json.dumps(times))
+"""
+
+
+def run(prewarmed):
+    out = subprocess.check_output(
+        [sys.executable, "-c", WORKER, "1" if prewarmed else "0", LAYOUT],
+        cwd=os.path.join(os.path.dirname(LAYOUT), ".."),
+        stderr=subprocess.DEVNULL,
+    )
+    return json.loads(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("{:>10} {:>14} {:>14}".format("prewarm", "first page s", "third page s"))
+    for prewarmed in [False, True]:
+        times = [run(prewarmed) for i in range(runs)]
+        first = sorted(t[0] for t in times)[runs // 2]
+        third = sorted(t[2] for t in times)[runs // 2]
+        print("{:>10} {:>14.3f} {:>14.3f}".format(str(prewarmed), first, third))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Latency of small report jobs submitted while large ones run, with first in first out order, with priorities and
+# with a worker reserved for small jobs
+# Usage: python benchmarks/bench_scheduler.py [large pages] [small jobs]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from figpager import FigPager, Scheduler, prewarm
+
+WORKERS = 3
+
+
+def report(outfile, pages):
+    fp = FigPager("letter", 2, 2, outfile=outfile, dpi=72, overwrite=True)
+    x = np.linspace(0, 10, 500)
+    for page in range(pages):
+        if page:
+            fp.add_page()
+        for panel in range(4):
+            fp.add_subplot().plot(x, np.sin(x * (page + panel)))
+    fp.close()
+
+
+def run(folder, large_pages, small_jobs, prioritize, reserved):
+    with Scheduler(
+        workers=WORKERS,
+        max_pages_per_child=500,
+        reserved_workers=reserved,
+        initializer=prewarm,
+    ) as scheduler:
+        # warm the workers so start up is not measured
+        for i in range(WORKERS):
+            scheduler.submit(
+                report, (os.path.join(folder, "warm{}.pdf".format(i)), 1)
+            ).result()
+
+        start = time.perf_counter()
+        large = [
+            scheduler.submit(
+                report,
+                (os.path.join(folder, "large{}.pdf".format(i)), large_pages),
+                priority=10 if prioritize else 0,
+            )
+            for i in range(WORKERS)
+        ]
+        # the large jobs are running when the small jobs arrive
+        time.sleep(0.5)
+        small = [
+            scheduler.submit(report, (os.path.join(folder, "small{}.pdf".format(i)), 1))
+            for i in range(small_jobs)
+        ]
+        for job in small + large:
+            job.result()
+        total = time.perf_counter() - start
+
+    latency = [job.queue_seconds + job.run_seconds for job in small]
+    return np.mean(latency), max(latency), total
+
+
+def main():
+    large_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    small_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    folder = tempfile.mkdtemp()
+    print(
+        "{} workers, {} jobs of {} pages then {} one page jobs".format(
+            WORKERS, WORKERS, large_pages, small_jobs
+        )
+    )
+    print(
+        "{:>10} {:>18} {:>18} {:>10}".format(
+            "order", "small mean s", "small max s", "total s"
+        )
+    )
+    for name, prioritize, reserved in [
+        ("fifo", False, 0),
+        ("priority", True, 0),
+        ("reserved", True, 1),
+    ]:
+        mean, worst, total = run(folder, large_pages, small_jobs, prioritize, reserved)
+        print("{:>10} {:>18.2f} {:>18.2f} {:>10.2f}".format(name, mean, worst, total))
+
+
+if __name__ == "__main__":
+    main()
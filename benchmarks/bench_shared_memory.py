@@ -0,0 +1,47 @@
+# Time to draw pages in worker processes when the array behind each page is pickled into the job or passed as a
+# shared memory handle
+# Usage: python benchmarks/bench_shared_memory.py [pages] [million samples]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from figpager import ParallelPager
+
+
+def draw(fp, series):
+    ax = fp.add_subplot()
+    # the page shows a summary of the series so the transport dominates
+    ax.plot(series[:: max(1, len(series) // 2000)])
+    ax.set_title("mean {:.4f}".format(series.mean()))
+
+
+def run(folder, pages, series, shared):
+    start = time.perf_counter()
+    outfile = os.path.join(folder, "out.pdf")
+    with ParallelPager(
+        "letter", 1, 1, outfile=outfile, processes=4, overwrite=True, dpi=72
+    ) as pp:
+        data = pp.share(series) if shared else series
+        for page in range(pages):
+            pp.add_page(draw, data)
+    return time.perf_counter() - start
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    samples = int(float(sys.argv[2]) * 1e6) if len(sys.argv) > 2 else 50000000
+    folder = tempfile.mkdtemp()
+    series = np.random.rand(samples)
+
+    print("{} pages, {:.0f} MB array per page".format(pages, series.nbytes / 1e6))
+    print("{:>10} {:>10}".format("transport", "seconds"))
+    for shared in [False, True]:
+        seconds = run(folder, pages, series, shared)
+        print("{:>10} {:>10.2f}".format("shared" if shared else "pickle", seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Page time of a 4 x 2 per-site dashboard redrawn on every page and kept as a skeleton updated in place
+# Usage: python benchmarks/bench_skeleton.py [pages]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from figpager import FigPager
+
+LAYOUT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "report.ini"
+)
+PANELS = 8
+
+
+def run(folder, pages, skeleton, fmt):
+    fp = FigPager(
+        "letter",
+        4,
+        2,
+        layout=LAYOUT,
+        outfile=os.path.join(folder, "dashboard.{}".format(fmt)),
+        orientation="portrait",
+        dpi=100,
+        overwrite=True,
+        skeleton=skeleton,
+    )
+    x = np.linspace(0, 24, 500)
+    lines = []
+    start = time.perf_counter()
+    for site in range(pages):
+        if site:
+            fp.add_page()
+        fp.text_at_label("Figure Title", "Site {}".format(site))
+        for panel in range(PANELS):
+            ax = fp.add_subplot()
+            y = np.sin(x + site) * (panel + 1) + np.random.rand(len(x))
+            if fp.reused_page:
+                lines[panel].set_ydata(y)
+                ax.relim()
+                ax.autoscale_view()
+            else:
+                lines.append(ax.plot(x, y)[0])
+                ax.set_xlabel("hour")
+            ax.set_title("Site {} sensor {}".format(site, panel))
+    fp.close()
+    return 1000 * (time.perf_counter() - start) / pages
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    folder = tempfile.mkdtemp()
+
+    print(
+        "{:>6} {:>14} {:>14} {:>10}".format(
+            "format", "redraw ms", "skeleton ms", "saved"
+        )
+    )
+    for fmt in ["pdf", "png"]:
+        redraw = run(folder, pages, False, fmt)
+        kept = run(folder, pages, True, fmt)
+        print(
+            "{:>6} {:>14.1f} {:>14.1f} {:>9.0f}%".format(
+                fmt, redraw, kept, 100 * (redraw - kept) / redraw
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
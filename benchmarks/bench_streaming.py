@@ -0,0 +1,41 @@
+# Benchmark of the streaming reductions on a large memory mapped input
+# Usage: python benchmarks/bench_streaming.py [size in GB] [path]
+# The input is a sparse file, so the timings exclude disk reads
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+from figpager.streaming import streaming_envelope, streaming_histogram
+
+
+def main(gb=50.0, path="./big.dat"):
+    n = int(gb * 2 ** 30 / 4)
+    with open(path, "wb") as f:
+        f.truncate(n * 4)
+
+    try:
+        data = np.memmap(path, dtype="float32", mode="r", shape=(n,))
+
+        start = time.time()
+        counts, edges = streaming_histogram(data, bins=256, range=(-1, 1))
+        hist_time = time.time() - start
+
+        start = time.time()
+        streaming_envelope(data, 2000)
+        envelope_time = time.time() - start
+    finally:
+        os.remove(path)
+
+    # ru_maxrss is in kB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print("input GB: {}".format(gb))
+    print("histogram s: {:.1f}".format(hist_time))
+    print("envelope s: {:.1f}".format(envelope_time))
+    print("peak RSS MB: {:.0f}".format(peak))
+
+
+if __name__ == "__main__":
+    main(*[float(a) if i == 0 else a for i, a in enumerate(sys.argv[1:])])
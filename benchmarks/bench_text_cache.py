@@ -0,0 +1,86 @@
+# Page time of a layout with 40 title block strings with and without the text layout cache
+# Usage: python benchmarks/bench_text_cache.py [pages]
+import io
+import os
+import sys
+import tempfile
+import time
+
+from figpager import FigPager, textcache
+
+STRINGS = 40
+
+
+def write_layout(path):
+    """ Write a layout with 40 title block strings in four columns """
+
+    with open(path, "w") as f:
+        f.write("[Layout]\n    [[Margin]]\n    source_path = True\n")
+        f.write(
+            "    source_path_position = 0.2, 0.1\n    source_path_fontcolor = grey\n"
+        )
+        f.write("    source_path_fontsize = 6\n    margin_frame = False\n")
+        f.write("[Boxes]\n[Text]\n")
+        for i in range(STRINGS):
+            f.write("    [[Title {}]]\n".format(i))
+            f.write("    text = 'Title block field {} - Project 1234'\n".format(i))
+            f.write(
+                "    text_position = {}, {}\n".format(
+                    0.3 + 2 * (i % 4), 0.4 + 0.15 * (i // 4)
+                )
+            )
+            f.write("    horizontalalignment = left\n")
+            f.write("    fontcolor = black\n")
+            f.write("    fontsize = {}\n".format(6 + i % 3))
+        f.write("[Watermark]\n[Images]\n[Lines]\n")
+
+
+def run(layout, pages, text_cache, fmt):
+    textcache.clear()
+    fp = FigPager(
+        "letter",
+        1,
+        1,
+        layout=layout,
+        orientation="portrait",
+        dpi=150,
+        text_cache=text_cache,
+    )
+    times = []
+    for page in range(pages):
+        start = time.perf_counter()
+        fp.draw_page()
+        fp.fig.savefig(io.BytesIO(), format=fmt, dpi=150)
+        times.append(time.perf_counter() - start)
+    fp._release()
+    # the first page measures the strings in both cases
+    return 1000 * sum(times[1:]) / (pages - 1)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    layout = os.path.join(tempfile.mkdtemp(), "title_block.ini")
+    write_layout(layout)
+
+    print(
+        "{:>6} {:>14} {:>14} {:>10}".format(
+            "format", "no cache ms", "cache ms", "saved"
+        )
+    )
+    for fmt in ["png", "pdf"]:
+        off = run(layout, pages, False, fmt)
+        on = run(layout, pages, True, fmt)
+        print(
+            "{:>6} {:>14.1f} {:>14.1f} {:>9.0f}%".format(
+                fmt, off, on, 100 * (off - on) / off
+            )
+        )
+    print(
+        "layout hits {hits}, misses {misses}. glyph hits {glyph_hits}, misses {glyph_misses}".format(
+            **textcache.stats
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
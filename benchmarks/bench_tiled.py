@@ -0,0 +1,71 @@
+# Peak memory and time of A0 raster pages at 300 and 600 dpi rendered whole and in bands. Each case runs in its own
+# process so its peak resident memory is measured on its own
+# Usage: python benchmarks/bench_tiled.py [png or tif]
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def draw(outfile, dpi, tiled):
+    from figpager import FigPager
+
+    fp = FigPager("A0", 3, 2, outfile=outfile, dpi=dpi, overwrite=True, tiled=tiled)
+    x = np.linspace(0, 100, 5000)
+    for i in range(6):
+        ax = fp.add_subplot()
+        if i % 2:
+            ax.imshow(np.random.RandomState(i).rand(200, 200))
+        else:
+            ax.plot(x, np.sin(x * (i + 1)), lw=1)
+        ax.set_title("Panel {}".format(i + 1))
+    fp.close()
+
+
+def run(folder, ext, dpi, tiled):
+    outfile = os.path.join(folder, "a0_{}_{}.{}".format(dpi, tiled, ext))
+    script = "import sys; sys.path.insert(0, {!r}); import bench_tiled; bench_tiled.draw({!r}, {}, {})".format(
+        os.path.dirname(os.path.abspath(__file__)), outfile, dpi, tiled
+    )
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    start = time.perf_counter()
+    code = subprocess.call([sys.executable, "-c", script], stderr=subprocess.DEVNULL)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if code != 0:
+        return None
+    # ru_maxrss of children is the largest of any child so far, in KB on Linux
+    return seconds, peak if peak > before else None, os.path.getsize(outfile)
+
+
+def main():
+    ext = sys.argv[1] if len(sys.argv) > 1 else "png"
+    folder = tempfile.mkdtemp()
+    print(
+        "{:>5} {:>8} {:>10} {:>14} {:>10}".format(
+            "dpi", "mode", "seconds", "peak RSS MB", "file MB"
+        )
+    )
+    # tiled cases run first so the running maximum of the children is their own peak
+    for tiled in [True, False]:
+        for dpi in [300, 600]:
+            result = run(folder, ext, dpi, tiled)
+            mode = "tiled" if tiled else "whole"
+            if result is None:
+                print("{:>5} {:>8} {:>10}".format(dpi, mode, "failed"))
+                continue
+            seconds, peak, size = result
+            peak = "{:.0f}".format(peak / 1024.0) if peak else "<= above"
+            print(
+                "{:>5} {:>8} {:>10.1f} {:>14} {:>10.1f}".format(
+                    dpi, mode, seconds, peak, size / 1e6
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Time to draw pages through a shared folder queue with local worker processes standing in for machines, and the
+# extra time when one worker dies in the middle of its page
+# Usage: python benchmarks/bench_workqueue.py [pages]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from figpager import DirectoryQueue, ParallelPager
+
+LEASE = 2
+
+
+def draw(fp, page, marker=None):
+    ax = fp.add_subplot()
+    ax.plot(range(1000), [(i * page) % 97 for i in range(1000)])
+    ax.set_title("page {}".format(page))
+    if marker is not None and not os.path.isfile(marker):
+        open(marker, "w").close()
+        os._exit(1)
+
+
+def run(folder, pages, workers, kill):
+    queue_folder = tempfile.mkdtemp(dir=folder)
+    queue = DirectoryQueue(queue_folder, lease=LEASE)
+    here = os.path.dirname(os.path.abspath(__file__))
+    procs = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "figpager",
+                "worker",
+                queue_folder,
+                "--path",
+                here,
+                "--idle",
+                "10",
+                "-q",
+            ]
+        )
+        for i in range(workers)
+    ]
+    # wait for the workers to start so start up is not timed
+    time.sleep(3)
+
+    # workers import draw from this file by module name, not from __main__
+    from bench_workqueue import draw
+
+    marker = os.path.join(queue_folder, "marker") if kill else None
+    start = time.perf_counter()
+    outfile = os.path.join(folder, "out.pdf")
+    with ParallelPager(
+        "letter", 1, 1, outfile=outfile, executor=queue, overwrite=True, dpi=72
+    ) as pp:
+        for page in range(pages):
+            pp.add_page(draw, page, marker if page == pages // 2 else None)
+    seconds = time.perf_counter() - start
+    queue.shutdown()
+    for proc in procs:
+        proc.wait()
+    return seconds
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    folder = tempfile.mkdtemp()
+
+    print("{} pages, lease {} s, {} CPUs".format(pages, LEASE, os.cpu_count()))
+    print("{:>8} {:>12} {:>12}".format("workers", "seconds", "one killed"))
+    for workers in [1, 2, 4]:
+        seconds = run(folder, pages, workers, False)
+        killed = run(folder, pages, workers + 1, True)
+        print("{:>8} {:>12.2f} {:>12.2f}".format(workers, seconds, killed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,11 @@
+from .asyncpager import AsyncFigPager
+from .browser import PageBrowser
+from .decimate import minmax_decimate
 from .figpager import FigPager
+from .golden import GoldenPages
+from .metrics import Metrics
+from .overlay import LayoutOverlay, overlay_pdf
+from .parallel import ArrayHandle, ParallelPager, SharedArrays
+from .prewarm import prewarm
+from .scheduler import Scheduler, WorkerLostError
+from .workqueue import DirectoryQueue, run_worker
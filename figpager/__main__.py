@@ -0,0 +1,165 @@
+"""
+Module file that contains the figpager command line interface.
+
+    figpager overlay --layout report.ini --output framed.pdf plots.pdf
+    figpager overlay --layout report.ini --output-dir framed/ archive/*.pdf
+    figpager worker --layout report.ini --key-file ~/.figpager_key /mnt/share/queue
+
+Written by Eben Pendleton
+MIT License
+"""
+
+import argparse
+import os
+import sys
+
+
+def _paper_size(value):
+    """ Paper size name or WIDTHxHEIGHT in inches """
+
+    if "x" in value:
+        try:
+            width, height = value.lower().split("x")
+            return float(width), float(height)
+        except ValueError:
+            pass
+    return value
+
+
+def overlay(args):
+    """
+    Run the overlay command
+    Args:
+        args: parsed arguments
+
+    Returns: exit status
+
+    """
+    from .overlay import LayoutOverlay
+
+    if args.output is not None and len(args.inputs) > 1:
+        raise SystemExit("Use --output-dir for more than one input.")
+    if args.output is None and args.output_dir is None:
+        raise SystemExit("One of --output or --output-dir is required.")
+
+    overlay = LayoutOverlay(
+        layout=args.layout,
+        paper_size=args.paper_size,
+        orientation=args.orientation,
+        draft=not args.no_draft,
+        scale=not args.no_scale,
+    )
+    if args.output_dir is not None and not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for infile in args.inputs:
+        outfile = args.output
+        if outfile is None:
+            outfile = os.path.join(args.output_dir, os.path.basename(infile))
+        pages = overlay.apply(infile, outfile, overwrite=args.overwrite)
+        if not args.quiet:
+            print("{} -> {} ({} pages)".format(infile, outfile, pages))
+    return 0
+
+
+def worker(args):
+    """
+    Run the worker command
+    Args:
+        args: parsed arguments
+
+    Returns: exit status
+
+    """
+    from .prewarm import prewarm
+    from .workqueue import run_worker
+
+    if args.path:
+        sys.path[:0] = args.path
+    key = None
+    if args.key_file:
+        with open(args.key_file, "rb") as f:
+            key = f.read().strip()
+    jobs = run_worker(
+        args.folder,
+        idle=args.idle,
+        max_jobs=args.max_jobs,
+        initializer=prewarm,
+        initargs=(args.layout or ["default"],),
+        key=key,
+    )
+    if not args.quiet:
+        print("{} jobs from {}".format(jobs, args.folder))
+    return 0
+
+
+def main(argv=None):
+    """
+    figpager command line entry point
+    Args:
+        argv: (list of strings) (optional) arguments. Default is sys.argv
+
+    Returns: exit status
+
+    """
+    parser = argparse.ArgumentParser(prog="figpager")
+    commands = parser.add_subparsers(dest="command")
+
+    p = commands.add_parser(
+        "overlay",
+        help="put the decorations of a layout onto the pages of existing PDFs",
+    )
+    p.add_argument("inputs", nargs="+", help="input PDF files")
+    p.add_argument("--layout", default="default", help="layout name or .ini path")
+    p.add_argument("-o", "--output", help="output PDF for a single input")
+    p.add_argument("--output-dir", help="output folder. Files keep their names")
+    p.add_argument(
+        "--paper-size",
+        type=_paper_size,
+        help="paper size name or WIDTHxHEIGHT in inches. Default is the input page size",
+    )
+    p.add_argument("--orientation", choices=["portrait", "landscape"])
+    p.add_argument(
+        "--no-scale", action="store_true", help="do not scale pages into the frame"
+    )
+    p.add_argument("--no-draft", action="store_true", help="leave out draft text")
+    p.add_argument(
+        "--overwrite", action="store_true", help="overwrite existing outputs"
+    )
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(func=overlay)
+
+    p = commands.add_parser(
+        "worker", help="draw the page jobs of a shared queue folder"
+    )
+    p.add_argument("folder", help="queue folder of a DirectoryQueue")
+    p.add_argument(
+        "--layout",
+        action="append",
+        help="layout name or .ini path to load before the first job",
+    )
+    p.add_argument(
+        "--path",
+        action="append",
+        help="folder added to the module search path to import job functions",
+    )
+    p.add_argument(
+        "--idle", type=float, help="stop after this many seconds without a job"
+    )
+    p.add_argument("--max-jobs", type=int, help="stop after this many jobs")
+    p.add_argument(
+        "--key-file",
+        help="file holding the key of the DirectoryQueue. Jobs that are not signed with it are not run",
+    )
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(func=worker)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Module file that contains an AsyncFigPager class for asyncio applications. The FigPager is created, pages are saved
+and the pager is closed in an executor so layout reads, rendering and file writes do not block the event loop.
+Each AsyncFigPager uses its own single thread by default so the calls of one pager run in order and pagers in the
+same loop render side by side.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+import asyncio
+# used to pass keywords to the executor
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .figpager import FigPager
+
+
+class AsyncFigPager:
+
+    """ FigPager with awaitable construction, add_page and close """
+
+    def __init__(self, *args, executor=None, **kwargs):
+        """
+
+        Args:
+            *args: FigPager arguments, i.e. paper_size, nrows and ncols
+            executor: (concurrent.futures.Executor) (optional) thread executor that runs the FigPager calls. A
+            FigPager can not move between processes so process pools are not supported. Default is None, a
+            single thread owned by this pager
+            **kwargs: (optional) any additional FigPager keywords. Pass overwrite=True as the overwrite prompt
+            waits for console input
+        """
+
+        self.args = args
+        self.kwargs = kwargs
+        self.fp = None
+
+        self._own_executor = executor is None
+        self.executor = executor
+        if self._own_executor:
+            self.executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="figpager"
+            )
+
+    async def __aenter__(self):
+        """ Create the FigPager on entry """
+
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        """Close the pager on exit. On an exception resources are released without saving and the exception
+        is raised"""
+
+        if exc_type is None:
+            await self.close()
+        else:
+            await self.run(FigPager._release)
+            self._shutdown()
+        return False
+
+    def __getattr__(self, name):
+        """ Synchronous FigPager attributes and methods such as add_subplot """
+
+        fp = self.__dict__.get("fp")
+        if fp is None:
+            raise AttributeError(name)
+        return getattr(fp, name)
+
+    async def _call(self, func, *args, **kwargs):
+        """
+        Run a call in the executor
+
+        Returns: result of the call
+
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def open(self):
+        """
+        Create the FigPager, reading the layout and opening the outputs in the executor
+
+        Returns: FigPager
+
+        """
+        if self.fp is None:
+            self.fp = await self._call(FigPager, *self.args, **self.kwargs)
+        return self.fp
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run func(fp, *args, **kwargs) in the executor, i.e. to draw a page with many artists
+
+        Returns: result of func
+
+        """
+        return await self._call(func, self.fp, *args, **kwargs)
+
+    async def add_page(self, **kwargs):
+        """
+        Save the current page and draw the next one in the executor. Accepts the FigPager.add_page keywords
+
+        Returns: fig; figure instance, ax; axes instances, gs; GridSpec, transform; Figure Transform
+
+        """
+        return await self._call(self.fp.add_page, **kwargs)
+
+    async def close(self):
+        """
+        Save the last page and close the outputs in the executor
+
+        Returns: None
+
+        """
+        try:
+            await self._call(self.fp.close)
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        """
+        Stop the executor if it is owned by this pager
+
+        Returns: None
+
+        """
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
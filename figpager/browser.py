@@ -0,0 +1,252 @@
+"""
+Module file that contains a PageBrowser class used by FigPager to preview pages without an outfile. Each page is
+rendered once to an Agg bitmap at screen dpi as it is finished. The render runs on the calling thread and only the
+PNG compression, about a fifth of the time, runs in a background thread. A single window pages forward and back by
+swapping cached bitmaps. With zoom=True the most recent pages are also kept pickled, and a live figure is rebuilt
+from the pickled page only when one of them is zoomed.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to hold in memory bitmaps
+import io
+# used to rebuild live figures of zoomed pages
+import pickle
+# used to guard the decoded bitmap cache
+import threading
+from collections import OrderedDict
+# used to compress and decode bitmaps off the main thread
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+# keys that move between pages
+NEXT_KEYS = ["right", "down", "pagedown", " ", "n"]
+PREVIOUS_KEYS = ["left", "up", "pageup", "backspace", "p"]
+ZOOM_KEYS = ["z", "enter"]
+
+
+def _compress(rgba, size):
+    """
+    Compress a raw RGBA render to PNG bytes
+    Args:
+        rgba: raw RGBA bytes
+        size: (width, height) in pixels
+
+    Returns: PNG bytes
+
+    """
+
+    buf = io.BytesIO()
+    # a low compression level keeps up with page production
+    Image.frombuffer("RGBA", size, rgba, "raw", "RGBA", 0, 1).save(
+        buf, format="png", compress_level=1
+    )
+    return buf.getvalue()
+
+
+class PageBrowser:
+
+    """ Cache page bitmaps and browse them in a single window """
+
+    def __init__(self, dpi=100, zoom=False, cache_pages=8, zoom_pages=8):
+        """
+
+        Args:
+            dpi: (int) (optional) preview dpi. Default is 100
+            zoom: (boolean) (optional) keep pickled copies of page figures so a live figure can be rebuilt when
+            a page is zoomed. Default is False, only the bitmaps are kept
+            cache_pages: (int) (optional) number of decoded bitmaps kept in memory. Default is 8
+            zoom_pages: (int) (optional) number of most recent pages kept pickled for zooming. None keeps every
+            page, which costs the size of a figure per page. Default is 8
+        """
+
+        self.dpi = dpi
+        self.zoom = zoom
+        self.cache_pages = cache_pages
+        self.zoom_pages = zoom_pages
+
+        # compressed bitmap futures and pickled figures by page index
+        self.pages = []
+        self.figures = []
+
+        self._decoded = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1)
+
+        # browser window storage
+        self.current = 0
+        self.window = None
+        self._image = None
+
+    def __len__(self):
+        """ Number of pages added """
+
+        return len(self.pages)
+
+    def add(self, fig):
+        """
+        Add a finished page. The page is rendered now on the calling thread and compressed in the background. The
+        figure is released or, with skeleton=True, changed for the next page right afterwards, and matplotlib does
+        not support drawing a figure while another thread changes it. Most of the render also holds the GIL, so a
+        render thread would gain little
+
+        Args:
+            fig: page figure
+
+        Returns: (int) page number
+
+        """
+        buf = io.BytesIO()
+        fig.savefig(buf, format="rgba", dpi=self.dpi)
+        size = tuple(int(v * self.dpi) for v in fig.get_size_inches())
+        self.pages.append(self._pool.submit(_compress, buf.getvalue(), size))
+        self.figures.append(pickle.dumps(fig) if self.zoom else None)
+        # only the most recent pages stay zoomable
+        if (
+            self.zoom
+            and self.zoom_pages is not None
+            and len(self.figures) > self.zoom_pages
+        ):
+            self.figures[-self.zoom_pages - 1] = None
+        return len(self.pages)
+
+    def image(self, number):
+        """
+        Decoded bitmap of a page
+
+        Args:
+            number: (int) page number starting at 1
+
+        Returns: RGBA array
+
+        """
+        with self._lock:
+            if number in self._decoded:
+                self._decoded.move_to_end(number)
+                return self._decoded[number]
+
+        img = np.asarray(Image.open(io.BytesIO(self.pages[number - 1].result())))
+
+        with self._lock:
+            self._decoded[number] = img
+            while len(self._decoded) > self.cache_pages:
+                self._decoded.popitem(last=False)
+        return img
+
+    def figure(self, number):
+        """
+        Rebuild the live figure of a page from its pickled copy
+
+        Args:
+            number: (int) page number starting at 1
+
+        Returns: figure instance
+
+        """
+        if not self.zoom:
+            raise ValueError("Pages can only be zoomed with PageBrowser(zoom=True).")
+        if self.figures[number - 1] is None:
+            raise ValueError(
+                "Only the last {} pages can be zoomed. Set zoom_pages to keep more.".format(
+                    self.zoom_pages
+                )
+            )
+        return pickle.loads(self.figures[number - 1])
+
+    def go(self, number):
+        """
+        Show a page in the browser window. While the window is open the neighbouring pages are decoded in the
+        background
+
+        Args:
+            number: (int) page number starting at 1. Clipped to the pages added
+
+        Returns: (int) page number shown
+
+        """
+        number = min(max(number, 1), len(self.pages))
+        self.current = number
+        img = self.image(number)
+
+        if self.window is not None:
+            for near in [number + 1, number - 1]:
+                if 1 <= near <= len(self.pages):
+                    self._pool.submit(self.image, near)
+            self._image.set_data(img)
+            manager = self.window.canvas.manager
+            if manager is not None:
+                manager.set_window_title(
+                    "Page {} of {}".format(number, len(self.pages))
+                )
+            self.window.canvas.draw_idle()
+        return number
+
+    def _on_key(self, event):
+        """
+        Page forward and back, jump to the first or last page or zoom the current page
+
+        Args:
+            event: matplotlib key press event
+
+        Returns: None
+
+        """
+        if event.key in NEXT_KEYS:
+            self.go(self.current + 1)
+        elif event.key in PREVIOUS_KEYS:
+            self.go(self.current - 1)
+        elif event.key == "home":
+            self.go(1)
+        elif event.key == "end":
+            self.go(len(self.pages))
+        elif (
+            event.key in ZOOM_KEYS
+            and self.zoom
+            and self.figures[self.current - 1] is not None
+        ):
+            fig = self.figure(self.current)
+            fig.show()
+
+    def show(self, page=1):
+        """
+        Open the browser window and block until it is closed. Keys: right/left, page up/down, space, n/p, home/end
+        and z or enter to rebuild the page as a live figure for zooming
+
+        Args:
+            page: (int) (optional) first page shown. Default is 1
+
+        Returns: None
+
+        """
+        if not self.pages:
+            self.close()
+            return
+
+        img = self.image(min(max(page, 1), len(self.pages)))
+        height, width = img.shape[:2]
+        self.window = plt.figure(
+            figsize=(width / float(self.dpi), height / float(self.dpi)), dpi=self.dpi
+        )
+        # figimage draws the bitmap pixel for pixel without resampling
+        self._image = self.window.figimage(img, resize=True)
+        self.window.canvas.mpl_connect("key_press_event", self._on_key)
+        self.go(page)
+        plt.show()
+        self.close()
+
+    def close(self):
+        """
+        Close the browser window and stop the background thread
+
+        Returns: None
+
+        """
+        if self.window is not None:
+            plt.close(self.window)
+            self.window = None
+            self._image = None
+        self._pool.shutdown()
@@ -0,0 +1,137 @@
+"""
+Module file that contains pixel aware line decimation used by FigPager. A static function minmax_decimate
+reduces a line series to the first, last, minimum and maximum sample of every pixel column (M4 aggregation)
+so the rasterized line is unchanged. DecimatingAxes is an Axes subclass that applies it to plot calls.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+import numpy as np
+# used as the base class of the decimating axes
+from matplotlib.axes import Axes
+
+
+def minmax_decimate(x, y, width_px):
+    """
+    Reduce a monotonic line series to at most four samples per pixel column. datetime64 and timedelta64 x values
+    are binned by their integer value. Series that are short, not monotonic in x, not numeric or contain non finite
+    values are returned unchanged.
+
+    Args:
+        x: 1-D array of monotonically increasing numeric, datetime64 or timedelta64 x values
+        y: 1-D array of y values with the same length as x
+        width_px: (int) number of pixel columns the series is drawn into
+
+    Returns: decimated x, y arrays
+
+    """
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(x)
+    width_px = int(width_px)
+
+    if width_px < 1 or n <= 4 * width_px or x.ndim != 1 or y.shape != x.shape:
+        return x, y
+    # i.e. dates as datetime objects or category strings
+    if x.dtype.kind not in "biufmM" or y.dtype.kind not in "biuf":
+        return x, y
+
+    # dates and durations are binned on their integer values. NaT is the smallest integer
+    values = x
+    if x.dtype.kind in "mM":
+        if np.any(np.isnat(x)):
+            return x, y
+        values = x.view("i8")
+
+    # the pixel columns are only contiguous runs of samples when x is sorted
+    if not np.all(values[1:] >= values[:-1]) or not np.all(np.isfinite(y)):
+        return x, y
+
+    # start index of every non empty pixel column
+    edges = np.linspace(values[0], values[-1], width_px + 1)[:-1]
+    starts = np.unique(np.searchsorted(values, edges, side="left"))
+    starts = starts[starts < n]
+    counts = np.diff(np.append(starts, n))
+    column = np.repeat(np.arange(len(starts)), counts)
+
+    # the first sample in each column that reaches the column minimum and maximum
+    keep = [starts, starts + counts - 1]
+    for reduce in (np.minimum, np.maximum):
+        hits = np.flatnonzero(y == np.repeat(reduce.reduceat(y, starts), counts))
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = column[hits[1:]] != column[hits[:-1]]
+        keep.append(hits[first])
+
+    idx = np.unique(np.concatenate(keep))
+    return x[idx], y[idx]
+
+
+class DecimatingAxes(Axes):
+
+    """ Axes that decimate long line series to the pixel width of the axes before plotting """
+
+    # dpi the page is saved with. None uses the figure dpi
+    decimate_dpi = None
+    # columns per pixel. Oversampling keeps antialiased edges and axes margins identical
+    decimate_oversample = 4
+
+    def pixel_width(self):
+        """
+        Width of the axes in output pixels
+
+        Returns: (int) pixel width
+
+        """
+        dpi = self.decimate_dpi or self.figure.get_dpi()
+        return int(
+            np.ceil(self.get_position().width * self.figure.get_figwidth() * dpi)
+        )
+
+    def plot(self, *args, **kwargs):
+        """
+        Axes.plot that decimates a single x, y series before handing it to matplotlib.
+        Multiple series, 2-D data and the data keyword are plotted unchanged.
+
+        Returns: list of Line2D
+
+        """
+
+        if kwargs.get("data") is None and args:
+            fmt = ()
+            if isinstance(args[-1], str):
+                fmt = args[-1:]
+                args = args[:-1]
+
+            if len(args) in [1, 2] and not any(np.ma.isMaskedArray(a) for a in args):
+                y = np.asarray(args[-1])
+                if y.ndim == 1:
+                    x = np.asarray(args[0]) if len(args) == 2 else np.arange(len(y))
+                    x, y = minmax_decimate(
+                        x, y, self.pixel_width() * self.decimate_oversample
+                    )
+                    args = (x, y)
+
+            args = args + fmt
+
+        return super(DecimatingAxes, self).plot(*args, **kwargs)
+
+    def set_line_data(self, line, x, y):
+        """
+        Replace the data of a line drawn on these axes, decimated the same way as plot. Used to update a kept
+        skeleton page in place
+
+        Args:
+            line: Line2D returned by plot
+            x: x values
+            y: y values
+
+        Returns: None
+
+        """
+
+        x, y = minmax_decimate(
+            np.asarray(x), np.asarray(y), self.pixel_width() * self.decimate_oversample
+        )
+        line.set_data(x, y)
@@ -6,22 +6,44 @@ Written by Eben Pendleton
 MIT License
 """
 
-# used to deep copy config
-import copy
 # used in metadata
 import datetime
+# used to bind raster targets to their page budget saves
+import functools
+# used to collect released figures before leak check snapshots
+import gc
 # used to find calling path
 import inspect
+# used to hold in memory renders
+import io
+# used to stream table rows one page at a time
+import itertools
+# used to write the page index
+import json
 import os
+# used to match subplot labels in the page index
+import re
+# used to find the calling script from executor threads
+import sys
+# used by pagers running in executor threads
+import threading
+# used to time page drawing and saving
+import time
+import warnings
+# used to downscale thumbnails off the main thread
+from concurrent.futures import ThreadPoolExecutor
+
+# used to set the backend and rc settings
+import matplotlib
 
 # backend for display in GitHub Actions
-if os.environ.get('DISPLAY','') == '':
-    print('no display found. Using non-interactive Agg backend')
-    import matplotlib
-    matplotlib.use('Agg')
+if os.environ.get("DISPLAY", "") == "":
+    print("no display found. Using non-interactive Agg backend")
+    matplotlib.use("Agg")
 
 # used to draw lines on the figure
 import matplotlib.lines as lines  # isort: split
+
 # used to validate and read in ini files
 import configobj
 # matplotlib import used in setting figure and axes
@@ -32,16 +54,77 @@ import pkg_resources
 from matplotlib.backends.backend_pdf import PdfPages
 # used to set the plot layout in the figure
 from matplotlib.gridspec import GridSpec
+# used to clip table cells to their columns
+from matplotlib.transforms import Bbox, TransformedBbox
+# used to resample a single render into raster outputs of several sizes
+from PIL import Image, PngImagePlugin
 # import the validator
 from validate import Validator
 
-# set up the base string depending if we are running Python 2 or Python 3
-try:
-    # check whether python knows about 'basestring'
-    isinstance("aaa", basestring)
-except NameError:
-    # Ut doesn't (it's Python 3); use 'str' instead
-    basestring = str
+# used to preview pages without an outfile
+from .browser import PageBrowser
+# used to decimate long line series in subplots
+from .decimate import DecimatingAxes
+# used to fill in page numbers once the page count is known
+from .stamp import (STAMPED_RASTER_TYPES, fill_page_numbers, stamp_pdf,
+                    stamp_raster)
+# used to reduce memory mapped and chunked inputs before plotting
+from .streaming import (CHUNKSIZE, streaming_envelope, streaming_histogram,
+                        streaming_histogram2d)
+# used to reuse measured text layouts across pages
+from .textcache import CachedText, hooks_available
+from .tiled import BAND_ROWS, TILED_TYPES, png_text, save_tiled
+
+# EXIF tags of the metadata keys kept in jpeg, tiff and webp pages resampled from one render
+EXIF_TAGS = {"Title": 0x010E, "Author": 0x013B, "Copyright": 0x8298, "Software": 0x0131}
+
+# file types written from an Agg render
+RASTER_TYPES = ["png", "jpg", "jpeg", "tif", "tiff", "webp"]
+
+# labels given to subplots by add_subplot, i.e. (0,1, 2)
+SUBPLOT_LABEL = re.compile(r"^\(\d+,\d+, \d+\)$")
+
+# configspec validators for the layout options. Add keys and values as needed
+LAYOUT_SPEC = {
+    "figure_unit": "option('inch', 'mm', default='inch')",
+    "constrained_layout": "boolean",
+    "source_path": "boolean",
+    "source_path_position": "float_list_value",
+    "source_path_fontcolor": "string",
+    "source_path_fontsize": "float",
+    "margin_frame": "boolean",
+    "left_margin": "float(min=0)",
+    "right_margin": "float(min=0)",
+    "top_margin": "float(min=0)",
+    "bottom_margin": "float(min=0)",
+    "margin_pad": "float",
+    "framecolor": "string",
+    "framelinewidth": "float",
+    "box_frame": "boolean",
+    "box_label": "string",
+    "box_adjust_margin": "boolean",
+    "box_position": "float_list_value",
+    "box_height": "float",
+    "box_width": "float",
+    "text": "string",
+    "text_position": "float_list_value",
+    "text_position_offset": "float_list_value",
+    "horizontalalignment": "string",
+    "fontcolor": "string",
+    "fontsize": "float",
+    "fontstyle": "string",
+    "rotation": "integer",
+    "line_position_start": "float_list_value",
+    "line_position_end": "float_list_value",
+    "line_min": "float",
+    "line_max": "float",
+    "line_length": "string",
+    "line_width": "float",
+    "line_color": "string",
+    "linestyle": "string",
+    "image_path": "string",
+    "image_position": "float_list_value",
+}
 
 
 def float_list_value(v, minl=None, maxl=None, minv=None, maxv=None):
@@ -58,12 +141,314 @@ def float_list_value(v, minl=None, maxl=None, minv=None, maxv=None):
 
     """
 
-    vdt = Validator()
-    is_float = vdt.functions["float"]
-    is_list = vdt.functions["list"]
+    is_float = _vdt.functions["float"]
+    is_list = _vdt.functions["list"]
 
     return [is_float(mem, min=minv, max=maxv) for mem in is_list(v, minl, maxl)]
 
+
+# validator shared by the paper size and layout configs
+_vdt = Validator()
+_vdt.functions["float_list_value"] = float_list_value
+
+
+def parse_layout(file):
+    """
+    Read a layout file in a single pass. Block comments, opened and closed by a line holding only three double
+    quotes, are converted to # lines and the configspec is built from LAYOUT_SPEC for every option line. Error if
+    an option is not found.
+    Args:
+        file: layout file path
+
+    Returns: list of the layout lines, list of the configspec lines
+
+    """
+
+    lines = []
+    spec = []
+    block_comment = False
+    with open(file, "r") as f:
+        for line in f:
+            # handle some Python 2 / Python 3 line endings differences. Present on macOS at least.
+            line = line.replace("\r", "")
+            t = line.strip().strip("'").replace("'", "")
+
+            # block comment
+            if line.rstrip("\n") == '"""':
+                block_comment = not block_comment
+                lines.append("#" + line)
+                continue
+            if block_comment:
+                lines.append("#" + line)
+                continue
+
+            lines.append(line)
+
+            # sections are kept in the spec. Comments and blank lines are not needed
+            if t[0:1] == "[":
+                spec.append(t)
+            elif t[0:1] not in ["", "#"] and "=" in t:
+                key = t.split("=", 1)[0].strip()
+                try:
+                    spec.append(key + " = " + LAYOUT_SPEC[key])
+                except KeyError:
+                    raise KeyError("Key + " + key + " not found")
+
+    return lines, spec
+
+
+def load_layout(file):
+    """
+    Read and validate a layout file
+    Args:
+        file: layout file path
+
+    Returns: validated ConfigObj of the layout
+
+    """
+
+    lines, spec = parse_layout(file)
+    config = configobj.ConfigObj(lines, configspec=spec)
+    config.validate(_vdt)
+    return config
+
+
+# validated paper sizes, read once per process
+_paper_size_config = None
+
+
+def load_paper_sizes():
+    """
+    Read and validate the packaged paper_sizes.ini once per process
+
+    Returns: validated ConfigObj of the paper sizes
+
+    """
+
+    global _paper_size_config
+    if _paper_size_config is None:
+        cfg = """
+        [paper_sizes]
+        [[__many__]]
+        width_mm=integer
+        height_mm=integer
+        width_in=float
+        height_in=float
+        """
+        # formst the config above
+        spec = cfg.split("\n")
+
+        # read in the ini file of paper sizes
+        config = configobj.ConfigObj(
+            pkg_resources.resource_filename("figpager", "page_layout/paper_sizes.ini"),
+            configspec=spec,
+        )
+
+        # validate against the config above
+        config.validate(_vdt)
+        _paper_size_config = config
+    return _paper_size_config
+
+
+# validated layouts and layout images keyed by file path, modification time and size
+_layout_cache = {}
+_image_cache = {}
+# guards the caches and pyplot's figure manager when pagers run in several threads
+_cache_lock = threading.Lock()
+_pyplot_lock = threading.RLock()
+# number of layout images kept in memory
+IMAGE_CACHE_SIZE = 32
+
+# traced memory growth in bytes reported by leak_check=True
+LEAK_THRESHOLD = 4 * 2 ** 20
+
+# lowest dpi and number of saves used to fit a page into max_bytes_per_page
+MIN_BUDGET_DPI = 36
+BUDGET_ATTEMPTS = 4
+
+# svg element id salt of reproducible pages. matplotlib salts ids with a random uuid by default
+SVG_HASHSALT = "figpager"
+
+
+def source_date():
+    """
+    Date stamped in reproducible outputs. Set by the SOURCE_DATE_EPOCH environment variable in seconds since
+    1970-01-01 UTC, the convention of reproducible builds
+
+    Returns: timezone aware datetime. 1970-01-01 UTC if SOURCE_DATE_EPOCH is not set
+
+    """
+    epoch = int(os.environ.get("SOURCE_DATE_EPOCH", 0))
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc)
+
+
+def _set_ps_date(path):
+    """
+    Replace the creation date comment of a PostScript file with the source date. matplotlib only reads
+    SOURCE_DATE_EPOCH from the environment for PostScript, which is shared by all threads
+
+    Returns: None
+
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    date = source_date().strftime("%a %b %d %H:%M:%S %Y").encode("ascii")
+    data = re.sub(
+        rb"^%%CreationDate: [^\r\n]*",
+        b"%%CreationDate: " + date,
+        data,
+        count=1,
+        flags=re.M,
+    )
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+# pages finished by every FigPager of this process. Used to recycle scheduler workers
+_pages_finished = 0
+
+
+def pages_finished():
+    """
+    Number of pages finished by every FigPager of this process
+
+    Returns: (int) page count
+
+    """
+
+    return _pages_finished
+
+
+class _ChangeTracking:
+
+    """ configobj Section methods that mark the option index of a FigPager out of date when the config changes """
+
+    def __setitem__(self, key, value, unrepr=False):
+        super(_ChangeTracking, self).__setitem__(key, value, unrepr)
+        # new subsections are plain configobj Sections
+        _track_changes(dict.__getitem__(self, key))
+        self.main.options_changed = True
+
+    def __delitem__(self, key):
+        super(_ChangeTracking, self).__delitem__(key)
+        self.main.options_changed = True
+
+    def clear(self):
+        super(_ChangeTracking, self).clear()
+        self.main.options_changed = True
+
+
+class _TrackedSection(_ChangeTracking, configobj.Section):
+    pass
+
+
+class _TrackedConfigObj(_ChangeTracking, configobj.ConfigObj):
+    pass
+
+
+def _track_changes(section):
+    """
+    Make a ConfigObj and its subsections mark main.options_changed when an option is set or removed
+
+    Args:
+        section: ConfigObj, Section or any other value, which is left as is
+
+    Returns: None
+
+    """
+
+    if isinstance(section, _ChangeTracking) or not isinstance(
+        section, configobj.Section
+    ):
+        return
+    if isinstance(section, configobj.ConfigObj):
+        section.__class__ = _TrackedConfigObj
+    else:
+        section.__class__ = _TrackedSection
+    for value in dict.values(section):
+        _track_changes(value)
+
+
+def _file_key(path):
+    """
+    Cache key of a file that changes when the file is edited
+    Args:
+        path: file path
+
+    Returns: (absolute path, modification time, size)
+
+    """
+
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def _cached_layout(file):
+    """
+    Read and validate a layout file once per file version
+    Args:
+        file: layout file path
+
+    Returns: ConfigObj copy of the validated layout, cache hit boolean
+
+    """
+
+    key = _file_key(file)
+    config = _layout_cache.get(key)
+    hit = config is not None
+    if not hit:
+        config = load_layout(file)
+        with _cache_lock:
+            # drop older versions of the same file
+            for old in [k for k in _layout_cache if k[0] == key[0]]:
+                del _layout_cache[old]
+            _layout_cache[key] = config
+
+    # copy so changes made to one FigPager config do not leak into the cache
+    return configobj.ConfigObj(config.dict()), hit
+
+
+def _cached_image(fname):
+    """
+    Read a layout image once per file version. The returned array is read only and shared
+    Args:
+        fname: image file path
+
+    Returns: image array, cache hit boolean
+
+    """
+
+    key = _file_key(fname)
+    img = _image_cache.get(key)
+    hit = img is not None
+    if not hit:
+        filename, file_extension = os.path.splitext(fname)
+        img = plt.imread(fname, format=file_extension)
+        img.flags.writeable = False
+        with _cache_lock:
+            if len(_image_cache) >= IMAGE_CACHE_SIZE:
+                _image_cache.pop(next(iter(_image_cache)))
+            _image_cache[key] = img
+    return img, hit
+
+
+def _save_thumbnail(img, path, width):
+    """
+        Downscale a page render and save it as a PNG thumbnail. Runs in a worker thread
+    Args:
+        img: PIL image of the page
+        path: thumbnail file path
+        width: thumbnail width in pixels
+
+    Returns: thumbnail file path
+
+    """
+
+    height = max(1, int(round(img.size[1] * width / float(img.size[0]))))
+    img.resize((width, height), Image.LANCZOS).save(path)
+    return path
+
+
 class FigPager:
 
     """ Class to use matplotlib's figure with multi and single page outputs """
@@ -75,6 +460,9 @@ class FigPager:
     # used to find ini files saved in the package
     page_layout_path = pkg_resources.resource_filename("figpager", "page_layout/")
 
+    # keep all page number text for stamping, i.e. for layouts drawn once and used on many pages
+    defer_page_numbers = False
+
     def __init__(
         self,
         paper_size,
@@ -100,6 +488,20 @@ class FigPager:
         draft=True,
         wspace=0.2,
         hspace=0.2,
+        draft_outfile=None,
+        thumbnail_dir=None,
+        thumbnail_width=160,
+        index_file=None,
+        metrics=None,
+        leak_check=False,
+        text_cache=False,
+        skeleton=False,
+        preview=False,
+        reproducible=False,
+        tiled=False,
+        max_pixels=None,
+        max_bytes_per_page=None,
+        golden=None,
     ):
 
         """
@@ -112,7 +514,9 @@ class FigPager:
             layout: (string) (optional) layout name or layout filepath.
             width_ratios:  (list of ints or floats) (optional) GridSpec width ratios. Default is 1.
             height_ratios: (list of ints or floats) (optional) GridSpec height ratios. Default is 1.
-            outfile: (string) (optional) out file path. If None (default) plt.show() is run.
+            outfile: (string or list) (optional) out file path. If None (default) plt.show() is run. A list of
+            targets writes every page to each of them. A target is a file path, a (file path, dpi) tuple or a dict
+            with path and dpi keys. Raster targets share one render at the highest dpi.
             orientation: (string) (optional) Portrait or Landscape page orientation.
             dpi: (int) (optional) Figure dpi. Default is 300.
             facecolor: (string) (optional) Figure facecolor. Default is white.
@@ -123,7 +527,8 @@ class FigPager:
             pad_inches: (float) (optional) Amount of padding around the figure when bbox_inches is 'tight'.
             If None, use savefig.pad_inches
             metadata: (dict) (optional) Key/value pairs to store in the image metadata. The supported keys and
-            defaults depend on the image format and backend:
+            defaults depend on the image format and backend. Raster pages resampled from one render keep them as PNG
+            text, or as EXIF for the EXIF_TAGS keys
             subplotstartindex: (list of ints) (optional) First subplot on a page row and column index.
             direction: (string) (optional) subplot creation direction. Default is left-to-right.
             overwrite: (boolean) (optional) Boolean on whether to overwrite existing output. Default is True
@@ -132,47 +537,91 @@ class FigPager:
             draft: Add draft stamp if available from ini. Default is True
             wspace: Add height spacing for subplots adjust. Default is 0.2
             hspace: Add horizontal spacing for subplots adjust. Default is 0.2
+            draft_outfile: (string or list) (optional) out file path(s) for a draft variant. Pages are drawn once and
+            saved twice: outfile gets the final version without the draft stamps and draft_outfile gets the draft
+            version. Accepts the same targets as outfile.
+            thumbnail_dir: (string) (optional) directory for per page PNG thumbnails. Thumbnails are downscaled in a
+            thread pool while the report is generated. Default is None, no thumbnails
+            thumbnail_width: (int) (optional) thumbnail width in pixels. Default is 160
+            index_file: (string) (optional) JSON page index path with page numbers, thumbnail paths, subplot labels
+            and titles. Default is index.json in thumbnail_dir
+            metrics: (Metrics) (optional) figpager.Metrics that counts pages, subplots, bytes written per format and
+            layout/image cache hits and times draw_page and page saves. A Metrics can be shared by many FigPagers.
+            close() exports it. Default is None
+            leak_check: (boolean or int) (optional) trace Python allocations with tracemalloc from the first saved page
+            to close. close() warns with a ResourceWarning if traced memory grew by more than the given number of
+            bytes (4 MiB if True) or if a figure is still open, and sets self.leak_report. Slows rendering.
+            Default is False
+            text_cache: (boolean) (optional) reuse the measured layout of layout text, the source path and table
+            headers across pages for identical string, font, size, rotation and dpi. The cache overrides private
+            matplotlib internals and falls back to plain text with a RuntimeWarning on untested matplotlib releases.
+            Default is False
+            skeleton: (boolean) (optional) keep the figure, layout and subplots of a page for the next pages. add_page
+            saves the page and keeps its artists, and add_subplot returns the axes made at the same step of the first
+            page so plots are updated in place with set_data, set_array, limits and titles. Axes not returned on a
+            page are hidden. add_page arguments that change the page geometry or layout draw a new skeleton.
+            Default is False
+            preview: (boolean or PageBrowser) (optional) without an outfile, cache each page as a bitmap and browse
+            all pages in one window at close() instead of blocking on plt.show() for every page. A PageBrowser sets
+            the preview dpi and zoom. Default is False
+            reproducible: (boolean) (optional) write the same bytes for the same pages. Dates in pdf, svg and eps
+            files are set from SOURCE_DATE_EPOCH, or 1970-01-01 UTC if it is not set, and svg ids are salted with a
+            fixed string. The source path of the calling script is still drawn, so run the same script from the
+            same path. Default is False
+            tiled: (boolean or int) (optional) render png and tiff pages in horizontal bands of this many pixel rows,
+            512 if True, and stream each band into the file, so memory does not grow with the page size. Bands
+            match a whole page render apart from antialiasing at clipped line segments. Not used with bbox_inches.
+            Default is False
+            max_pixels: (int) (optional) largest pixel count of a page. The dpi of raster pages and of images and
+            rasterized artists in vector pages is lowered to fit the page size. Default is None, no limit
+            max_bytes_per_page: (int) (optional) largest encoded size of a page in bytes. Raster pages over the
+            budget are saved again at a lower dpi and pdf pages are sized in memory first. Vector content is not
+            reduced, so a page may stay over the budget with a RuntimeWarning. With either budget the dpi and size of
+            every saved page are kept in self.page_stats. Default is None, no limit
+            golden: (GoldenPages) (optional) compare every page with its golden reference as it is finished, with or
+            without an outfile. Call golden.check() after close(). Default is None
         """
 
+        # metrics are set up first so the initial layout read is counted
+        self.metrics = metrics
+        if self.metrics is not None:
+            self._register_metrics()
+
         # obtain the caller path
         self.callerpath = self.get_caller_filepath()
 
         self.type = None
         self.outfile = None
-        # Obtain the out path. Error on the outfile being a directory
+        self.pdf = None
+        # Obtain the out paths. The first target is the primary outfile
+        self.targets = []
         if outfile is not None:
-            if os.path.isdir(outfile):
-                raise IOError("This is a directory. Please provide a file path.")
-
-            # test if outfile exists already and raise an error if it does
-            if os.path.isfile(outfile):
-                if overwrite:
-                    os.remove(outfile)
-                else:
-                    data = input(
-                        "The output file already exists. "
-                        + "Would you like to overwrite? [y/n] "
-                    )
+            for target in self._target_list(outfile):
+                self.targets.append(self._make_target(target, overwrite))
 
-                    if data.lower() == "y":
-                        os.remove(outfile)
-                    else:
-                        raise IOError(
-                            "Output file already exists and user chose not to overwrite."
-                        )
             # hold file type
-            self.type = os.path.splitext(outfile)[1][1:]
+            self.type = self.targets[0]["type"]
 
             # hold outfile full path
-            self.outfile = outfile
+            self.outfile = self.targets[0]["path"]
+            self.pdf = self.targets[0]["pdf"]
 
         # hold multipage indicator
-        self.multipage = False
-        if self.type in ["pdf", "pgf"]:
+        self.multipage = self.pdf is not None
 
-            # Create the PdfPages object to which we will save the pages:
-            self.pdf = PdfPages(self.outfile)
-            self.multipage = True
+        # draft variant targets. Draft artists are hidden for the other targets
+        self.draft_artists = []
+        if draft_outfile is not None:
+            if outfile is None:
+                raise ValueError(
+                    "draft_outfile requires an outfile for the final version."
+                )
+            for target in self.targets:
+                target["variant"] = "final"
+            for target in self._target_list(draft_outfile):
+                self.targets.append(
+                    self._make_target(target, overwrite, variant="draft")
+                )
 
         # initialize layout containers
         # to hold layout file path
@@ -182,44 +631,26 @@ class FigPager:
 
         # read in the layout we are using and set layout and layout path
         self._read_layout(layout)
-        # set up config
+        # set up config and the flat option index
         self.config = None
+        self.options = {}
+        # config the option index was built from
+        self._options_config = None
 
         # determine the papersize from inputs
         # if its a string rather than a tuple then read in the value a0, etc)
-        if isinstance(paper_size, basestring):
-            cfg = """
-            [paper_sizes]
-            [[__many__]]
-            width_mm=integer
-            height_mm=integer
-            width_in=float
-            height_in=float
-            """
-            # formst the config above
-            spec = cfg.split("\n")
-
-            # read in the ini file of paper sizes
-            config = configobj.ConfigObj(
-                os.path.join(self.page_layout_path, "paper_sizes.ini"), configspec=spec,
-            )
+        # save the paper size config
+        self.paper_size_config = load_paper_sizes()
 
-            # validate against the config above
-            vdt = Validator()
-            config.validate(vdt)
+        # set up and store paper / page attributes
+        self.pagewidth_inch = None
+        self.pageheight_inch = None
 
-            # save the paper size config
-            self.paper_size_config = copy.deepcopy(config)
+        self.orientation = orientation
+        self.paper_size = paper_size
 
-            # set up and store paper / page attributes
-            self.pagewidth_inch = None
-            self.pageheight_inch = None
-
-            self.orientation = orientation
-            self.paper_size = paper_size
-
-            # update the orientation based on paper size
-            self._set_paper_size_orientation()
+        # update the orientation based on paper size
+        self._set_paper_size_orientation()
 
         # set up the figure parameters from init
         self.nrows = nrows
@@ -241,6 +672,14 @@ class FigPager:
         self.bbox_inches = bbox_inches
         self.pad_inches = pad_inches
         self.metadata = metadata
+        self.reproducible = reproducible
+        self.tiled = BAND_ROWS if tiled is True else tiled
+        self.max_pixels = max_pixels
+        self.max_bytes_per_page = max_bytes_per_page
+        # page number, size in inches and the path, dpi and bytes of each target of every saved page. Only kept
+        # with a budget, so long runs without one do not grow a record per page
+        self.page_stats = []
+        self._keep_page_stats = max_pixels is not None or max_bytes_per_page is not None
 
         # save current filename as possible next filename base if not multipage
         self.new_fname = self.outfile
@@ -259,63 +698,817 @@ class FigPager:
         self.bottommargin = None
         self.marginpad = None
 
-        self.framewidth = None
-        self.frameheight = None
+        self.framewidth = None
+        self.frameheight = None
+
+        # set up the source path attributes
+        # the source path is a path to the calling script
+        self.source_path = None
+        self.source_path_position = None
+        self.source_path_fontcolor = None
+        self.source_path_fontsize = None
+
+        # update from layout
+        self._update_from_layout()
+
+        # set the inital subgraphic index
+        self.subplotstartindex = subplotstartindex
+        self.currentsubplotindex = subplotstartindex
+        self.direction = direction
+
+        # transform storage
+        self.transform = None
+
+        # subplt counter storage
+        self.subplotcounter = 0
+
+        # number of pages saved or shown
+        self.pagecount = 0
+
+        # thumbnail and page index storage
+        self.thumbnail_dir = thumbnail_dir
+        self.thumbnail_width = thumbnail_width
+        self.index_file = index_file
+        self.page_index = []
+        self._thumbnail_pool = None
+        self._thumbnail_jobs = []
+        if self.thumbnail_dir is not None:
+            if not os.path.isdir(self.thumbnail_dir):
+                os.makedirs(self.thumbnail_dir)
+            if self.index_file is None:
+                self.index_file = os.path.join(self.thumbnail_dir, "index.json")
+            self._thumbnail_pool = ThreadPoolExecutor(max_workers=2)
+
+        self.text_cache = text_cache
+        if text_cache and not hooks_available():
+            warnings.warn(
+                "The text cache relies on private hooks that matplotlib {} does not provide as tested. Text is "
+                "drawn without the cache.".format(matplotlib.__version__),
+                RuntimeWarning,
+            )
+            self.text_cache = False
+
+        # page browser used instead of plt.show() when there is no outfile
+        self.browser = None
+        if outfile is None and (isinstance(preview, PageBrowser) or preview):
+            self.browser = (
+                preview if isinstance(preview, PageBrowser) else PageBrowser()
+            )
+        self.golden = golden
+
+        # deferred {pages} texts of the current page and of every saved page, keyed by page number
+        self._page_stamps = []
+        self.stamps = {}
+
+        # skeleton storage. Axes in the order add_subplot made them, the next one to return, layout text with a
+        # {page} placeholder and text_at_label artists to update in place
+        self.skeleton = skeleton
+        self.reused_page = False
+        self._skeleton_axes = []
+        self._skeleton_next = 0
+        self._page_texts = []
+        self._label_texts = {}
+
+        # table row pitch in inches measured once per font
+        self._row_pitch = {}
+
+        # numbers of the pyplot figures drawn by this instance that are still open
+        self._fignums = set()
+        self.closed = False
+
+        # leak check storage. The baseline is taken after the first page so caches are warm
+        self.leak_check = leak_check
+        self.leak_report = None
+        self._leak_baseline = None
+        self._started_tracemalloc = False
+        if self.leak_check:
+            # tracemalloc is only imported for the leak check
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+
+        # draw the initial page
+        self.fig, self.ax, self.gs, self.transform = self.draw_page()
+
+    def __enter__(self):
+        """ Return self on entry """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        """Close the figure on exit. On an exception resources are released without saving and the exception
+        is raised"""
+
+        if exc_type is None:
+            self.close()
+        else:
+            self._release()
+        return False
+
+    def get_caller_filepath(self):
+
+        """
+        Get the caller absolute file path.
+        Reference:  https://stackoverflow.com/a/55469882
+        Get the caller's stack frame and extract its file path
+        """
+
+        if threading.current_thread() is threading.main_thread():
+            frame_info = inspect.stack()[-1]
+            # in python 3.5+, you can use frame_info.filename
+            filepath = frame_info[1]
+            # drop the reference to the stack frame to avoid reference cycles
+            del frame_info
+        else:
+            # pagers created in executor threads report the script run by the main thread
+            frame = sys._current_frames()[threading.main_thread().ident]
+            while frame.f_back is not None:
+                frame = frame.f_back
+            filepath = frame.f_code.co_filename
+            del frame
+
+        # make the path absolute
+        filepath = os.path.abspath(filepath)
+        return filepath
+
+    def _register_metrics(self):
+        """
+        Register the FigPager counters and histograms with self.metrics
+
+        Returns: None
+
+        """
+        m = self.metrics
+        m.counter("pages_rendered", "Pages saved or shown.")
+        m.counter("subplots_created", "Subplots added with add_subplot.")
+        m.counter(
+            "pages_reused", "Pages drawn by updating the previous page's skeleton."
+        )
+        m.counter("bytes_written", "Bytes written to output files by format.")
+        m.counter("cache_hits", "Layout and image cache hits.")
+        m.counter("cache_misses", "Layout and image cache misses.")
+        m.histogram("draw_page_seconds", "Time to draw a page layout.")
+        m.histogram("save_seconds", "Time to save a page to every output target.")
+
+    def _count(self, name, value=1, **labels):
+        """
+        Increase a counter of self.metrics if set
+        Args:
+            name: counter name
+            value: (optional) amount to add. Default is 1
+            **labels: (optional) label names and values
+
+        Returns: None
+
+        """
+        if self.metrics is not None:
+            self.metrics.inc(name, value, **labels)
+
+    def _count_cache(self, cache, hit):
+        """
+        Count a layout or image cache lookup
+        Args:
+            cache: cache name, layout or image
+            hit: (boolean) cache hit
+
+        Returns: None
+
+        """
+        self._count("cache_hits" if hit else "cache_misses", cache=cache)
+
+    def _count_bytes(self, path, filetype):
+        """
+        Count the size of a written output file
+        Args:
+            path: output file path
+            filetype: output file type
+
+        Returns: None
+
+        """
+        if self.metrics is not None and os.path.isfile(path):
+            self._count("bytes_written", os.path.getsize(path), format=filetype)
+
+    def _target_list(self, outfile):
+        """
+        Wrap a single output target in a list
+
+        Args:
+            outfile: output target or list of output targets
+
+        Returns: list of output targets
+
+        """
+        # a path object is a single file path
+        if isinstance(outfile, (str, dict, os.PathLike)):
+            return [outfile]
+        # a single (file path, dpi) tuple
+        if isinstance(outfile, tuple) and not isinstance(
+            outfile[-1], (str, dict, tuple, os.PathLike)
+        ):
+            return [outfile]
+        return list(outfile)
+
+    def _make_target(self, target, overwrite, variant=None):
+        """
+        Check an output target and open its multipage backend
+
+        Args:
+            target: file path, (file path, dpi) tuple or dict with path and an optional dpi
+            overwrite: (boolean) Boolean on whether to overwrite existing output
+            variant: (string) (optional) draft or final variant of the page. Default is None, drawn as set by draft
+
+        Returns: target dict with path, type, dpi, new_fname, pdf and variant keys
+
+        """
+        if isinstance(target, dict):
+            path = target["path"]
+            dpi = target.get("dpi")
+        elif isinstance(target, (str, os.PathLike)):
+            path = target
+            dpi = None
+        else:
+            path, dpi = target
+        path = os.fspath(path)
+
+        # Error on the outfile being a directory
+        if os.path.isdir(path):
+            raise IOError("This is a directory. Please provide a file path.")
+
+        # test if outfile exists already and raise an error if it does
+        if os.path.isfile(path):
+            if overwrite:
+                os.remove(path)
+            else:
+                data = input(
+                    "The output file already exists. "
+                    + "Would you like to overwrite? [y/n] "
+                )
+
+                if data.lower() == "y":
+                    os.remove(path)
+                else:
+                    raise IOError(
+                        "Output file already exists and user chose not to overwrite."
+                    )
+
+        filetype = os.path.splitext(path)[1][1:].lower()
+
+        pdf = None
+        if filetype in ["pdf", "pgf"]:
+            # Create the PdfPages object to which we will save the pages:
+            pdf = PdfPages(path)
+
+        return {
+            "path": path,
+            "type": filetype,
+            "dpi": dpi,
+            "new_fname": path,
+            "pdf": pdf,
+            "variant": variant,
+        }
+
+    def _savefig_kwargs(self, dpi=None, filetype=None):
+        """
+        Figure save keywords from the figure attributes in self
+
+        Args:
+            dpi: (int) (optional) target dpi. Default is self.dpi
+            filetype: (string) (optional) file type. Sets the date metadata of reproducible svg files
+
+        Returns: dict of savefig keywords
+
+        """
+        metadata = self.metadata
+        if self.reproducible and filetype in ["svg", "svgz"]:
+            metadata = dict({"Date": source_date().isoformat()}, **(metadata or {}))
+
+        return dict(
+            dpi=dpi or self.dpi,
+            facecolor=self.facecolor,
+            edgecolor=self.edgecolor,
+            orientation=self.orientation,
+            transparent=self.transparent,
+            bbox_inches=self.bbox_inches,
+            pad_inches=self.pad_inches,
+            metadata=metadata,
+        )
+
+    def _save_page(self):
+        """
+        Save the current figure to every output target. The draft variant is saved with the draft artists
+        shown and the final variant with them hidden.
+
+        Returns: None
+
+        """
+        start = time.perf_counter()
+        if self._keep_page_stats:
+            width, height = self.fig.get_size_inches()
+            self.page_stats.append(
+                {
+                    "page": self.pagecount,
+                    "width_in": width,
+                    "height_in": height,
+                    "targets": [],
+                }
+            )
+        for variant in ["draft", "final", None]:
+            targets = [t for t in self.targets if t["variant"] == variant]
+            if not targets:
+                continue
+            if variant is not None:
+                for artist in self.draft_artists:
+                    artist.set_visible(variant == "draft")
+            self._save_targets(targets)
+
+        if self.metrics is not None:
+            self.metrics.observe("save_seconds", time.perf_counter() - start)
+
+    def _save_targets(self, targets):
+        """
+        Save the current figure to the given output targets. Multipage targets get a new page, vector targets are
+        saved directly, tiled targets are rendered in bands and all other raster targets share a single Agg render.
+
+        Args:
+            targets: list of target dicts
+
+        Returns: None
+
+        """
+        raster = []
+        tiled = []
+        for target in targets:
+            dpi = self._target_dpi(target)
+            if target["pdf"] is not None:
+                size = None
+                if self.max_bytes_per_page is not None:
+                    dpi, size = self._fit_budget(
+                        self._pdf_page_size, dpi, self._pdf_page_size(dpi)
+                    )
+                try:
+                    target["pdf"].savefig(self.fig, **self._savefig_kwargs(dpi))
+                except AttributeError as a:
+                    if str(a) == "'NoneType' object has no attribute 'endStream'":
+                        raise AttributeError(
+                            "Cannot add a new page to a closed pdf file."
+                        )
+                    raise
+                self._page_stat(target, dpi, size)
+            elif (
+                self.tiled
+                and self.bbox_inches is None
+                and target["type"] in TILED_TYPES
+            ):
+                self._save_raster_target(target, dpi)
+                tiled.append(target)
+            elif target["type"] in RASTER_TYPES:
+                raster.append(target)
+            else:
+                # probably number 02, 03 etc '{:02}'.format(1)
+                kwargs = self._savefig_kwargs(dpi, target["type"])
+                if self.reproducible and target["type"] in ["svg", "svgz"]:
+                    # the salt is only read from rcParams, which are shared by all threads
+                    with _pyplot_lock, matplotlib.rc_context(
+                        {"svg.hashsalt": SVG_HASHSALT}
+                    ):
+                        self.fig.savefig(target["new_fname"], **kwargs)
+                else:
+                    self.fig.savefig(target["new_fname"], **kwargs)
+                if self.reproducible and target["type"] in ["ps", "eps"]:
+                    _set_ps_date(target["new_fname"])
+                self._count_bytes(target["new_fname"], target["type"])
+                self._page_stat(target, dpi, os.path.getsize(target["new_fname"]))
+
+        if len(raster) == 1:
+            self._save_raster_target(raster[0], self._target_dpi(raster[0]))
+        elif raster:
+            self._save_raster(raster)
+
+        for target in raster + tiled:
+            dpi = self._target_dpi(target)
+            size = os.path.getsize(target["new_fname"])
+            if self.max_bytes_per_page is not None:
+                save = functools.partial(self._save_raster_target, target)
+                dpi, size = self._fit_budget(save, dpi, size)
+            self._count_bytes(target["new_fname"], target["type"])
+            self._page_stat(target, dpi, size)
+
+        # raster pages with deferred texts are stamped at close
+        if self.pagecount in self.stamps:
+            for target in raster + tiled:
+                target.setdefault("stamped", []).append(
+                    (self.pagecount, target["new_fname"])
+                )
+
+    def _target_dpi(self, target):
+        """
+        dpi of a target for the current page. max_pixels lowers the dpi of large pages. The page size is taken from
+        the figure, as add_page sets the paper size of the next page before the current one is saved
+
+        Args:
+            target: target dict
+
+        Returns: dpi
+
+        """
+        dpi = target["dpi"] or self.dpi
+        if self.max_pixels is not None:
+            width, height = self.fig.get_size_inches()
+            dpi = min(dpi, max(1, int((self.max_pixels / (width * height)) ** 0.5)))
+        return dpi
+
+    def _save_raster_target(self, target, dpi):
+        """
+        Save the current figure to a single raster target
+
+        Args:
+            target: raster target dict
+            dpi: (int) dpi
+
+        Returns: size of the file in bytes
+
+        """
+        if self.tiled and self.bbox_inches is None and target["type"] in TILED_TYPES:
+            kwargs = self._savefig_kwargs(dpi)
+            for key in ["dpi", "bbox_inches", "pad_inches", "metadata"]:
+                kwargs.pop(key)
+            save_tiled(
+                self.fig,
+                target["new_fname"],
+                target["type"],
+                dpi,
+                self.tiled,
+                self.metadata,
+                **kwargs
+            )
+        else:
+            self.fig.savefig(target["new_fname"], **self._savefig_kwargs(dpi))
+        return os.path.getsize(target["new_fname"])
+
+    def _pdf_page_size(self, dpi):
+        """
+        Size of the current figure saved as a single pdf page in memory. Fonts are embedded in each page, so a
+        page of a multipage pdf is a little smaller
+
+        Args:
+            dpi: (int) dpi of images and rasterized artists
+
+        Returns: size in bytes
+
+        """
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format="pdf", **self._savefig_kwargs(dpi))
+        return len(buf.getvalue())
+
+    def _fit_budget(self, save, dpi, size):
+        """
+        Save the page again at lower dpi until it fits in max_bytes_per_page. The encoded size of a page is taken
+        to grow with its pixel count
+
+        Args:
+            save: function that saves the page at a dpi and returns its size in bytes
+            dpi: (int) dpi of the saved page
+            size: (int) size of the saved page in bytes
+
+        Returns: dpi and size in bytes
+
+        """
+        best = (size, dpi)
+        for attempt in range(BUDGET_ATTEMPTS):
+            if size <= self.max_bytes_per_page or dpi <= MIN_BUDGET_DPI:
+                break
+            scale = 0.95 * (self.max_bytes_per_page / float(size)) ** 0.5
+            dpi = max(MIN_BUDGET_DPI, int(dpi * scale))
+            previous, size = size, save(dpi)
+            best = min(best, (size, dpi))
+            # vector content and noise do not get smaller with the dpi
+            if size > 0.98 * previous:
+                break
+
+        if size != best[0]:
+            size, dpi = best
+            save(dpi)
+        if size > self.max_bytes_per_page:
+            warnings.warn(
+                "Page {} is {} bytes at {} dpi, over max_bytes_per_page of {}.".format(
+                    self.pagecount, size, dpi, self.max_bytes_per_page
+                ),
+                RuntimeWarning,
+            )
+        return dpi, size
+
+    def _page_stat(self, target, dpi, size):
+        """
+        Record the dpi and size of a saved target in the stats of the current page
+
+        Args:
+            target: target dict
+            dpi: (int) dpi the page was saved at
+            size: (int) size in bytes or None if it is not known
+
+        Returns: None
+
+        """
+        if not self._keep_page_stats:
+            return
+        self.page_stats[-1]["targets"].append(
+            {
+                "path": target["new_fname"],
+                "type": target["type"],
+                "variant": target["variant"],
+                "dpi": dpi,
+                "bytes": size,
+            }
+        )
+
+    def _render_rgba(self, dpi):
+        """
+        Render the current figure once with Agg using the figure save attributes
+
+        Args:
+            dpi: (int) render dpi
+
+        Returns: PIL RGBA image
+
+        """
+        buf = io.BytesIO()
+        kwargs = self._savefig_kwargs(dpi)
+        kwargs.pop("metadata")
+        if self.bbox_inches is None:
+            # raw RGBA avoids encoding a PNG only to decode it again
+            self.fig.savefig(buf, format="rgba", **kwargs)
+            width, height = [int(v * dpi) for v in self.fig.get_size_inches()]
+            if len(buf.getvalue()) == width * height * 4:
+                return Image.frombuffer(
+                    "RGBA", (width, height), buf.getvalue(), "raw", "RGBA", 0, 1
+                )
+            buf = io.BytesIO()
+
+        self.fig.savefig(buf, format="png", **kwargs)
+        buf.seek(0)
+        return Image.open(buf).convert("RGBA")
+
+    def _raster_info(self, filetype):
+        """
+        Pillow save keywords that keep self.metadata in a page resampled from one render. PNG pages get the text
+        entries savefig writes and jpeg, tiff and webp pages an EXIF block with the EXIF_TAGS keys
+
+        Args:
+            filetype: (string) raster file type
+
+        Returns: dict of save keywords
+
+        """
+        if filetype == "png":
+            info = PngImagePlugin.PngInfo()
+            for key, value in png_text(self.metadata).items():
+                info.add_text(key, value)
+            return {"pnginfo": info}
+        if not self.metadata:
+            return {}
+
+        unknown = [key for key in self.metadata if key not in EXIF_TAGS]
+        if unknown:
+            raise ValueError(
+                "metadata {} can not be saved to {} pages. Use the keys {}.".format(
+                    unknown, filetype, list(EXIF_TAGS)
+                )
+            )
+        exif = Image.Exif()
+        for key, value in self.metadata.items():
+            if value is not None:
+                exif[EXIF_TAGS[key]] = value
+        return {"exif": exif}
+
+    def _save_raster(self, targets):
+        """
+        Save raster targets from one Agg render at the highest target dpi. Lower dpi targets are resampled from it.
+
+        Args:
+            targets: list of raster target dicts
+
+        Returns: None
+
+        """
+        dpis = [self._target_dpi(target) for target in targets]
+        render_dpi = max(dpis)
+        img = self._render_rgba(render_dpi)
+
+        for target, dpi in zip(targets, dpis):
+            out = img
+            if dpi != render_dpi:
+                size = [
+                    max(1, int(round(v * dpi / float(render_dpi)))) for v in img.size
+                ]
+                out = img.resize(size, Image.LANCZOS)
+            if target["type"] in ["jpg", "jpeg"]:
+                # jpeg has no alpha channel
+                out = out.convert("RGB")
+            out.save(
+                target["new_fname"], dpi=(dpi, dpi), **self._raster_info(target["type"])
+            )
+
+    def _finish_page(self):
+        """
+        Count the finished page and hand its thumbnail to the thread pool
+
+        Returns: None
+
+        """
+        global _pages_finished
+        self.pagecount = self.pagecount + 1
+        _pages_finished = _pages_finished + 1
+        self._count("pages_rendered")
+
+        if self._page_stamps:
+            self.stamps[self.pagecount] = {
+                "size": tuple(self.fig.get_size_inches()),
+                "texts": self._page_stamps,
+            }
+            # a skeleton keeps its deferred texts for the next page
+            if not self.skeleton:
+                self._page_stamps = []
+
+        if self.thumbnail_dir is None:
+            return
+
+        stem = "page"
+        if self.outfile is not None:
+            stem = os.path.splitext(os.path.basename(self.outfile))[0]
+        path = os.path.join(
+            self.thumbnail_dir, "{}_{:04}.png".format(stem, self.pagecount)
+        )
+
+        # render twice the thumbnail width so the downscale is antialiased
+        dpi = 2.0 * self.thumbnail_width / self.fig.get_figwidth()
+        img = self._render_rgba(dpi)
+        # drop finished jobs so the job list does not grow with the page count. result() raises their errors
+        for job in self._thumbnail_jobs:
+            if job.done():
+                job.result()
+        self._thumbnail_jobs = [job for job in self._thumbnail_jobs if not job.done()]
+        self._thumbnail_jobs.append(
+            self._thumbnail_pool.submit(
+                _save_thumbnail, img, path, self.thumbnail_width
+            )
+        )
+
+        subplots = []
+        for ax in self.fig.axes:
+            if ax.get_visible() and SUBPLOT_LABEL.match(ax.get_label()):
+                subplots.append({"label": ax.get_label(), "title": ax.get_title()})
+
+        self.page_index.append(
+            {"page": self.pagecount, "thumbnail": path, "subplots": subplots}
+        )
+
+    def _write_page_index(self):
+        """
+        Wait for the thumbnails and write the JSON page index
+
+        Returns: None
+
+        """
+        if self._thumbnail_pool is None:
+            return
+
+        for job in self._thumbnail_jobs:
+            job.result()
+        self._thumbnail_pool.shutdown()
+        self._thumbnail_pool = None
+
+        with open(self.index_file, "w") as f:
+            json.dump({"pages": self.page_index}, f, indent=2)
+
+    def _advance_fname(self):
+        """
+        Advance the zero padded page number suffix of non multipage targets
+
+        Returns: None
+
+        """
+        self.fignumber = self.fignumber + 1
+        for target in self.targets:
+            if target["pdf"] is None:
+                filename, file_extension = os.path.splitext(target["path"])
+                target["new_fname"] = "{}_{}{}".format(
+                    filename, "{:02}".format(self.fignumber), file_extension
+                )
+        if self.targets:
+            self.new_fname = self.targets[0]["new_fname"]
+
+    def _apply_stamps(self):
+        """
+        Stamp the deferred {pages} texts onto the saved pages now that the page count is known
+
+        Returns: None
+
+        """
+        if not self.stamps:
+            return
 
-        # set up the source path attributes
-        # the source path is a path to the calling script
-        self.source_path = None
-        self.source_path_position = None
-        self.source_path_fontcolor = None
-        self.source_path_fontsize = None
+        for target in self.targets:
+            if target["pdf"] is not None:
+                stamp_pdf(target["path"], self.stamps, self.pagecount)
+            for page, fname in target.get("stamped", []):
+                stamp_raster(fname, self.stamps[page], page, self.pagecount)
+        self.stamps = {}
 
-        # update from layout
-        self._update_from_layout()
+    def _release_figure(self, fig):
+        """
+        Close a figure drawn by this instance and remove it from pyplot's figure manager
 
-        # set the inital subgraphic index
-        self.subplotstartindex = subplotstartindex
-        self.currentsubplotindex = subplotstartindex
-        self.direction = direction
+        Args:
+            fig: figure instance
 
-        # transform storage
-        self.transform = None
+        Returns: None
 
-        # subplt counter storage
-        self.subplotcounter = 0
+        """
+        if fig is None:
+            return
+        with _pyplot_lock:
+            plt.close(fig)
+        self._fignums.discard(fig.number)
 
-        # update from layout
-        self._update_from_layout()
-        # draw the initial page
-        self.fig, self.ax, self.gs, self.transform = self.draw_page()
+    def open_figures(self):
+        """
+        Figures drawn by this instance that are still registered with pyplot
 
-    def __enter__(self):
-        """ Return self on entry """
+        Returns: list of figure numbers
 
-        return self
+        """
+        with _pyplot_lock:
+            return sorted(n for n in self._fignums if plt.fignum_exists(n))
 
-    def __exit__(self, exc_type, exc_value, exc_traceback):
-        """Close the figure on exit"""
+    def _check_leaks(self):
+        """
+        Compare traced memory at close with the snapshot taken after the first page. Sets self.leak_report and
+        warns if memory grew by more than the leak check threshold or figures are still open
 
-        self.close()
-        return True
+        Returns: None
 
-    def get_caller_filepath(self):
+        """
+        if not self.leak_check or self._leak_baseline is None:
+            return
+        import tracemalloc
+
+        threshold = LEAK_THRESHOLD if self.leak_check is True else self.leak_check
+        gc.collect()
+        stats = tracemalloc.take_snapshot().compare_to(self._leak_baseline, "lineno")
+        growth = sum(stat.size_diff for stat in stats)
+        self.leak_report = {
+            "pages": self.pagecount,
+            "growth": growth,
+            "top": [str(stat) for stat in stats[:10]],
+            "open_figures": self.open_figures(),
+        }
+        self._leak_baseline = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        if growth > threshold or self.leak_report["open_figures"]:
+            warnings.warn(
+                "FigPager memory grew by {} bytes over {} pages with {} open figures. Largest growth:\n{}".format(
+                    growth,
+                    self.leak_report["pages"],
+                    len(self.leak_report["open_figures"]),
+                    "\n".join(self.leak_report["top"]),
+                ),
+                ResourceWarning,
+            )
 
+    def _release(self):
         """
-        Get the caller absolute file path.
-        Reference:  https://stackoverflow.com/a/55469882
-        Get the caller's stack frame and extract its file path
+        Release the figures, multipage files and thumbnail threads of this instance without saving the current page
+
+        Returns: None
+
         """
+        self._release_figure(self.fig)
+        with _pyplot_lock:
+            for num in list(self._fignums):
+                plt.close(num)
+        self._fignums.clear()
 
-        frame_info = inspect.stack()[-1]
-        # in python 3.5+, you can use frame_info.filename
-        filepath = frame_info[1]
-        # drop the reference to the stack frame to avoid reference cycles
-        del frame_info
+        if not self.closed:
+            for target in self.targets:
+                if target["pdf"] is not None:
+                    target["pdf"].close()
 
-        # make the path absolute
-        filepath = os.path.abspath(filepath)
-        return filepath
+        if self._thumbnail_pool is not None:
+            self._thumbnail_pool.shutdown(wait=False)
+            self._thumbnail_pool = None
+
+        if self._started_tracemalloc:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.closed = True
 
     def _read_layout(self, layout):
         """
@@ -352,19 +1545,15 @@ class FigPager:
 
         """
 
-        self.pagewidth_inch = self.paper_size_config["paper_sizes"][
-            self.paper_size.lower()
-        ]["width_in"]
-        self.pageheight_inch = self.paper_size_config["paper_sizes"][
-            self.paper_size.lower()
-        ]["height_in"]
-
-        if self.paper_size_config["paper_sizes"][self.paper_size.lower()] is None:
-            raise ValueError("paper size not found")
-
-        if isinstance(self.paper_size, tuple):
-            self.pagewidth_inch = self.paper_size[0]
-            self.pageheight_inch = self.paper_size[1]
+        if isinstance(self.paper_size, (tuple, list)):
+            self.pagewidth_inch = float(self.paper_size[0])
+            self.pageheight_inch = float(self.paper_size[1])
+        else:
+            size = self.paper_size_config["paper_sizes"].get(self.paper_size.lower())
+            if size is None:
+                raise ValueError("paper size not found: " + self.paper_size)
+            self.pagewidth_inch = size["width_in"]
+            self.pageheight_inch = size["height_in"]
 
         if self.orientation is None:
             if self.pageheight_inch > self.pagewidth_inch:
@@ -389,145 +1578,59 @@ class FigPager:
                 self.pageheight_inch = self.pagewidth_inch
                 self.pagewidth_inch = h
 
-    def _process_config(self, file):
-        """
-        Handles configuration file processing. Add keys and values to validdict as needed.
-        cfg = """
-
-        # read the supplied config file and set up the config spec using validDict. Error if key is not found.
-        with open(file, "r") as myfile:
-
-            validdict = {
-                "figure_unit": "option('inch', 'mm', default='inch')",
-                "constrained_layout": "boolean",
-                "source_path": "boolean",
-                "source_path_position": "float_list_value",
-                "source_path_fontcolor": "string",
-                "source_path_fontsize": "float",
-                "margin_frame": "boolean",
-                "left_margin": "float(min=0)",
-                "right_margin": "float(min=0)",
-                "top_margin": "float(min=0)",
-                "bottom_margin": "float(min=0)",
-                "margin_pad": "float",
-                "framecolor": "string",
-                "framelinewidth": "float",
-                "box_frame": "boolean",
-                "box_label": "string",
-                "box_adjust_margin": "boolean",
-                "box_position": "float_list_value",
-                "box_height": "float",
-                "box_width": "float",
-                "text": "string",
-                "text_position": "float_list_value",
-                "text_position_offset": "float_list_value",
-                "horizontalalignment": "string",
-                "fontcolor": "string",
-                "fontsize": "float",
-                "fontstyle": "string",
-                "rotation": "integer",
-                "line_position_start": "float_list_value",
-                "line_position_end": "float_list_value",
-                "line_min": "float",
-                "line_max": "float",
-                "line_length": "string",
-                "line_width": "float",
-                "line_color": "string",
-                "linestyle": "string",
-                "image_path": "string",
-                "image_position": "float_list_value",
-            }
-
-            data = myfile.read()
-
-            # handle some Python 2 / Python 3 line endings differences. Present on macOS at least.
-            data = data.replace("\r", "")
-            # split line breaks
-
-            tmp = data.replace("\n", "$")
-            tmp = tmp.split("$")
-            tmp = [t.strip() for t in tmp if t != ""]
-            cfg = ""
-            block_comment = False
-            for t in tmp:
-                t = t.strip().strip("'")
-                t = t.replace("'", "")
-
-                # block comment
-                if t[0:3] == '"""':
-                    block_comment = not block_comment
-                if block_comment:
-                    continue
-
-                # if not a comment
-                if t[0] not in ["#", "["]:
-                    if "=" in t:
-                        try:
-                            txt = validdict[t.split("=")[0].strip()]
-                            cfg = cfg + "\n" + t.split("=")[0].strip() + " = " + txt
-                        except KeyError:
-                            raise KeyError(
-                                "Key + " + t.split("=")[0].strip() + " not found"
-                            )
-
-                # if the line can not be split with '=' then treat it as a whole line
-                # and add a line break and move to the next line
-                else:
-                    cfg = cfg + "\n" + t
-
-        # return the read and processed format
-        return cfg
-
-    def _parse_block_comments(self, file):
+    def _index_options(self):
 
         """
-        Convert block comments """ """ to # lines
-        Args:
-            file: configuration file
+        Resolve the layout config into a flat option index keyed by (section, subsection, option).
+        Options under the current paper size and orientation subsection, i.e. [[[Letter]]] [[[[Portrait]]]],
+        are used when the subsection does not set the option itself.
+        Run again after changing the paper size or the orientation. Changes to self.config mark the index out of
+        date and it is rebuilt when an option is next read.
 
-        Returns: a list of each line in the configuration lie with libes between block comments commented as #
+        Returns: None
 
         """
-        # read the supplied config file add comment to a StringIO object
-        stream = []
-        block_comment = False
-        with open(file, "r") as file:
-            for line in file:
-                # block comment
 
-                if line == '"""\n':
-                    block_comment = not block_comment
-                    line = "#" + line
-                elif block_comment:
-                    line = "#" + line
+        index = {}
+        if self.config is not None:
+            paper_size = self.paper_size
+            if isinstance(paper_size, str):
+                paper_size = paper_size.title()
+            orientation = self.orientation.title()
 
-                stream.append(line)
-
-        return stream
-
-    def _parse_option(self, section, subsection, option):
+            for section, subsections in self.config.items():
+                if not isinstance(subsections, dict):
+                    continue
+                for subsection, options in subsections.items():
+                    if not isinstance(options, dict):
+                        continue
+                    override = options.get(paper_size)
+                    if isinstance(override, dict):
+                        override = override.get(orientation)
+                    if isinstance(override, dict):
+                        for option, value in override.items():
+                            if not isinstance(value, dict):
+                                index[(section, subsection, option)] = value
+                    for option, value in options.items():
+                        if not isinstance(value, dict):
+                            index[(section, subsection, option)] = value
+            _track_changes(self.config)
+            self.config.options_changed = False
+
+        self.options = index
+        self._options_config = self.config
+
+    def update_options(self):
 
         """
-        Parse a given config option given the file's section, subsection and option.
-        Return None if option is not found
-        Args:
-            section: config file section. [example]
-            subsection: config file subsection. [[example]]
-            option: config file option. example=True
+        Rebuild the option index from self.config. Changes made through config[section][subsection][option] are
+        found without it, so it is only needed after changing the config in place with dict methods.
 
-        Returns: option value or None
+        Returns: None
 
         """
 
-        try:
-            return self.config[section][subsection][option]
-        except KeyError:
-            try:
-                return self.config[section][subsection][self.paper_size.title()][
-                    self.orientation.title()
-                ][option]
-            except KeyError:
-                return None
+        self._index_options()
 
     def _parse_option(self, section, subsection, option):
 
@@ -543,15 +1646,11 @@ class FigPager:
 
         """
 
-        try:
-            return self.config[section][subsection][option]
-        except KeyError:
-            try:
-                return self.config[section][subsection][self.paper_size.title()][
-                    self.orientation.title()
-                ][option]
-            except KeyError:
-                return None
+        if self.config is not self._options_config or getattr(
+            self.config, "options_changed", False
+        ):
+            self._index_options()
+        return self.options.get((section, subsection, option))
 
     def _update_from_layout(self):
 
@@ -560,21 +1659,12 @@ class FigPager:
         """
 
         if self.layout_path is not None:
-            # process configuration
-            cfg = self._process_config(self.layout_path)
-
-            spec = cfg.split("\n")
-
-            file = self._parse_block_comments(self.layout_path)
-
-            vdt = Validator()
-            vdt.functions["float_list_value"] = float_list_value
-            config = configobj.ConfigObj(file, configspec=spec)
-            config.validate(vdt)
-
+            # read and validate the layout in a single pass
             # use self.config.sections() to see the sections
             # use self.config.get('SectionName', 'option') to get the option value
-            self.config = copy.deepcopy(config)
+            self.config, hit = _cached_layout(self.layout_path)
+            self._count_cache("layout", hit)
+            self._index_options()
 
             if not self.config:
                 raise ValueError("Figure Layout not found: " + self.layout_path)
@@ -651,58 +1741,156 @@ class FigPager:
             label:  Configuration file text label
             txt: text to display at given label parameters
 
-        Returns: None
+        Returns: text artist
+
+        """
+
+        x, y, kwargs = self._text_args(section, label)
+        return self._figtext(x, y, txt, transform=self.transform, **kwargs)
+
+    def _text_args(self, section, label):
 
         """
+        Find the label position and font characteristics
+        Args:
+            section: Configuration file text section
+            label:  Configuration file text label
+
+        Returns: x and y in figure coordinates, dict of text keywords
 
-        xcoord = self._parse_option(section, label, "text_position")[0]
-        ycoord = self._parse_option(section, label, "text_position")[1]
-        if self._parse_option(section, label, "text_position")[0] == "right_margin":
+        """
+
+        options = self.options
+        position = options.get((section, label, "text_position"))
+        xcoord = position[0]
+        ycoord = position[1]
+        if position[0] == "right_margin":
             xcoord = self.pagewidth_inch - self.rightmargin
 
-        if self._parse_option(section, label, "text_position")[0] == "left_margin":
+        if position[0] == "left_margin":
             xcoord = self.leftmargin
 
-        if self._parse_option(section, label, "text_position")[1] == "top_margin":
+        if position[1] == "top_margin":
             ycoord = self.pageheight_inch - self.topmargin
 
-        if self._parse_option(section, label, "text_position")[1] == "bottom_margin":
+        if position[1] == "bottom_margin":
             ycoord = self.bottommargin
 
         xcoord = float(xcoord)
         ycoord = float(ycoord)
 
-        if self._parse_option(section, label, "text_position_offset") is not None:
-            xcoord = xcoord + float(
-                self._parse_option(section, label, "text_position_offset")[0]
-            )
-            ycoord = ycoord + float(
-                self._parse_option(section, label, "text_position_offset")[1]
-            )
+        offset = options.get((section, label, "text_position_offset"))
+        if offset is not None:
+            xcoord = xcoord + float(offset[0])
+            ycoord = ycoord + float(offset[1])
 
-        fontstyle = self._parse_option(section, label, "fontstyle")
+        fontstyle = options.get((section, label, "fontstyle"))
 
         if fontstyle is None:
             fontstyle = "normal"
 
-        rotation = self._parse_option(section, label, "rotation")
+        rotation = options.get((section, label, "rotation"))
         if rotation is None:
             rotation = 0
 
-        plt.figtext(
+        return (
             xcoord / self.pagewidth_inch,
             ycoord / self.pageheight_inch,
-            txt,
-            horizontalalignment=self._parse_option(
-                section, label, "horizontalalignment"
+            dict(
+                horizontalalignment=options.get(
+                    (section, label, "horizontalalignment")
+                ),
+                color=options.get((section, label, "fontcolor")),
+                fontsize=options.get((section, label, "fontsize")),
+                fontstyle=fontstyle,
+                rotation=rotation,
             ),
-            color=self._parse_option(section, label, "fontcolor"),
-            fontsize=self._parse_option(section, label, "fontsize"),
-            transform=self.transform,
-            fontstyle=fontstyle,
-            rotation=rotation,
         )
 
+    def _can_stamp(self):
+        """
+        Whether deferred page numbers can be stamped onto every output at close(). Stamping encodes raster pages
+        again, so only pdf and lossless raster pages saved without bbox_inches are stamped
+
+        Returns: boolean
+
+        """
+        if not self.targets or self.bbox_inches is not None:
+            return False
+        for target in self.targets:
+            if target["pdf"] is None and target["type"] not in STAMPED_RASTER_TYPES:
+                return False
+        return True
+
+    def _layout_text(self, section, label, txt):
+
+        """
+        Write layout text. A {page} placeholder is filled in now. Text with a {pages} placeholder is kept
+        and stamped onto the saved page at close() when the page count is known. Pages that can not be stamped
+        get ? as the page count
+        Args:
+            section: Configuration file text section
+            label:  Configuration file text label
+            txt: text to display at given label parameters
+
+        Returns: text artist or None if deferred
+
+        """
+
+        page = self.pagecount + 1
+        stamp = self._can_stamp()
+        # pagers without outputs that defer page numbers, i.e. overlays, stamp the pages themselves
+        if self.defer_page_numbers and "{page" in txt and (stamp or not self.targets):
+            x, y, kwargs = self._text_args(section, label)
+            self._page_stamps.append((x, y, txt, kwargs))
+            return None
+        if "{pages}" in txt and self.targets:
+            for target in self.targets:
+                if target["pdf"] is None and target["type"] not in RASTER_TYPES:
+                    raise ValueError(
+                        "{pages} is only supported for pdf and raster outputs."
+                    )
+            if stamp:
+                x, y, kwargs = self._text_args(section, label)
+                self._page_stamps.append((x, y, txt, kwargs))
+                return None
+        deferred = "{pages}" in txt or (self.defer_page_numbers and "{page" in txt)
+        if deferred and self.targets and not stamp:
+            warnings.warn(
+                "Page counts are not stamped onto jpeg or webp pages, which would be encoded twice, or onto pages "
+                "saved with bbox_inches, where the text would be misplaced. {pages} is drawn as ?.",
+                RuntimeWarning,
+            )
+
+        # without an output the page count is not known
+        text = self._text_at_label(
+            section, label, fill_page_numbers(txt, page, None if stamp else "?")
+        )
+        if "{page}" in txt:
+            self._page_texts.append((text, txt))
+        return text
+
+    def _figtext(self, x, y, s, **kwargs):
+        """
+        Add text to the figure in figure coordinates. The text layout is cached across pages if self.text_cache
+
+        Args:
+            x: x position in figure coordinates
+            y: y position in figure coordinates
+            s: text string
+            **kwargs: (optional) any additional text keywords
+
+        Returns: text artist
+
+        """
+        if not self.text_cache:
+            return self.fig.text(x, y, s, **kwargs)
+
+        kwargs.setdefault("transform", self.fig.transFigure)
+        text = CachedText(x, y, s, **kwargs)
+        self.fig.add_artist(text, clip=False)
+        return text
+
     def _box_from_label(self, label):
 
         """
@@ -715,25 +1903,26 @@ class FigPager:
 
         """
 
-        if self.config["Boxes"][label]["box_frame"]:
-            xcoord = self.config["Boxes"][label]["box_position"][0]
-            ycoord = self.config["Boxes"][label]["box_position"][1]
-            width = self.config["Boxes"][label]["box_width"]
-            height = self.config["Boxes"][label]["box_height"]
+        if self._parse_option("Boxes", label, "box_frame"):
+            position = self._parse_option("Boxes", label, "box_position")
+            xcoord = position[0]
+            ycoord = position[1]
+            width = self._parse_option("Boxes", label, "box_width")
+            height = self._parse_option("Boxes", label, "box_height")
 
             if height in ["left_margin", "right_margin"]:
                 height = self.frameheight
 
-            if self.config["Boxes"][label]["box_position"][0] == "right_margin":
+            if position[0] == "right_margin":
                 xcoord = self.pagewidth_inch - self.rightmargin + width
 
-            elif self.config["Boxes"][label]["box_position"][0] == "left_margin":
+            elif position[0] == "left_margin":
                 xcoord = self.leftmargin
 
             else:
                 xcoord = float(xcoord)
 
-            if self.config["Boxes"][label]["box_position"][1] == "top_margin":
+            if position[1] == "top_margin":
                 ycoord = self.pageheight_inch - self.topmargin
                 # update the bottom margin as needed
                 if ycoord + height < self.pageheight_inch - self.topmargin:
@@ -743,7 +1932,7 @@ class FigPager:
                         ycoord = ycoord + height
                         self.topmargin = self.topmargin + abs(height)
 
-            elif self.config["Boxes"][label]["box_position"][1] == "bottom_margin":
+            elif position[1] == "bottom_margin":
                 ycoord = self.bottommargin
                 # update the bottom margin as needed
                 if ycoord + height > self.bottommargin:
@@ -777,10 +1966,10 @@ class FigPager:
             if height < 0:
                 height = abs(height)
 
-            self.fig.add_axes([xcoord, ycoord, width, height])
+            box = self.fig.add_axes([xcoord, ycoord, width, height])
 
             # this turns off the ticks and labels of the margin box
-            plt.tick_params(
+            box.tick_params(
                 axis="both",  # changes apply to both
                 which="both",  # both major and minor ticks are affected
                 bottom=False,  # ticks along the bottom edge are off
@@ -790,7 +1979,7 @@ class FigPager:
                 left=False,
                 right=False,
             )
-            return xcoord, ycoord, self.config["Boxes"][label]["box_height"]
+            return xcoord, ycoord, self._parse_option("Boxes", label, "box_height")
 
     def _line_from_label(self, label):
 
@@ -831,8 +2020,8 @@ class FigPager:
         pos = self._parse_option("Images", label, "image_position")
         fname = self._parse_option("Images", label, "image_path")
         if fname:
-            filename, file_extension = os.path.splitext(fname)
-            img = plt.imread(fname, format=file_extension)
+            img, hit = _cached_image(fname)
+            self._count_cache("image", hit)
             width1 = img.shape[0]
             height1 = img.shape[1]
 
@@ -860,10 +2049,19 @@ class FigPager:
                    label:  Configuration file text label
                    txt: text to display at given label parameters
 
-               Returns: None
+               Returns: text artist
 
         """
-        return self._text_at_label("Text", label, txt)
+        # a skeleton page updates the text drawn at the label on the first page
+        if self.skeleton and label in self._label_texts:
+            text = self._label_texts[label]
+            text.set_text(txt)
+            return text
+
+        text = self._text_at_label("Text", label, txt)
+        if self.skeleton:
+            self._label_texts[label] = text
+        return text
 
     def draw_page(self):
         """
@@ -873,20 +2071,24 @@ class FigPager:
 
         """
 
-        plt.clf()
+        start = time.perf_counter()
+        # release the previous figure rather than clearing it. plt.clf() left it registered with pyplot
+        # and created a stray figure when none was open
+        self._release_figure(self.fig)
 
         # if there's a margin frame set the constrained layout to False
         if self.marginframe:
             self.constrained_layout = False
 
-        # set up the figure
-        fig, ax = plt.subplots(
-            constrained_layout=self.constrained_layout,
-            figsize=(self.pagewidth_inch, self.pageheight_inch),
-            squeeze=False,
-            sharex=self.sharex,
-            sharey=self.sharey,
-        )
+        # set up the figure. pyplot's figure manager is shared by the pagers of every thread
+        with _pyplot_lock:
+            fig, ax = plt.subplots(
+                constrained_layout=self.constrained_layout,
+                figsize=(self.pagewidth_inch, self.pageheight_inch),
+                squeeze=False,
+                sharex=self.sharex,
+                sharey=self.sharey,
+            )
 
         # set the patch here
         fig.patch.set_visible(not self.transparent)
@@ -895,9 +2097,10 @@ class FigPager:
 
         # save the fig
         self.fig = fig
+        self._fignums.add(fig.number)
 
         # this turns off the ticks and labeks of the box
-        plt.tick_params(
+        ax[-1, -1].tick_params(
             axis="both",  # changes apply to both
             which="both",  # both major and minor ticks are affected
             bottom=False,  # ticks along the bottom edge are off
@@ -922,7 +2125,7 @@ class FigPager:
             # get the x, y positions
             pos = self.source_path_position
 
-            plt.figtext(
+            self._figtext(
                 pos[0] / self.pagewidth_inch,
                 pos[1] / self.pageheight_inch,
                 self.callerpath,
@@ -953,31 +2156,25 @@ class FigPager:
                 self.pageheight_inch - self.topmargin - self.bottommargin
             ) / self.pageheight_inch
 
-            with plt.rc_context(
-                {
-                    "axes.edgecolor": self._parse_option(
-                        "Layout", "Margin", "framecolor"
-                    ),
-                    "figure.facecolor": "white",
-                }
-            ):
-                ax = fig.add_axes(
-                    [
-                        self.leftmargin / self.pagewidth_inch,
-                        self.bottommargin / self.pageheight_inch,
-                        width,
-                        height,
-                    ]
-                )
-                ax.patch.set_edgecolor(
-                    self._parse_option("Layout", "Margin", "framecolor")
-                )
-                ax.patch.set_linewidth(
-                    self._parse_option("Layout", "Margin", "framelinewidth")
-                )
+            # the frame color is set on the axes rather than through rcParams, which are shared by all threads
+            framecolor = self._parse_option("Layout", "Margin", "framecolor")
+            ax = fig.add_axes(
+                [
+                    self.leftmargin / self.pagewidth_inch,
+                    self.bottommargin / self.pageheight_inch,
+                    width,
+                    height,
+                ]
+            )
+            for spine in ax.spines.values():
+                spine.set_edgecolor(framecolor)
+            ax.patch.set_edgecolor(framecolor)
+            ax.patch.set_linewidth(
+                self._parse_option("Layout", "Margin", "framelinewidth")
+            )
 
             # this turns off the ticks and labeks of the margin box
-            plt.tick_params(
+            ax.tick_params(
                 axis="both",  # changes apply to both
                 which="both",  # both major and minor ticks are affected
                 bottom=False,  # ticks along the bottom edge are off
@@ -992,7 +2189,7 @@ class FigPager:
             # ax.add_artist(plt.gca())
 
             # these are fractions of the figure. Here everything the is same unit
-            plt.subplots_adjust(
+            fig.subplots_adjust(
                 left=(self.leftmargin + self.marginpad) / self.pagewidth_inch,
                 right=(self.framewidth + self.leftmargin - self.marginpad)
                 / self.pagewidth_inch,
@@ -1007,13 +2204,28 @@ class FigPager:
         if self.marginframe:
             self._update_marginframe_from_layout()
 
+        # draft stamps are always drawn when a draft variant is saved
+        self.draft_artists = []
+        self._page_stamps = []
+        # a new page starts a new skeleton
+        self.reused_page = False
+        self._skeleton_axes = []
+        self._skeleton_next = 0
+        self._page_texts = []
+        self._label_texts = {}
+        draft_variant = any(t["variant"] == "draft" for t in self.targets)
+
         # add any layout set text here
         for k in self.config["Text"].keys():
-            if self._parse_option("Text", k, "text") is not None:
-                if "draft" in self._parse_option("Text", k, "text").lower():
+            txt = self._parse_option("Text", k, "text")
+            if txt is not None:
+                if "draft" in txt.lower():
+                    if draft_variant:
+                        self.draft_artists.append(self._text_at_label("Text", k, txt))
+                        continue
                     if not self.draft:
                         continue
-                self._text_at_label("Text", k, self._parse_option("Text", k, "text"))
+                self._layout_text("Text", k, txt)
 
         # add any layout set images here
         for k in self.config["Images"].keys():
@@ -1025,24 +2237,39 @@ class FigPager:
 
         # add any layout set watermarks here
         for k in self.config["Watermark"].keys():
-            if self._parse_option("Watermark", k, "text") is not None:
+            txt = self._parse_option("Watermark", k, "text")
+            if txt is not None:
                 # check for draft watermark status and whether user has overridden it
-                if "draft" in self._parse_option("Watermark", k, "text").lower():
+                if "draft" in txt.lower():
+                    if draft_variant:
+                        self.draft_artists.append(
+                            self._text_at_label("Watermark", k, txt)
+                        )
+                        continue
                     if not self.draft:
                         continue
-                self._text_at_label(
-                    "Watermark", k, self._parse_option("Watermark", k, "text")
-                )
+                self._layout_text("Watermark", k, txt)
+
+        if self.metrics is not None:
+            self.metrics.observe("draw_page_seconds", time.perf_counter() - start)
+
+        # keep the instance in step when draw_page is called directly
+        self.ax = ax
+        self.gs = gs
 
         return fig, ax, gs, self.transform
 
-    def add_subplot(self, direction="left-to-right", pos=None, gs=None, **kwargs):
+    def add_subplot(
+        self, direction="left-to-right", pos=None, gs=None, decimate=False, **kwargs
+    ):
         """
 
         Args:
             direction: (optional) subplot advancing direction. left-to-right (default) or Top-to-bottom is supported
             pos: (optional) gridSpec position keyword in the form of [row,column]
             gs: (optional) GridSpec specification for more advanced positions
+            decimate: (boolean) (optional) Reduce long line series in ax.plot to the subplot pixel width at the
+            page dpi before drawing. Default is False
             **kwargs: (optional) any additional add_subplot keywords
 
         Returns: fig.add_subplot()
@@ -1103,9 +2330,8 @@ class FigPager:
                         self.fig, self.ax, self.gs, self.transform = self.add_page(
                             subplotstartindex=self.subplotstartindex
                         )
-
-                        # use the existing column and add a row
-                        self.subplotstartindex = [pos[0] + 1, pos[1]]
+                        # the next page starts at the same position as the first
+                        self.currentsubplotindex = pos
 
         else:
             self.subplotstartindex = pos
@@ -1114,8 +2340,20 @@ class FigPager:
         # advance the subplot counter. Makes a unique subplot label
         self.subplotcounter = self.subplotcounter + 1
 
+        # a skeleton page returns the axes made at the same step of the first page
+        if self._skeleton_next < len(self._skeleton_axes):
+            ax = self._skeleton_axes[self._skeleton_next]
+            self._skeleton_next = self._skeleton_next + 1
+            ax.set_visible(True)
+            return ax
+
+        self._count("subplots_created")
+
+        if decimate:
+            kwargs["axes_class"] = DecimatingAxes
+
         if gs is None:
-            return self.fig.add_subplot(
+            ax = self.fig.add_subplot(
                 self.gs[pos[0], pos[1]],
                 label="({},{}, {})".format(pos[0], pos[1], self.subplotcounter),
                 **kwargs
@@ -1126,7 +2364,7 @@ class FigPager:
                 gs.get_topmost_subplotspec().get_gridspec().get_geometry()[1],
             ]
 
-            return self.fig.add_subplot(
+            ax = self.fig.add_subplot(
                 gs,
                 label="({},{}, {})".format(
                     self.currentsubplotindex[0],
@@ -1136,6 +2374,267 @@ class FigPager:
                 **kwargs
             )
 
+        if decimate:
+            # decimate to the saved page resolution rather than the screen figure dpi
+            ax.decimate_dpi = self.dpi
+
+        if self.skeleton:
+            self._skeleton_axes.append(ax)
+            self._skeleton_next = len(self._skeleton_axes)
+
+        return ax
+
+    def _reuse_skeleton(self):
+        """
+        Keep the current figure as the next page. Page numbers are updated, axes are hidden until add_subplot
+        returns them and subplot positions start again
+
+        Returns: None
+
+        """
+        for text, txt in self._page_texts:
+            text.set_text(
+                fill_page_numbers(
+                    txt, self.pagecount + 1, None if self._can_stamp() else "?"
+                )
+            )
+        for ax in self._skeleton_axes:
+            ax.set_visible(False)
+        self._skeleton_next = 0
+        self.currentsubplotindex = self.subplotstartindex
+        self.reused_page = True
+        self._count("pages_reused")
+
+    def add_histogram(
+        self, data, bins=10, range=None, ax=None, chunksize=CHUNKSIZE, **kwargs
+    ):
+        """
+        Draw a histogram of an array, np.memmap or chunk iterator reduced in bounded memory
+
+        Args:
+            data: numpy array, np.memmap or iterable of array chunks
+            bins: (int or sequence) (optional) number of bins or bin edges. Default is 10
+            range: (tuple) (optional) lower and upper bin range. Required for chunk iterators
+            ax: (optional) axes to draw in. Default is the next subplot
+            chunksize: (int) (optional) number of samples reduced at a time for array inputs
+            **kwargs: (optional) any additional ax.hist keywords
+
+        Returns: ax, counts, bin edges
+
+        """
+        counts, edges = streaming_histogram(data, bins, range, chunksize)
+
+        if ax is None:
+            ax = self.add_subplot()
+        # draw the counts as weights of one sample per bin
+        ax.hist(edges[:-1], edges, weights=counts, **kwargs)
+
+        return ax, counts, edges
+
+    def add_density(
+        self, x, y=None, bins=100, range=None, ax=None, chunksize=CHUNKSIZE, **kwargs
+    ):
+        """
+        Draw a 2-D density heatmap of paired samples reduced in bounded memory
+
+        Args:
+            x: numpy array or np.memmap of x values, or an iterable of (x, y) chunks when y is None
+            y: (optional) numpy array or np.memmap of y values
+            bins: (int or [int, int] or [array, array]) (optional) bins as accepted by np.histogram2d.
+            Default is 100
+            range: ([[xmin, xmax], [ymin, ymax]]) (optional) bin range. Required for chunk iterators
+            ax: (optional) axes to draw in. Default is the next subplot
+            chunksize: (int) (optional) number of samples reduced at a time for array inputs
+            **kwargs: (optional) any additional ax.pcolormesh keywords
+
+        Returns: ax, counts, x edges, y edges
+
+        """
+        counts, xedges, yedges = streaming_histogram2d(x, y, bins, range, chunksize)
+
+        if ax is None:
+            ax = self.add_subplot()
+        ax.pcolormesh(xedges, yedges, counts.T, **kwargs)
+
+        return ax, counts, xedges, yedges
+
+    def add_envelope(
+        self,
+        data,
+        bins=None,
+        length=None,
+        x_range=None,
+        ax=None,
+        chunksize=CHUNKSIZE,
+        **kwargs
+    ):
+        """
+        Draw the min/max envelope of a line series reduced in bounded memory
+
+        Args:
+            data: numpy array, np.memmap or iterable of array chunks
+            bins: (int) (optional) number of envelope blocks. Default is the axes pixel width at the page dpi
+            length: (int) (optional) total number of samples. Required for chunk iterators
+            x_range: (tuple) (optional) x values of the first and last sample. Default is the sample index
+            ax: (optional) axes to draw in. Default is the next subplot
+            chunksize: (int) (optional) number of samples reduced at a time for array inputs
+            **kwargs: (optional) any additional ax.fill_between keywords
+
+        Returns: ax, x, block minimum, block maximum
+
+        """
+        if ax is None:
+            ax = self.add_subplot()
+
+        if bins is None:
+            bins = int(ax.get_position().width * self.fig.get_figwidth() * self.dpi + 1)
+
+        x, lo, hi = streaming_envelope(data, bins, length, chunksize)
+
+        if x_range is not None:
+            n = length if length is not None else len(data)
+            x = x_range[0] + x * (x_range[1] - x_range[0]) / max(n - 1, 1)
+
+        ax.fill_between(x, lo, hi, **kwargs)
+
+        return ax, x, lo, hi
+
+    def _table_row_pitch(self, fontsize, **kwargs):
+        """
+        Measure the table line pitch and header height in inches once per font
+        Args:
+            fontsize: table font size
+            **kwargs: (optional) any additional text font keywords
+
+        Returns: line pitch, single line height
+
+        """
+        key = (fontsize, repr(sorted(kwargs.items())))
+        if key not in self._row_pitch:
+            renderer = self.fig.canvas.get_renderer()
+            heights = []
+            for txt in ["lp", "lp\nlp"]:
+                t = self.fig.text(0, 0, txt, fontsize=fontsize, **kwargs)
+                heights.append(t.get_window_extent(renderer).height / self.fig.dpi)
+                t.remove()
+            self._row_pitch[key] = (heights[1] - heights[0], heights[0])
+
+        return self._row_pitch[key]
+
+    def add_table(
+        self, rows, columns, fontsize=8, col_widths=None, header_weight="bold", **kwargs
+    ):
+        """
+        Stream table rows onto pages. Rows are pulled one page at a time from the iterable, drawn as one
+        text column per table column in the subplot area of the layout and new pages are added through add_page
+        with the header repeated. A table started on a page that already has subplots begins on the next page.
+        Cell text is not wrapped and is clipped to its column.
+
+        Args:
+            rows: iterable of row sequences
+            columns: list of column header strings
+            fontsize: (float) (optional) table font size. Default is 8
+            col_widths: (list of ints or floats) (optional) column width ratios. Default is equal widths
+            header_weight: (string) (optional) header font weight. Default is bold
+            **kwargs: (optional) any additional text keywords such as family or color
+
+        Returns: number of rows written
+
+        """
+        if col_widths is None:
+            col_widths = [1] * len(columns)
+        col_starts = [
+            float(sum(col_widths[:i])) / sum(col_widths)
+            for i in range(len(columns) + 1)
+        ]
+
+        # a fixed line spacing keeps the pitch the same in every column
+        kwargs.setdefault("linespacing", 1.2)
+        pitch, height = self._table_row_pitch(fontsize, **kwargs)
+
+        rows = iter(rows)
+        count = 0
+        bodies = None
+        while True:
+            # the subplot area of the layout in figure fractions. This accounts for boxes and padding
+            pars = self.fig.subplotpars
+            left = pars.left
+            width = pars.right - pars.left
+            top = pars.top
+            bottom = pars.bottom
+            area = (pars.top - pars.bottom) * self.pageheight_inch
+
+            rows_per_page = max(1, int((area - pitch - height) / pitch) + 1)
+            page = list(itertools.islice(rows, rows_per_page))
+            if not page:
+                break
+            # the table is not drawn over subplots of the current page
+            if count or any(
+                ax.get_visible() and SUBPLOT_LABEL.match(ax.get_label())
+                for ax in self.fig.axes
+            ):
+                self.add_page()
+
+            cells = [
+                "\n".join(str(row[i]) if i < len(row) else "" for row in page)
+                for i in range(len(columns))
+            ]
+            # a kept skeleton page already has the header and rule of this table
+            if bodies is not None and self.reused_page:
+                for body, cell in zip(bodies, cells):
+                    body.set_text(cell)
+                count = count + len(page)
+                continue
+
+            body_top = top - pitch / self.pageheight_inch
+            rule = top - (height + pitch) / 2.0 / self.pageheight_inch
+            bodies = []
+            for i, col in enumerate(columns):
+                x = left + col_starts[i] * width
+                # long cells are cut at the next column and the bottom of the subplot area
+                clip = TransformedBbox(
+                    Bbox([[x, bottom], [left + col_starts[i + 1] * width, top]]),
+                    self.fig.transFigure,
+                )
+                header = self._figtext(
+                    x,
+                    top,
+                    col,
+                    fontsize=fontsize,
+                    fontweight=header_weight,
+                    verticalalignment="top",
+                    **kwargs
+                )
+                body = self.fig.text(
+                    x,
+                    body_top,
+                    cells[i],
+                    fontsize=fontsize,
+                    verticalalignment="top",
+                    **kwargs
+                )
+                for text in [header, body]:
+                    text.set_clip_box(clip)
+                    text.set_clip_on(True)
+                bodies.append(body)
+
+            # rule under the header
+            self.fig.lines.extend(
+                [
+                    lines.Line2D(
+                        [left, left + width],
+                        [rule, rule],
+                        transform=self.fig.transFigure,
+                        figure=self.fig,
+                        color="black",
+                        linewidth=0.5,
+                    )
+                ]
+            )
+            count = count + len(page)
+
+        return count
+
     def add_page(
         self,
         paper_size=None,
@@ -1182,7 +2681,8 @@ class FigPager:
             pad_inches: (float) (optional) Amount of padding around the figure when bbox_inches is 'tight'.
             If None, use savefig.pad_inches
             metadata: (dict) (optional) Key/value pairs to store in the image metadata. The supported keys and
-            defaults depend on the image format and backend:
+            defaults depend on the image format and backend. Raster pages resampled from one render keep them as PNG
+            text, or as EXIF for the EXIF_TAGS keys
             subplotstartindex: (list of ints) (optional) First subplot on a page row and column index.
             direction: (string) (optional) subplot creation direction. Default is Left-to-right.
             gs: (optional) GridSpec specification for more advanced positions
@@ -1192,6 +2692,23 @@ class FigPager:
         Returns: fig; figure instance, ax; axes instances, gs; GridSpec, self.transform; Figure Transform
 
         """
+        # a skeleton is kept unless the page geometry or layout changes
+        reuse = self.skeleton and all(
+            v is None
+            for v in [
+                paper_size,
+                nrows,
+                ncols,
+                layout,
+                width_ratios,
+                height_ratios,
+                orientation,
+                transparent,
+                wspace,
+                hspace,
+            ]
+        )
+
         if paper_size is not None:
             self.paper_size = paper_size
 
@@ -1207,7 +2724,10 @@ class FigPager:
 
         if outfile is not None:
             if not self.multipage:
-                self.outfile = outfile
+                self.outfile = os.fspath(outfile)
+                # a FigPager made without an outfile keeps showing its pages
+                if self.targets:
+                    self.targets[0]["path"] = self.outfile
             else:
                 raise ValueError(
                     "outfile can't be changed per page in a multipage document."
@@ -1260,94 +2780,82 @@ class FigPager:
             # update from layout
             self._update_from_layout()
 
-        if self.type in ["pdf", "pgf"]:
-            try:
-                self.pdf.savefig(
-                    self.fig,
-                    dpi=self.dpi,
-                    facecolor=self.facecolor,
-                    edgecolor=self.edgecolor,
-                    orientation=self.orientation,
-                    transparent=self.transparent,
-                    bbox_inches=self.bbox_inches,
-                    pad_inches=self.pad_inches,
-                    metadata=self.metadata,
-                )
-            except AttributeError as a:
-                if str(a) == "'NoneType' object has no attribute 'endStream'":
-                    raise AttributeError("Cannot add a new page to a closed pdf file.")
-        elif self.type is not None:
-            # probably number 02, 03 etc '{:02}'.format(1)
-            plt.savefig(
-                self.new_fname,
-                dpi=self.dpi,
-                facecolor=self.facecolor,
-                edgecolor=self.edgecolor,
-                orientation=self.orientation,
-                transparent=self.transparent,
-                bbox_inches=self.bbox_inches,
-                pad_inches=self.pad_inches,
-                metadata=self.metadata,
-            )
+        self._finish_page()
+        if self.golden is not None:
+            self.golden.add(self.fig)
+        if self.targets:
+            self._save_page()
+            self._advance_fname()
+        elif self.browser is not None:
+            self.browser.add(self.fig)
+        elif self.golden is None:
+            plt.show()
 
-            filename, file_extension = os.path.splitext(self.outfile)
-            self.fignumber = self.fignumber + 1
-            self.new_fname = "{}_{}{}".format(
-                filename, "{:02}".format(self.fignumber), file_extension
-            )
+        if reuse:
+            self._reuse_skeleton()
         else:
-            plt.show()
-        plt.close(self.fig)
-        self.fig, self.ax, self.gs, self.transform = self.draw_page()
+            self._release_figure(self.fig)
+
+        if self.leak_check and self._leak_baseline is None and self.pagecount == 1:
+            import tracemalloc
+
+            gc.collect()
+            self._leak_baseline = tracemalloc.take_snapshot()
+
+        if not reuse:
+            # apply the new paper size, orientation and any changes to self.config
+            self._index_options()
+            self.fig, self.ax, self.gs, self.transform = self.draw_page()
 
         return self.fig, self.ax, self.gs, self.transform
 
     def close(self):
         """ close the current figure by saving or viewing. Uses the
-        figure attributes in self
+        figure attributes in self. Every figure drawn by this instance is released from pyplot
 
-        Returns: No return on figure close and empty return on plt.show() close
+        Returns: None
 
         """
 
-        if self.outfile is not None:
-            if self.type not in ["pdf", "pgf"]:
-                plt.savefig(
-                    self.new_fname,
-                    dpi=self.dpi,
-                    facecolor=self.facecolor,
-                    edgecolor=self.edgecolor,
-                    orientation=self.orientation,
-                    transparent=self.transparent,
-                    bbox_inches=self.bbox_inches,
-                    pad_inches=self.pad_inches,
-                    metadata=self.metadata,
-                )
-            else:
-                self.pdf.savefig(
-                    self.fig,
-                    dpi=self.dpi,
-                    facecolor=self.facecolor,
-                    edgecolor=self.edgecolor,
-                    orientation=self.orientation,
-                    transparent=self.transparent,
-                    bbox_inches=self.bbox_inches,
-                    pad_inches=self.pad_inches,
-                    metadata=self.metadata,
-                )
+        self._finish_page()
+        self._write_page_index()
+        if self.golden is not None:
+            self.golden.add(self.fig)
+
+        if self.targets:
+            self._save_page()
+
+            for target in self.targets:
+                if target["pdf"] is None:
+                    continue
                 # We can also set the file's metadata via the PdfPages object:
-                d = self.pdf.infodict()
+                d = target["pdf"].infodict()
                 # Example
                 # d["Title"] = "Multipage PDF Example"
                 # d["Author"] = "Author Name"
                 # d["Subject"] = "How to create a multipage pdf file and set its metadata"
                 # d["Keywords"] = "PdfPages multipage keywords author title subject"
-                d["CreationDate"] = datetime.datetime.today()
-                d["ModDate"] = datetime.datetime.today()
-
-                # Remember to close the object - otherwise the file will not be usable
-                self.pdf.close()
-        else:
+                date = source_date() if self.reproducible else datetime.datetime.today()
+                d["CreationDate"] = date
+                d["ModDate"] = date
+        elif self.browser is not None:
+            self.browser.add(self.fig)
+        elif self.golden is None:
             plt.show()
-            plt.close(self.fig)
-            return
+
+        self._release_figure(self.fig)
+        self._check_leaks()
+        # Remember to close the PdfPages objects - otherwise the files will not be usable
+        self._release()
+        self._apply_stamps()
+
+        for target in self.targets:
+            if target["pdf"] is not None:
+                self._count_bytes(target["path"], target["type"])
+
+        if self.metrics is not None:
+            self.metrics.export()
+
+        # the pages are browsed once the figures are released
+        if self.browser is not None:
+            self.browser.show()
@@ -0,0 +1,336 @@
+"""
+Module file that contains a GoldenPages class used by FigPager to compare pages with stored golden references in
+tests. Each page is rendered at a low dpi straight from the Agg buffer, without writing a file. A page whose pixels
+hash to the stored digest is unchanged and is not compared further. Otherwise a perceptual hash rejects pages that
+changed a lot without reading the reference image, and the rest are compared tile by tile with a tolerance, so
+antialiasing and font hinting differences pass and a moved label does not.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to short circuit unchanged pages
+import hashlib
+# used to hold in memory bitmaps
+import io
+# used to store the reference hashes
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+# render dpi of golden pages. Letter is 425 by 550 pixels
+GOLDEN_DPI = 50
+# tile width and height in pixels
+TILE = 16
+# largest mean absolute difference of a tile, in 0 to 255 levels, for a page to match
+TOLERANCE = 4
+# perceptual hash width and height in bits
+HASH_SIZE = 16
+# largest perceptual hash distance in bits before a page is changed without a tile comparison
+MAX_HASH_DISTANCE = 24
+# environment variable that records the pages as the new references
+UPDATE_ENV = "FIGPAGER_GOLDEN_UPDATE"
+
+
+def render_page(fig, dpi=GOLDEN_DPI):
+    """
+    Render a figure with Agg and return its pixels without encoding a file
+
+    Args:
+        fig: figure instance
+        dpi: (int) (optional) render dpi. Default is GOLDEN_DPI
+
+    Returns: RGB uint8 array of shape (height, width, 3)
+
+    """
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="rgba", dpi=dpi)
+    width, height = [int(v * dpi) for v in fig.get_size_inches()]
+    rgba = np.frombuffer(buf.getvalue(), dtype=np.uint8)
+    if rgba.size != width * height * 4:
+        raise RuntimeError(
+            "Page rendered to {} bytes instead of {}.".format(
+                rgba.size, width * height * 4
+            )
+        )
+    return rgba.reshape(height, width, 4)[:, :, :3]
+
+
+def digest(image):
+    """
+    Digest of the pixels of an image
+
+    Returns: (string) hex digest
+
+    """
+
+    return hashlib.sha256(np.ascontiguousarray(image).tobytes()).hexdigest()
+
+
+def perceptual_hash(image, size=HASH_SIZE):
+    """
+    Difference hash of an image. The gray image is reduced to size rows of size + 1 columns and each bit is set
+    where a cell is brighter than its right neighbour, so the hash follows the layout of the page and not its
+    exact pixels
+
+    Args:
+        image: RGB uint8 array
+        size: (int) (optional) hash width and height in bits. Default is HASH_SIZE
+
+    Returns: (string) hex hash of size * size bits
+
+    """
+    gray = Image.fromarray(np.ascontiguousarray(image)).convert("L")
+    cells = np.asarray(gray.resize((size + 1, size), Image.BOX), dtype=np.int16)
+    bits = (cells[:, 1:] > cells[:, :-1]).ravel()
+    value = int("".join("1" if bit else "0" for bit in bits), 2)
+    return "{:0{}x}".format(value, size * size // 4)
+
+
+def hash_distance(a, b):
+    """
+    Number of bits that differ between two perceptual hashes
+
+    Returns: (int) distance
+
+    """
+
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def tile_diff(a, b, tile=TILE):
+    """
+    Mean absolute difference of two images per tile. Each pixel counts its largest channel difference. Edge tiles
+    are padded with equal pixels
+
+    Args:
+        a: RGB uint8 array
+        b: RGB uint8 array of the same shape
+        tile: (int) (optional) tile width and height in pixels. Default is TILE
+
+    Returns: float array of shape (tile rows, tile columns)
+
+    """
+    if a.shape != b.shape:
+        raise ValueError(
+            "Images of shape {} and {} can not be compared.".format(a.shape, b.shape)
+        )
+    diff = np.abs(a.astype(np.int16) - b.astype(np.int16)).max(axis=2)
+    height, width = diff.shape
+    diff = np.pad(diff, ((0, -height % tile), (0, -width % tile)))
+    rows, cols = diff.shape[0] // tile, diff.shape[1] // tile
+    return diff.reshape(rows, tile, cols, tile).mean(axis=(1, 3))
+
+
+class GoldenPages:
+
+    """ Compare pages with golden references stored in a folder """
+
+    def __init__(
+        self,
+        folder,
+        name,
+        dpi=GOLDEN_DPI,
+        tile=TILE,
+        tolerance=TOLERANCE,
+        max_hash_distance=MAX_HASH_DISTANCE,
+        update=None,
+        diff_dir=None,
+    ):
+        """
+
+        Args:
+            folder: (string) reference folder. Page images are saved as NAME_001.png and hashes in NAME.json
+            name: (string) name of the page set, i.e. the layout under test
+            dpi: (int) (optional) render dpi. Default is GOLDEN_DPI, 50
+            tile: (int) (optional) tile width and height in pixels. Default is TILE, 16
+            tolerance: (float) (optional) largest mean absolute difference of a tile in 0 to 255 levels. Default
+            is TOLERANCE, 4
+            max_hash_distance: (int) (optional) perceptual hash distance in bits above which a page is changed
+            without comparing tiles. Default is MAX_HASH_DISTANCE, 24
+            update: (boolean) (optional) save the pages as the new references at check(). Default is None, True
+            if the FIGPAGER_GOLDEN_UPDATE environment variable is set
+            diff_dir: (string) (optional) folder for the render and a difference image of each changed page.
+            Default is None
+        """
+
+        self.folder = folder
+        self.name = name
+        self.dpi = dpi
+        self.tile = tile
+        self.tolerance = tolerance
+        self.max_hash_distance = max_hash_distance
+        if update is None:
+            update = bool(os.environ.get(UPDATE_ENV))
+        self.update = update
+        self.diff_dir = diff_dir
+
+        # comparison of each page added and the renders of pages to save or report
+        self.results = []
+        self._images = {}
+
+        self.index_path = os.path.join(folder, "{}.json".format(name))
+        self.reference = {"dpi": dpi, "pages": []}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.reference = json.load(f)
+            if self.reference["dpi"] != dpi:
+                raise ValueError(
+                    "References of {} are rendered at {} dpi, not {}.".format(
+                        name, self.reference["dpi"], dpi
+                    )
+                )
+
+    def __len__(self):
+        """ Number of pages added """
+
+        return len(self.results)
+
+    def _reference_path(self, page):
+        return os.path.join(self.folder, "{}_{:03}.png".format(self.name, page))
+
+    def add(self, fig):
+        """
+        Render a finished page and compare it with its reference
+
+        Args:
+            fig: page figure
+
+        Returns: (dict) comparison with page, status, hash_distance, tiles_changed and max_tile_diff keys. The
+        status is identical, within tolerance, changed or new
+
+        """
+        page = len(self.results) + 1
+        image = render_page(fig, self.dpi)
+        entry = {
+            "digest": digest(image),
+            "hash": perceptual_hash(image),
+            "shape": list(image.shape),
+        }
+        result = {
+            "page": page,
+            "status": "new",
+            "hash_distance": None,
+            "tiles_changed": None,
+            "max_tile_diff": None,
+            "entry": entry,
+        }
+        self.results.append(result)
+
+        if page > len(self.reference["pages"]):
+            self._images[page] = image
+            return result
+        reference = self.reference["pages"][page - 1]
+        if reference["digest"] == entry["digest"]:
+            result["status"] = "identical"
+            return result
+
+        result["hash_distance"] = hash_distance(reference["hash"], entry["hash"])
+        if (
+            reference["shape"] != entry["shape"]
+            or result["hash_distance"] > self.max_hash_distance
+        ):
+            result["status"] = "changed"
+            self._images[page] = image
+            self._write_diff(page, image, None)
+            return result
+
+        expected = np.asarray(Image.open(self._reference_path(page)).convert("RGB"))
+        tiles = tile_diff(expected, image, self.tile)
+        result["tiles_changed"] = int((tiles > self.tolerance).sum())
+        result["max_tile_diff"] = round(float(tiles.max()), 2)
+        if result["tiles_changed"]:
+            result["status"] = "changed"
+            self._images[page] = image
+            self._write_diff(page, image, expected)
+        else:
+            result["status"] = "within tolerance"
+        return result
+
+    def _write_diff(self, page, image, expected):
+        """
+        Save the render of a changed page and its difference with the reference to diff_dir
+
+        Returns: None
+
+        """
+        if self.diff_dir is None:
+            return
+        if not os.path.isdir(self.diff_dir):
+            os.makedirs(self.diff_dir)
+        stem = os.path.join(self.diff_dir, "{}_{:03}".format(self.name, page))
+        Image.fromarray(np.ascontiguousarray(image)).save(stem + "_actual.png")
+        if expected is not None:
+            diff = np.abs(expected.astype(np.int16) - image.astype(np.int16)).max(
+                axis=2
+            )
+            Image.fromarray((255 - np.minimum(diff * 4, 255)).astype(np.uint8)).save(
+                stem + "_diff.png"
+            )
+
+    def check(self):
+        """
+        Save the new references in update mode. Otherwise raise an AssertionError if a page changed, has no
+        reference or a reference page was not added
+
+        Returns: (list) comparison of each page
+
+        """
+        missing = len(self.reference["pages"]) - len(self.results)
+        if self.update:
+            self._save()
+            return self.results
+
+        failed = [r for r in self.results if r["status"] in ["changed", "new"]]
+        if failed or missing > 0:
+            lines = [
+                "Pages of {} do not match the references in {}:".format(
+                    self.name, self.folder
+                )
+            ]
+            for r in failed:
+                lines.append(
+                    "page {} {}: hash distance {}, {} tiles over the tolerance, largest tile difference {}".format(
+                        r["page"],
+                        r["status"],
+                        r["hash_distance"],
+                        r["tiles_changed"],
+                        r["max_tile_diff"],
+                    )
+                )
+            if missing > 0:
+                lines.append("{} reference pages were not added".format(missing))
+            lines.append(
+                "Set {}=1 to save the pages as the new references.".format(UPDATE_ENV)
+            )
+            raise AssertionError("\n".join(lines))
+        return self.results
+
+    def _save(self):
+        """
+        Save the pages that changed or are new as references. Pages within tolerance keep their reference
+
+        Returns: None
+
+        """
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        pages = []
+        for r in self.results:
+            if r["page"] in self._images:
+                Image.fromarray(np.ascontiguousarray(self._images[r["page"]])).save(
+                    self._reference_path(r["page"]), optimize=True
+                )
+                pages.append(r["entry"])
+            else:
+                pages.append(self.reference["pages"][r["page"] - 1])
+        for page in range(len(pages) + 1, len(self.reference["pages"]) + 1):
+            os.remove(self._reference_path(page))
+
+        self.reference = {"dpi": self.dpi, "pages": pages}
+        with open(self.index_path, "w") as f:
+            json.dump(self.reference, f, indent=2)
+        self._images = {}
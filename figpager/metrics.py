@@ -0,0 +1,313 @@
+"""
+Module file that contains a Metrics class used by FigPager to count pages, subplots, bytes written and cache hits
+and to time page drawing and saving. Metrics are exported in the Prometheus text format or in OpenMetrics to a
+textfile, i.e. for the node exporter textfile collector, or to a sink callable.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to time blocks of code
+import contextlib
+import os
+# used to share one Metrics between report threads
+import threading
+import time
+
+# default latency buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(v):
+    """
+    Format a sample value. Integral values are written without a decimal point
+    """
+
+    if v == int(v):
+        return str(int(v))
+    return repr(float(v))
+
+
+def _format_labels(labels):
+    """
+    Format a sorted label tuple as {name="value",...}
+    """
+
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            '{}="{}"'.format(
+                k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            )
+            for k, v in labels
+        )
+        + "}"
+    )
+
+
+class Metrics:
+
+    """ Counters and histograms exported in the Prometheus text format or OpenMetrics """
+
+    def __init__(
+        self,
+        namespace="figpager",
+        buckets=BUCKETS,
+        textfile=None,
+        sink=None,
+        openmetrics=False,
+    ):
+        """
+
+        Args:
+            namespace: (string) (optional) metric name prefix. Default is figpager
+            buckets: (list of floats) (optional) default histogram bucket upper bounds
+            textfile: (string) (optional) file path written by export
+            sink: (callable) (optional) called by export with the exposition text
+            openmetrics: (boolean) (optional) export OpenMetrics rather than the Prometheus text format.
+            Default is False
+        """
+
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self.textfile = textfile
+        self.sink = sink
+        self.openmetrics = openmetrics
+
+        # metric name to type, help, buckets and samples keyed by label tuple
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _name(self, name):
+        """ Full metric name with the namespace prefix """
+
+        if self.namespace:
+            return "{}_{}".format(self.namespace, name)
+        return name
+
+    def _register(self, name, kind, help, buckets=None):
+        """ Add a metric if it is not registered. Error if it is registered with another type """
+
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                self._metrics[name] = {
+                    "type": kind,
+                    "help": help,
+                    "buckets": tuple(sorted(buckets or self.buckets)),
+                    "samples": {},
+                }
+            elif metric["type"] != kind:
+                raise ValueError(
+                    "Metric {} is already registered as a {}.".format(
+                        name, metric["type"]
+                    )
+                )
+
+    def counter(self, name, help=""):
+        """
+        Register a counter. Counter names are given without the _total suffix
+        Args:
+            name: (string) metric name without the namespace
+            help: (string) (optional) help text
+
+        Returns: None
+
+        """
+        self._register(name, "counter", help)
+
+    def histogram(self, name, help="", buckets=None):
+        """
+        Register a histogram
+        Args:
+            name: (string) metric name without the namespace
+            help: (string) (optional) help text
+            buckets: (list of floats) (optional) bucket upper bounds. Default is the Metrics buckets
+
+        Returns: None
+
+        """
+        self._register(name, "histogram", help, buckets)
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increase a counter. Unregistered counters are registered without help text
+        Args:
+            name: (string) counter name
+            value: (int or float) (optional) amount to add. Default is 1
+            **labels: (optional) label names and values
+
+        Returns: None
+
+        """
+        if value < 0:
+            raise ValueError("Counters can only increase.")
+        if name not in self._metrics:
+            self.counter(name)
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            samples = self._metrics[name]["samples"]
+            samples[key] = samples.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """
+        Add an observation to a histogram. Unregistered histograms are registered with the default buckets
+        Args:
+            name: (string) histogram name
+            value: (float) observed value
+            **labels: (optional) label names and values
+
+        Returns: None
+
+        """
+        if name not in self._metrics:
+            self.histogram(name)
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            metric = self._metrics[name]
+            sample = metric["samples"].get(key)
+            if sample is None:
+                # bucket counts, sum, count
+                sample = [[0] * len(metric["buckets"]), 0.0, 0]
+                metric["samples"][key] = sample
+            for i, bound in enumerate(metric["buckets"]):
+                if value <= bound:
+                    sample[0][i] = sample[0][i] + 1
+            sample[1] = sample[1] + value
+            sample[2] = sample[2] + 1
+
+    @contextlib.contextmanager
+    def time(self, name, **labels):
+        """
+        Context manager that observes the run time of its block in seconds
+        Args:
+            name: (string) histogram name
+            **labels: (optional) label names and values
+
+        Returns: context manager
+
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def value(self, name, **labels):
+        """
+        Current value of a counter or observation count of a histogram
+        Args:
+            name: (string) metric name
+            **labels: (optional) label names and values
+
+        Returns: value, 0 if nothing was recorded
+
+        """
+        metric = self._metrics.get(name)
+        if metric is None:
+            return 0
+        sample = metric["samples"].get(tuple(sorted(labels.items())))
+        if sample is None:
+            return 0
+        if metric["type"] == "histogram":
+            return sample[2]
+        return sample
+
+    def render(self, openmetrics=None):
+        """
+        Exposition text of all metrics
+        Args:
+            openmetrics: (boolean) (optional) render OpenMetrics. Default is the Metrics setting
+
+        Returns: (string) exposition text
+
+        """
+        if openmetrics is None:
+            openmetrics = self.openmetrics
+
+        out = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                metric = self._metrics[name]
+                full = self._name(name)
+                family = full
+                if metric["type"] == "counter" and not openmetrics:
+                    # the Prometheus text format names the family after the sample
+                    family = full + "_total"
+
+                if metric["help"]:
+                    out.append("# HELP {} {}".format(family, metric["help"]))
+                out.append("# TYPE {} {}".format(family, metric["type"]))
+
+                for key in sorted(metric["samples"]):
+                    sample = metric["samples"][key]
+                    if metric["type"] == "counter":
+                        out.append(
+                            "{}_total{} {}".format(
+                                full, _format_labels(key), _format_value(sample)
+                            )
+                        )
+                        continue
+
+                    for bound, count in zip(metric["buckets"], sample[0]):
+                        out.append(
+                            "{}_bucket{} {}".format(
+                                full,
+                                _format_labels(key + (("le", _format_value(bound)),)),
+                                count,
+                            )
+                        )
+                    out.append(
+                        "{}_bucket{} {}".format(
+                            full, _format_labels(key + (("le", "+Inf"),)), sample[2]
+                        )
+                    )
+                    out.append(
+                        "{}_sum{} {}".format(
+                            full, _format_labels(key), _format_value(sample[1])
+                        )
+                    )
+                    out.append(
+                        "{}_count{} {}".format(full, _format_labels(key), sample[2])
+                    )
+
+        if openmetrics:
+            out.append("# EOF")
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path=None, openmetrics=None):
+        """
+        Write the exposition text to a file. The file is replaced atomically so collectors never read a partial
+        file
+        Args:
+            path: (string) (optional) file path. Default is the Metrics textfile
+            openmetrics: (boolean) (optional) render OpenMetrics. Default is the Metrics setting
+
+        Returns: file path
+
+        """
+        path = path or self.textfile
+        if path is None:
+            raise ValueError("No textfile path given.")
+
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp, "w") as f:
+            f.write(self.render(openmetrics))
+        os.replace(tmp, path)
+        return path
+
+    def export(self):
+        """
+        Write the textfile and call the sink if they are set
+
+        Returns: None
+
+        """
+        if self.textfile is not None:
+            self.write_textfile()
+        if self.sink is not None:
+            self.sink(self.render())
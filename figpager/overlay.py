@@ -0,0 +1,396 @@
+"""
+Module file that contains a LayoutOverlay class that puts FigPager layout decorations onto the pages of existing
+PDFs. The frame, boxes, text, logos and lines of a layout are drawn once per page size and orientation, and each
+input page is scaled into the layout frame and merged on top of them. Page content is copied, not rendered again.
+Requires pypdf.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to hold in memory templates
+import io
+import os
+
+from .figpager import FigPager, load_paper_sizes
+from .stamp import form_xobject, import_pypdf, stamp_figure
+
+# PDF user space units per inch
+POINTS = 72.0
+
+
+def _shown_size(page):
+    """
+    Width and height of a PDF page in points as it is shown, after its /Rotate
+    """
+
+    width = float(page.mediabox.width)
+    height = float(page.mediabox.height)
+    if page.rotation % 180:
+        return height, width
+    return width, height
+
+
+def _named_size(width, height, tolerance=0.05):
+    """
+    Paper size name of a page size so layout paper size sections apply
+    Args:
+        width: page width in inches
+        height: page height in inches
+        tolerance: (float) (optional) size difference allowed in inches
+
+    Returns: paper size name or the (width, height) tuple if no paper size matches
+
+    """
+
+    size = sorted([width, height])
+    for name, paper in load_paper_sizes()["paper_sizes"].items():
+        named = sorted([paper["width_in"], paper["height_in"]])
+        if (
+            abs(named[0] - size[0]) <= tolerance
+            and abs(named[1] - size[1]) <= tolerance
+        ):
+            return name
+    return (width, height)
+
+
+class _TemplatePager(FigPager):
+
+    """ FigPager that keeps page number text for stamping as the layout is drawn once for many pages """
+
+    defer_page_numbers = True
+
+
+class LayoutOverlay:
+
+    """ Merge FigPager layout decorations onto existing PDF pages """
+
+    def __init__(
+        self,
+        layout="default",
+        paper_size=None,
+        orientation=None,
+        draft=True,
+        scale=True,
+    ):
+        """
+
+        Args:
+            layout: (string) (optional) layout name or layout filepath. Default is default
+            paper_size: (string or tuple) (optional) output paper size. A string defined in paper_size.ini or a tuple
+            of width and height in inches. Default is None, the size of each input page
+            orientation: (string) (optional) Portrait or Landscape. Default is None, the orientation of each input
+            page
+            draft: (boolean) (optional) Add draft stamp if available from ini. Default is True
+            scale: (boolean) (optional) scale input pages into the layout frame. If False pages are merged at
+            their size and position. Default is True
+        """
+
+        self.pypdf = import_pypdf()
+        self.layout = layout
+        self.paper_size = paper_size
+        self.orientation = orientation
+        self.draft = draft
+        self.scale = scale
+
+        # rendered decorations keyed by page size and orientation
+        self.templates = {}
+
+    def _template(self, width, height):
+        """
+        Draw the layout decorations for a page size once
+
+        Args:
+            width: input page width in inches
+            height: input page height in inches
+
+        Returns: dict with the decoration page, page size in inches, frame [left, bottom, right, top] in figure
+        fractions and deferred page number texts
+
+        """
+        orientation = self.orientation
+        if orientation is None:
+            orientation = "landscape" if width > height else "portrait"
+        paper_size = self.paper_size
+        if paper_size is None:
+            paper_size = _named_size(width, height)
+
+        key = (repr(paper_size), orientation)
+        if key not in self.templates:
+            fp = _TemplatePager(
+                paper_size,
+                1,
+                1,
+                layout=self.layout,
+                orientation=orientation,
+                draft=self.draft,
+            )
+            pars = fp.fig.subplotpars
+            buf = io.BytesIO()
+            fp.fig.savefig(buf, format="pdf")
+            self.templates[key] = {
+                "page": self.pypdf.PdfReader(buf).pages[0],
+                "size": tuple(fp.fig.get_size_inches()),
+                "frame": [pars.left, pars.bottom, pars.right, pars.top],
+                "texts": fp._page_stamps,
+            }
+            fp._release()
+
+        return self.templates[key]
+
+    def _transformation(self, page, template):
+        """
+        Transformation that scales an input page into the template frame keeping its aspect ratio
+
+        Args:
+            page: input pypdf page
+            template: template dict
+
+        Returns: pypdf Transformation
+
+        """
+        box = page.mediabox
+        width, height = _shown_size(page)
+
+        page_width = template["size"][0] * POINTS
+        page_height = template["size"][1] * POINTS
+        left, bottom, right, top = template["frame"]
+        if self.scale:
+            factor = min(
+                (right - left) * page_width / width,
+                (top - bottom) * page_height / height,
+            )
+            # centre the page in the frame
+            tx = (left + right) / 2.0 * page_width - factor * width / 2.0
+            ty = (bottom + top) / 2.0 * page_height - factor * height / 2.0
+        else:
+            factor = 1.0
+            tx = 0
+            ty = 0
+
+        # turn the content as the page /Rotate shows it with the lower left corner at the origin
+        return (
+            self.pypdf.Transformation()
+            .translate(
+                -float(box.left) - float(box.width) / 2.0,
+                -float(box.bottom) - float(box.height) / 2.0,
+            )
+            .rotate(-page.rotation)
+            .translate(width / 2.0, height / 2.0)
+            .scale(factor, factor)
+            .translate(tx, ty)
+        )
+
+    def _destination(self, dest, targets):
+        """
+        Point a link destination at the output page of its input page
+
+        Args:
+            dest: pypdf destination array, or a named destination which is kept as it is
+            targets: (output page reference, transformation) tuples keyed by the object number of the input page
+
+        Returns: destination for the output PDF
+
+        """
+        generic = self.pypdf.generic
+
+        dest = dest.get_object()
+        if not isinstance(dest, generic.ArrayObject) or not dest:
+            return dest
+        page = dest[0]
+        if not isinstance(page, generic.IndirectObject) or page.idnum not in targets:
+            return dest
+        reference, transformation = targets[page.idnum]
+        view = [generic.NameObject("/Fit")]
+        if len(dest) == 5 and dest[1] == "/XYZ" and None not in dest[2:4]:
+            # the view corner moves with the page content
+            left, top = transformation.apply_on((float(dest[2]), float(dest[3])))
+            view = [
+                dest[1],
+                generic.FloatObject(left),
+                generic.FloatObject(top),
+                dest[4],
+            ]
+        return generic.ArrayObject([reference] + view)
+
+    def _annotations(self, writer, out, page, transformation, targets):
+        """
+        Copy the annotations of an input page onto its output page, moved and scaled with the page content.
+        Links to pages of the input PDF point to their output pages. Popups are dropped and form field widgets
+        are copied without the document form
+
+        Args:
+            writer: pypdf PdfWriter
+            out: output page
+            page: input pypdf page
+            transformation: pypdf Transformation of the page content
+            targets: (output page reference, transformation) tuples keyed by the object number of the input page
+
+        Returns: number of annotations copied
+
+        """
+        generic = self.pypdf.generic
+
+        annots = page.get("/Annots")
+        annots = annots.get_object() if annots is not None else None
+        count = 0
+        for annot in annots or []:
+            annot = annot.get_object()
+            if annot.get("/Subtype") == "/Popup":
+                continue
+
+            copy = generic.DictionaryObject()
+            for key, value in annot.items():
+                if key in ("/P", "/Parent", "/Popup", "/StructParent"):
+                    continue
+                if key == "/Dest":
+                    value = self._destination(value, targets)
+                elif key == "/A" and value.get_object().get("/S") == "/GoTo":
+                    action = generic.DictionaryObject(value.get_object())
+                    action[generic.NameObject("/D")] = self._destination(
+                        action["/D"], targets
+                    )
+                    value = action
+                copy[generic.NameObject(key)] = value.clone(writer)
+
+            rect = [float(v) for v in annot["/Rect"]]
+            corners = [
+                transformation.apply_on(point)
+                for point in [(rect[0], rect[1]), (rect[2], rect[3])]
+            ]
+            xs = [point[0] for point in corners]
+            ys = [point[1] for point in corners]
+            copy[generic.NameObject("/Rect")] = generic.ArrayObject(
+                [generic.FloatObject(v) for v in [min(xs), min(ys), max(xs), max(ys)]]
+            )
+            if "/QuadPoints" in annot:
+                quad = [float(v) for v in annot["/QuadPoints"]]
+                copy[generic.NameObject("/QuadPoints")] = generic.ArrayObject(
+                    [
+                        generic.FloatObject(v)
+                        for i in range(0, len(quad), 2)
+                        for v in transformation.apply_on((quad[i], quad[i + 1]))
+                    ]
+                )
+            writer.add_annotation(out, copy)
+            count += 1
+        return count
+
+    def apply(self, infile, outfile, overwrite=False):
+        """
+        Write a copy of a PDF with the layout decorations on every page
+
+        Args:
+            infile: input PDF path
+            outfile: output PDF path
+            overwrite: (boolean) (optional) overwrite an existing output. Default is False
+
+        Returns: number of pages written
+
+        """
+        if os.path.isfile(outfile) and not overwrite:
+            raise IOError("Output file already exists: " + outfile)
+
+        generic = self.pypdf.generic
+        reader = self.pypdf.PdfReader(infile)
+        writer = self.pypdf.PdfWriter()
+        pages = len(reader.pages)
+        # decoration forms of this writer keyed by template
+        forms = {}
+        # output page and page content transformation keyed by the object number of the input page
+        targets = {}
+
+        for number, page in enumerate(reader.pages, 1):
+            # rotated pages are laid out as they are shown
+            width, height = _shown_size(page)
+            template = self._template(width / POINTS, height / POINTS)
+            transformation = self._transformation(page, template)
+            out = writer.add_blank_page(
+                template["size"][0] * POINTS, template["size"][1] * POINTS
+            )
+            if id(template) not in forms:
+                forms[id(template)] = form_xobject(writer, out, template["page"])
+
+            # each page is drawn through a form XObject so content streams are copied, not parsed and rewritten.
+            # decorations go underneath so opaque page backgrounds do not hide the content
+            xobjects = {
+                "/FpLayout": forms[id(template)],
+                "/FpPage": form_xobject(writer, out, page),
+            }
+            ctm = " ".join("{:.6f}".format(v) for v in transformation.ctm)
+            content = "q /FpLayout Do Q q {} cm /FpPage Do Q".format(ctm)
+
+            if template["texts"]:
+                buf = io.BytesIO()
+                stamp_figure(template, number, pages).savefig(buf, format="pdf")
+                xobjects["/FpStamp"] = form_xobject(
+                    writer, out, self.pypdf.PdfReader(buf).pages[0]
+                )
+                content += " q /FpStamp Do Q"
+
+            out[generic.NameObject("/Resources")] = generic.DictionaryObject(
+                {
+                    generic.NameObject("/XObject"): generic.DictionaryObject(
+                        {generic.NameObject(k): v for k, v in xobjects.items()}
+                    )
+                }
+            )
+            stream = generic.DecodedStreamObject()
+            stream.set_data(content.encode("ascii"))
+            out.replace_contents(stream)
+            targets[page.indirect_reference.idnum] = (
+                out.indirect_reference,
+                transformation,
+            )
+
+        # annotations go on once every output page exists so links to later pages can be pointed at them
+        for page, out in zip(reader.pages, writer.pages):
+            if "/Annots" in page:
+                self._annotations(
+                    writer,
+                    out,
+                    page,
+                    targets[page.indirect_reference.idnum][1],
+                    targets,
+                )
+
+        if reader.metadata:
+            writer.add_metadata(reader.metadata)
+
+        tmp = outfile + ".tmp"
+        with open(tmp, "wb") as f:
+            writer.write(f)
+        os.replace(tmp, outfile)
+        return pages
+
+
+def overlay_pdf(
+    infile,
+    outfile,
+    layout="default",
+    paper_size=None,
+    orientation=None,
+    draft=True,
+    scale=True,
+    overwrite=False,
+):
+    """
+    Put the decorations of a FigPager layout onto every page of an existing PDF. Use a LayoutOverlay to reuse the
+    rendered decorations across many files
+    Args:
+        infile: input PDF path
+        outfile: output PDF path
+        layout: (string) (optional) layout name or layout filepath. Default is default
+        paper_size: (string or tuple) (optional) output paper size. Default is the size of each input page
+        orientation: (string) (optional) Portrait or Landscape. Default is the orientation of each input page
+        draft: (boolean) (optional) Add draft stamp if available from ini. Default is True
+        scale: (boolean) (optional) scale input pages into the layout frame. Default is True
+        overwrite: (boolean) (optional) overwrite an existing output. Default is False
+
+    Returns: number of pages written
+
+    """
+
+    return LayoutOverlay(layout, paper_size, orientation, draft, scale).apply(
+        infile, outfile, overwrite
+    )
@@ -0,0 +1,502 @@
+"""
+Module file that contains a ParallelPager class that draws FigPager pages in a process pool and a shared memory
+transport for the arrays behind them. Arrays are copied once into multiprocessing.shared_memory and page jobs carry
+small ArrayHandles that workers map as read-only numpy views, so large arrays are not pickled into every worker.
+Workers close the segments they mapped after each job and only the ParallelPager that created them unlinks them,
+when close() completes. Another executor, such as a DirectoryQueue with workers on other
+machines, can be passed in place of the process pool. Its jobs return the encoded pages to the coordinator.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to drop the figures of a job before its shared memory is closed
+import gc
+# used to find the calling script for the source path
+import inspect
+import os
+# used to remove the page files of the workers
+import shutil
+import sys
+# used to write the page files of the workers next to the output
+import tempfile
+# used to unlink shared memory that was not closed
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .figpager import RASTER_TYPES, FigPager
+from .prewarm import prewarm
+from .stamp import import_pypdf, stamp_pdf, stamp_raster
+
+# shared memory segments attached by this process, by name
+_attached = {}
+
+
+def import_shared_memory():
+    """
+    Import multiprocessing.shared_memory, which is new in Python 3.8
+
+    Returns: shared_memory module
+
+    """
+
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise ImportError(
+            "Shared arrays require Python 3.8 or later. Pass the arrays to add_page directly on older versions."
+        )
+    return shared_memory
+
+
+class ArrayHandle:
+
+    """ Picklable reference to an array in shared memory """
+
+    def __init__(self, name, shape, dtype):
+        """
+
+        Args:
+            name: shared memory segment name
+            shape: (tuple) array shape
+            dtype: (string) numpy dtype string
+        """
+
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __repr__(self):
+        return "ArrayHandle({!r}, {}, {})".format(self.name, self.shape, self.dtype)
+
+    def array(self):
+        """
+        Map the shared array in this process. The segment stays attached until _detach() is called
+
+        Returns: read-only numpy array view
+
+        """
+        shm = _attached.get(self.name)
+        if shm is None:
+            shared_memory = import_shared_memory()
+            if sys.version_info >= (3, 13):
+                # the creating process owns the segment, so the resource tracker of a worker leaves it alone
+                shm = shared_memory.SharedMemory(name=self.name, track=False)
+            else:
+                shm = shared_memory.SharedMemory(name=self.name)
+            _attached[self.name] = shm
+        view = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        return view
+
+
+def _detach():
+    """
+    Close the shared memory segments attached by this process without unlinking them. A segment still mapped by
+    a live array stays attached until the next call
+    """
+
+    # matplotlib figures hold reference cycles to the arrays they draw
+    gc.collect()
+    for name in list(_attached):
+        try:
+            _attached[name].close()
+        except BufferError:
+            continue
+        del _attached[name]
+
+
+def _unlink(segments):
+    """
+    Close and unlink shared memory segments
+    """
+
+    for shm in segments:
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    del segments[:]
+
+
+class SharedArrays:
+
+    """ Registry of arrays copied into shared memory """
+
+    def __init__(self):
+        self.handles = {}
+        self._segments = []
+        # unlink on garbage collection or interpreter exit if close() is not called
+        self._finalizer = weakref.finalize(self, _unlink, self._segments)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+        return False
+
+    def register(self, array):
+        """
+        Copy an array into shared memory once. Registering the same array object again returns the same handle
+
+        Args:
+            array: numpy array or array like
+
+        Returns: ArrayHandle
+
+        """
+        key = id(array)
+        if key in self.handles:
+            return self.handles[key][0]
+
+        data = np.ascontiguousarray(array)
+        shm = import_shared_memory().SharedMemory(create=True, size=max(1, data.nbytes))
+        self._segments.append(shm)
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[...] = data
+
+        handle = ArrayHandle(shm.name, data.shape, data.dtype.str)
+        # the array is kept so its id is not reused by another array
+        self.handles[key] = (handle, array)
+        return handle
+
+    @property
+    def nbytes(self):
+        """ Bytes held in shared memory """
+
+        return sum(shm.size for shm in self._segments)
+
+    def close(self):
+        """
+        Unlink every shared memory segment. Handles can no longer be mapped afterwards
+
+        Returns: None
+
+        """
+        self.handles = {}
+        self._finalizer()
+
+
+def _resolve(value):
+    """
+    Replace the ArrayHandles in page job arguments with numpy views
+    """
+
+    if isinstance(value, ArrayHandle):
+        return value.array()
+    if isinstance(value, list):
+        return [_resolve(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_resolve(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _resolve(v) for k, v in value.items()}
+    return value
+
+
+class _JobPager(FigPager):
+
+    """ FigPager of a page job. Page numbers are kept for stamping once the pages of every job are counted """
+
+    defer_page_numbers = True
+    # source path of the script that submitted the job
+    job_callerpath = None
+
+    def get_caller_filepath(self):
+        return self.job_callerpath
+
+    def _apply_stamps(self):
+        # the parent stamps the merged output
+        return None
+
+
+def _page_files(path, pages):
+    """
+    File names FigPager writes for the pages of a non multipage output
+    """
+
+    stem, ext = os.path.splitext(path)
+    return [path] + ["{}_{:02}{}".format(stem, n, ext) for n in range(2, pages + 1)]
+
+
+def _render_job(path, callerpath, options, func, args, kwargs):
+    """
+    Draw the pages of a job in a worker process
+
+    Returns: number of pages and the deferred page number texts by job page
+
+    """
+
+    _JobPager.job_callerpath = callerpath
+    fp = _JobPager(outfile=path, overwrite=True, **options)
+    try:
+        func(fp, *_resolve(args), **_resolve(kwargs))
+        fp.close()
+    except BaseException:
+        fp._release()
+        raise
+    finally:
+        pages, stamps = fp.pagecount, fp.stamps
+        del fp
+        _detach()
+    return pages, stamps
+
+
+def _render_encoded(ext, callerpath, options, func, args, kwargs):
+    """
+    Draw the pages of a job in a worker of an executor on any machine and return the encoded page files
+
+    Returns: number of pages, the deferred page number texts by job page and the page file bytes
+
+    """
+
+    folder = tempfile.mkdtemp(prefix="figpager-")
+    try:
+        path = os.path.join(folder, "job." + ext)
+        pages, stamps = _render_job(path, callerpath, options, func, args, kwargs)
+        files = [path] if ext == "pdf" else _page_files(path, pages)
+        encoded = []
+        for name in files:
+            with open(name, "rb") as f:
+                encoded.append(f.read())
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return pages, stamps, encoded
+
+
+class ParallelPager:
+
+    """ Draw FigPager pages in a process pool with arrays passed through shared memory """
+
+    def __init__(
+        self,
+        paper_size,
+        nrows=None,
+        ncols=None,
+        outfile=None,
+        processes=None,
+        overwrite=False,
+        executor=None,
+        **kwargs
+    ):
+        """
+
+        Args:
+            paper_size: (string or tuple) paper size as for FigPager
+            nrows: (int) Number of rows of subplots per page.
+            ncols: (int) Number of columns of subplots per page.
+            outfile: (string) out file path. A pdf is merged from the pages of every job. Other file types get a
+            zero padded page number suffix as in FigPager
+            processes: (int) (optional) number of worker processes. Default is the number of CPUs
+            overwrite: (boolean) (optional) Boolean on whether to overwrite existing output. Default is False
+            executor: (concurrent.futures.Executor) (optional) executor that runs the page jobs in place of the
+            process pool, i.e. a figpager.DirectoryQueue. Jobs return their encoded pages and share() returns the
+            array itself, as shared memory does not reach other machines. The executor is not shut down. Default
+            is None, a process pool
+            **kwargs: (optional) any additional FigPager keywords such as layout, orientation or dpi
+        """
+
+        if outfile is None:
+            raise ValueError("ParallelPager requires an outfile.")
+        if os.path.isdir(outfile):
+            raise IOError("This is a directory. Please provide a file path.")
+        if os.path.isfile(outfile) and not overwrite:
+            raise IOError("Output file already exists: " + outfile)
+
+        self.outfile = outfile
+        self.type = os.path.splitext(outfile)[1][1:].lower()
+        if self.type == "pdf":
+            import_pypdf()
+        elif self.type == "pgf":
+            raise ValueError("ParallelPager can not merge pgf pages.")
+
+        self.options = dict(kwargs, paper_size=paper_size, nrows=nrows, ncols=ncols)
+        self.callerpath = os.path.abspath(inspect.stack()[-1][1])
+
+        # arrays shared with the workers
+        self.shared = SharedArrays()
+
+        # page files of each job are written to a folder next to the output
+        self._folder = tempfile.mkdtemp(
+            prefix=".figpager-", dir=os.path.dirname(os.path.abspath(outfile))
+        )
+        self._jobs = []
+        self.pagecount = 0
+        self.closed = False
+
+        self.executor = executor
+        if executor is not None:
+            self._pool = executor
+            return
+
+        # workers load the layout, paper sizes and fonts before their first job
+        paper_sizes = () if isinstance(paper_size, (tuple, list)) else (paper_size,)
+        self._pool = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=prewarm,
+            initargs=((kwargs.get("layout", "default"),), paper_sizes),
+        )
+
+    def __enter__(self):
+        """ Return self on entry """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        """ Merge the pages on exit. On an exception the jobs are cancelled and nothing is written """
+
+        if exc_type is None:
+            self.close()
+        else:
+            self._release()
+        return False
+
+    def share(self, array):
+        """
+        Copy an array into shared memory once and return a handle to pass to page jobs in place of the array
+
+        Args:
+            array: numpy array
+
+        Returns: ArrayHandle or the array when an executor was passed
+
+        """
+        if self.executor is not None:
+            return array
+        return self.shared.register(array)
+
+    def add_page(self, func, *args, **kwargs):
+        """
+        Submit a page job. In a worker func(fp, *args, **kwargs) draws on a FigPager with this instance's options.
+        ArrayHandles in args and kwargs, also inside lists, tuples and dicts, are replaced with read-only numpy
+        views. func must be importable by the workers and may add pages of its own
+
+        Args:
+            func: function that draws on the FigPager
+            *args: (optional) arguments of func
+            **kwargs: (optional) keyword arguments of func
+
+        Returns: future of the job's page count and deferred page number texts
+
+        """
+        if self.closed:
+            raise ValueError("Cannot add a page to a closed ParallelPager.")
+
+        path = os.path.join(
+            self._folder, "job_{:06}.{}".format(len(self._jobs) + 1, self.type)
+        )
+        if self.executor is not None:
+            job = self._pool.submit(
+                _render_encoded,
+                self.type,
+                self.callerpath,
+                self.options,
+                func,
+                args,
+                kwargs,
+            )
+        else:
+            job = self._pool.submit(
+                _render_job, path, self.callerpath, self.options, func, args, kwargs
+            )
+        self._jobs.append((path, job))
+        return job
+
+    def close(self):
+        """
+        Wait for the page jobs, write their pages in submission order to the output, stamp page numbers and
+        unlink the shared memory
+
+        Returns: number of pages written
+
+        """
+        if self.closed:
+            return self.pagecount
+
+        try:
+            results = [(path, job.result()) for path, job in self._jobs]
+            if self.executor is None:
+                self._pool.shutdown()
+            else:
+                results = [
+                    (path, self._write_encoded(path, result))
+                    for path, result in results
+                ]
+
+            stamps = {}
+            files = []
+            for path, (pages, job_stamps) in results:
+                for page, stamp in job_stamps.items():
+                    stamps[self.pagecount + page] = stamp
+                files.extend(_page_files(path, pages) if self.type != "pdf" else [path])
+                self.pagecount = self.pagecount + pages
+
+            if self.type == "pdf":
+                self._merge_pdf(files)
+                if stamps:
+                    stamp_pdf(self.outfile, stamps, self.pagecount)
+            else:
+                for number, (name, fname) in enumerate(
+                    zip(files, _page_files(self.outfile, len(files))), 1
+                ):
+                    os.replace(name, fname)
+                    if number in stamps and self.type in RASTER_TYPES:
+                        stamp_raster(fname, stamps[number], number, self.pagecount)
+        finally:
+            self._release()
+
+        return self.pagecount
+
+    def _write_encoded(self, path, result):
+        """
+        Write the encoded pages of a job returned by an executor to the job files
+
+        Args:
+            path: job file path
+            result: page count, page number texts and page file bytes
+
+        Returns: page count and page number texts
+
+        """
+        pages, stamps, encoded = result
+        files = [path] if self.type == "pdf" else _page_files(path, pages)
+        for name, data in zip(files, encoded):
+            with open(name, "wb") as f:
+                f.write(data)
+        return pages, stamps
+
+    def _merge_pdf(self, files):
+        """
+        Append the pages of the job pdfs to the output
+
+        Args:
+            files: list of job pdf paths
+
+        Returns: None
+
+        """
+        pypdf = import_pypdf()
+        writer = pypdf.PdfWriter()
+        for name in files:
+            writer.append(name)
+        tmp = self.outfile + ".tmp"
+        with open(tmp, "wb") as f:
+            writer.write(f)
+        os.replace(tmp, self.outfile)
+
+    def _release(self):
+        """
+        Stop the workers, remove the job files and unlink the shared memory
+
+        Returns: None
+
+        """
+        for path, job in self._jobs:
+            job.cancel()
+        if self.executor is None:
+            self._pool.shutdown()
+        shutil.rmtree(self._folder, ignore_errors=True)
+        self.shared.close()
+        self.closed = True
@@ -0,0 +1,128 @@
+"""
+Module file that contains a prewarm function for process pool workers. It loads the matplotlib font cache and
+fonts, the paper sizes, layouts and layout images into the process caches and renders one hidden page so the
+first real page of a worker costs the same as the following ones.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to render the hidden page in memory
+import io
+import os
+import time
+# used to report fonts that are not installed
+import warnings
+
+# used to load fonts into the font cache
+from matplotlib import font_manager
+
+from .figpager import FigPager, _cached_image, _cached_layout, load_paper_sizes
+
+
+def _layout_path(layout):
+    """
+    Layout file path of a packaged layout name or a layout file path
+    """
+
+    path = os.path.join(FigPager.page_layout_path, layout + ".ini")
+    if os.path.isfile(path):
+        return path
+    if os.path.isfile(layout):
+        return layout
+    raise ValueError("Not a valid internal layout or layout file path: " + layout)
+
+
+def _image_paths(section):
+    """
+    Image paths of a layout section including the paper size and orientation subsections
+    """
+
+    paths = []
+    for key, value in section.items():
+        if isinstance(value, dict):
+            paths.extend(_image_paths(value))
+        elif key == "image_path" and value:
+            paths.append(value)
+    return paths
+
+
+def prewarm(
+    layouts=("default",),
+    paper_sizes=("letter",),
+    fonts=(),
+    formats=("png", "pdf"),
+    dpi=72,
+):
+    """
+    Warm the per process caches used by FigPager. Use it as a process pool initializer, i.e.
+    ProcessPoolExecutor(initializer=prewarm, initargs=(["report.ini"], ["letter"], ["DejaVu Sans"]))
+    Args:
+        layouts: (list of strings) (optional) layout names or layout file paths. Default is the default layout
+        paper_sizes: (list of strings) (optional) paper sizes to check. Default is letter
+        fonts: (list of strings) (optional) font family names to find and load. A family that is not installed is
+        reported as None with a RuntimeWarning, as matplotlib would draw it with the default font
+        formats: (list of strings) (optional) formats the hidden page is rendered to. Default is png and pdf
+        dpi: (int) (optional) dpi of the hidden page. Default is 72
+
+    Returns: dict of what was warmed with fonts, layouts, images, paper_sizes, formats and seconds keys
+
+    """
+
+    start = time.perf_counter()
+    report = {
+        "fonts": {},
+        "layouts": [],
+        "images": [],
+        "paper_sizes": [],
+        "formats": [],
+    }
+
+    # find and load the fonts. The first findfont reads the font manager cache
+    for family in ["sans-serif"] + list(fonts):
+        try:
+            path = font_manager.findfont(
+                font_manager.FontProperties(family=[family]), fallback_to_default=False
+            )
+        except ValueError:
+            warnings.warn(
+                "Font family {} was not found and is not prewarmed. Pages will use the default font.".format(
+                    family
+                ),
+                RuntimeWarning,
+            )
+            report["fonts"][family] = None
+            continue
+        font_manager.get_font(path)
+        report["fonts"][family] = str(path)
+
+    paper = load_paper_sizes()["paper_sizes"]
+    for paper_size in paper_sizes:
+        if paper_size.lower() not in paper:
+            raise ValueError("paper size not found: " + paper_size)
+        report["paper_sizes"].append(paper_size)
+
+    for layout in layouts:
+        path = _layout_path(layout)
+        config = _cached_layout(path)[0]
+        report["layouts"].append(path)
+        for fname in _image_paths(config.get("Images", {})):
+            if fname not in report["images"]:
+                _cached_image(fname)
+                report["images"].append(fname)
+
+    # draw and render one hidden page per layout. This warms text layout and the backends
+    for layout in layouts:
+        fp = FigPager(
+            paper_sizes[0] if paper_sizes else "letter", 1, 1, layout=layout, dpi=dpi,
+        )
+        ax = fp.add_subplot()
+        ax.plot([0, 1], [0, 1])
+        ax.set_title("prewarm")
+        for fmt in formats:
+            fp.fig.savefig(io.BytesIO(), format=fmt, dpi=dpi)
+        fp._release()
+
+    report["formats"] = list(formats)
+    report["seconds"] = time.perf_counter() - start
+    return report
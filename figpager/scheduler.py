@@ -0,0 +1,505 @@
+"""
+Module file that contains a Scheduler that runs FigPager report jobs in a pool of worker processes. Pending jobs are
+kept in a priority queue so small jobs are not stuck behind large ones, each job can have an address space limit,
+workers are replaced after a number of pages to shed matplotlib memory fragmentation and submit() blocks once the
+queue is full. Queue and run times are recorded per job.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to order pending jobs
+import heapq
+# used to start and talk to the worker processes
+import multiprocessing
+import os
+# used for queue.Full on a full queue
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+from . import figpager
+
+try:
+    # used to limit the address space of a job. Not available on Windows
+    import resource
+except ImportError:
+    resource = None
+
+# seconds the dispatcher waits for worker messages before looking at the queue again
+POLL = 0.05
+
+
+class WorkerLostError(RuntimeError):
+
+    """ Raised for a job whose worker process exited while running it """
+
+
+def _address_space():
+    """
+    Address space of this process in bytes or None if it is not known
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _limit_memory(memory_limit):
+    """
+    Limit the address space a job may add to this process. Returns the previous soft limit or None
+    """
+
+    if memory_limit is None or resource is None:
+        return None
+    current = _address_space()
+    if current is None:
+        return None
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + memory_limit
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return soft
+
+
+def _worker(conn, max_pages, max_jobs, initializer, initargs):
+    """
+    Worker process loop. Runs jobs sent by the scheduler until it is told to stop or has finished max_pages
+    pages or max_jobs jobs
+
+    Returns: None
+
+    """
+
+    if initializer is not None:
+        initializer(*initargs)
+
+    start_pages = figpager.pages_finished()
+    jobs = 0
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        job_id, func, args, kwargs, memory_limit = message
+
+        pages = figpager.pages_finished()
+        soft = _limit_memory(memory_limit)
+        try:
+            value = func(*args, **kwargs)
+            ok = True
+        except BaseException as e:
+            value = e
+            try:
+                value.worker_traceback = traceback.format_exc()
+            except AttributeError:
+                pass
+            ok = False
+        finally:
+            if soft is not None:
+                hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+                resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+        jobs = jobs + 1
+        pages = figpager.pages_finished() - pages
+
+        # a failed allocation leaves a fragmented heap so the worker is replaced
+        worker_pages = figpager.pages_finished() - start_pages
+        recycle = (
+            isinstance(value, MemoryError)
+            or (max_pages is not None and worker_pages >= max_pages)
+            or (max_jobs is not None and jobs >= max_jobs)
+        )
+        try:
+            conn.send((job_id, ok, value, pages, recycle))
+        except Exception as e:
+            # results and errors that can not be pickled
+            conn.send((job_id, False, RuntimeError(repr(e)), pages, recycle))
+        if recycle:
+            break
+    conn.close()
+
+
+class Job:
+
+    """ A submitted job with its future and queue and run times """
+
+    def __init__(self, job_id, func, args, kwargs, priority, memory_limit, name):
+        self.id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.memory_limit = memory_limit
+        self.name = name
+
+        self.future = Future()
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.pages = None
+        self.pid = None
+
+    def __repr__(self):
+        return "Job({}, {!r}, priority={})".format(self.id, self.name, self.priority)
+
+    def result(self, timeout=None):
+        """ Wait for the job and return its result or raise its error """
+
+        return self.future.result(timeout)
+
+    @property
+    def queue_seconds(self):
+        """ Seconds from submission to the start of the job """
+
+        if self.started is None:
+            return None
+        return self.started - self.submitted
+
+    @property
+    def run_seconds(self):
+        """ Seconds the job ran in its worker """
+
+        if self.finished is None or self.started is None:
+            return None
+        return self.finished - self.started
+
+
+class Scheduler:
+
+    """ Run FigPager jobs in worker processes by priority """
+
+    def __init__(
+        self,
+        workers=None,
+        max_pending=100,
+        max_pages_per_child=None,
+        max_jobs_per_child=None,
+        reserved_workers=0,
+        memory_limit=None,
+        initializer=None,
+        initargs=(),
+        metrics=None,
+        start_method=None,
+    ):
+        """
+
+        Args:
+            workers: (int) (optional) number of worker processes. Default is the number of CPUs
+            max_pending: (int) (optional) jobs waiting in the queue before submit() blocks. Default is 100
+            max_pages_per_child: (int) (optional) replace a worker after it finished this many pages. Default is
+            None, never
+            max_jobs_per_child: (int) (optional) replace a worker after this many jobs. Default is None, never
+            reserved_workers: (int) (optional) workers that only run jobs with priority 0 or lower, so small
+            jobs do not wait for large jobs that are already running. Default is 0
+            memory_limit: (int) (optional) default bytes of address space a job may add to its worker. A job that
+            allocates more raises MemoryError. Needs the resource module. Default is None, no limit
+            initializer: (callable) (optional) called in each new worker, i.e. figpager.prewarm
+            initargs: (tuple) (optional) initializer arguments
+            metrics: (Metrics) (optional) figpager.Metrics that records job queue and run seconds and finished jobs
+            by status. Default is None
+            start_method: (string) (optional) multiprocessing start method of the workers. Workers are replaced
+            from the dispatcher thread, where fork could copy locks held by other threads. Default is None,
+            forkserver where available, else spawn
+        """
+
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_pages_per_child = max_pages_per_child
+        self.max_jobs_per_child = max_jobs_per_child
+        self.reserved_workers = reserved_workers
+        self.memory_limit = memory_limit
+        self.initializer = initializer
+        self.initargs = initargs
+
+        self.metrics = metrics
+        if self.metrics is not None:
+            self.metrics.histogram(
+                "job_queue_seconds", "Seconds jobs waited in the scheduler queue."
+            )
+            self.metrics.histogram("job_run_seconds", "Seconds jobs ran in a worker.")
+            self.metrics.counter("jobs_finished", "Jobs finished by status.")
+
+        # finished job records with name, priority, queue and run seconds, pages, worker pid and status
+        self.history = []
+        self.workers_started = 0
+
+        self._pending = []
+        self._count = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        if start_method is None:
+            start_method = (
+                "forkserver"
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            # workers forked from the server start with figpager and matplotlib imported
+            self._context.set_forkserver_preload(["figpager"])
+
+        # worker dicts with process, connection and the running job
+        self._workers = [self._start_worker() for i in range(self.workers)]
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="figpager-scheduler", daemon=True
+        )
+        self._dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.shutdown(cancel_pending=exc_type is not None)
+        return False
+
+    def _start_worker(self):
+        """
+        Start a worker process
+
+        Returns: worker dict
+
+        """
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker,
+            args=(
+                child,
+                self.max_pages_per_child,
+                self.max_jobs_per_child,
+                self.initializer,
+                self.initargs,
+            ),
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        self.workers_started = self.workers_started + 1
+        return {"process": process, "conn": parent, "job": None}
+
+    def submit(
+        self,
+        func,
+        args=(),
+        kwargs=None,
+        priority=0,
+        memory_limit=None,
+        name=None,
+        block=True,
+        timeout=None,
+    ):
+        """
+        Queue a job. Jobs with a lower priority number run first and jobs of equal priority run in submission order
+
+        Args:
+            func: picklable function run in a worker as func(*args, **kwargs), i.e. one that makes a FigPager report
+            args: (tuple) (optional) function arguments
+            kwargs: (dict) (optional) function keyword arguments
+            priority: (int) (optional) job priority. Default is 0
+            memory_limit: (int) (optional) bytes of address space the job may add to its worker. Default is the
+            scheduler memory_limit
+            name: (string) (optional) job name used in the history. Default is the function name
+            block: (boolean) (optional) wait for room when max_pending jobs are queued. If False raise queue.Full.
+            Default is True
+            timeout: (float) (optional) seconds to wait for room before raising queue.Full. Default is None, forever
+
+        Returns: Job
+
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(
+                    "Cannot submit a job to a scheduler that is shut down."
+                )
+            if len(self._pending) >= self.max_pending:
+                if not block:
+                    raise queue.Full("{} jobs are queued.".format(len(self._pending)))
+                room = self._condition.wait_for(
+                    lambda: len(self._pending) < self.max_pending or self._closed,
+                    timeout,
+                )
+                if not room:
+                    raise queue.Full("{} jobs are queued.".format(len(self._pending)))
+                if self._closed:
+                    raise RuntimeError(
+                        "Cannot submit a job to a scheduler that is shut down."
+                    )
+
+            self._count = self._count + 1
+            job = Job(
+                self._count,
+                func,
+                args,
+                kwargs or {},
+                priority,
+                self.memory_limit if memory_limit is None else memory_limit,
+                name or getattr(func, "__name__", repr(func)),
+            )
+            heapq.heappush(self._pending, (priority, job.id, job))
+            self._condition.notify_all()
+        return job
+
+    @property
+    def pending(self):
+        """ Number of queued jobs """
+
+        with self._condition:
+            return len(self._pending)
+
+    def _next_job(self, max_priority=None):
+        """
+        Pop the next queued job that was not cancelled
+
+        Args:
+            max_priority: (int) (optional) only pop jobs with this priority or lower. Default is None, any
+
+        Returns: Job or None
+
+        """
+        with self._condition:
+            while self._pending:
+                if max_priority is not None and self._pending[0][0] > max_priority:
+                    return None
+                job = heapq.heappop(self._pending)[2]
+                self._condition.notify_all()
+                if job.future.set_running_or_notify_cancel():
+                    return job
+        return None
+
+    def _finish(self, worker, ok, value, pages, status):
+        """
+        Record a finished job and resolve its future
+
+        Returns: None
+
+        """
+        job = worker["job"]
+        worker["job"] = None
+        job.finished = time.time()
+        job.pages = pages
+
+        self.history.append(
+            {
+                "id": job.id,
+                "name": job.name,
+                "priority": job.priority,
+                "queue_seconds": job.queue_seconds,
+                "run_seconds": job.run_seconds,
+                "pages": pages,
+                "pid": job.pid,
+                "status": status,
+            }
+        )
+        if self.metrics is not None:
+            self.metrics.observe("job_queue_seconds", job.queue_seconds)
+            self.metrics.observe("job_run_seconds", job.run_seconds)
+            self.metrics.inc("jobs_finished", status=status)
+
+        if ok:
+            job.future.set_result(value)
+        else:
+            job.future.set_exception(value)
+
+    def _dispatch(self):
+        """
+        Dispatcher thread. Hands queued jobs to idle workers, collects results and replaces workers that
+        recycled or died
+
+        Returns: None
+
+        """
+        while True:
+            for i, worker in enumerate(self._workers):
+                if worker["job"] is None and worker["process"].is_alive():
+                    job = self._next_job(0 if i < self.reserved_workers else None)
+                    if job is None:
+                        continue
+                    job.started = time.time()
+                    job.pid = worker["process"].pid
+                    worker["job"] = job
+                    try:
+                        worker["conn"].send(
+                            (job.id, job.func, job.args, job.kwargs, job.memory_limit)
+                        )
+                    except Exception as e:
+                        # the job could not be pickled
+                        self._finish(worker, False, e, 0, "error")
+
+            busy = [w for w in self._workers if w["job"] is not None]
+            with self._condition:
+                if self._closed and not self._pending and not busy:
+                    return
+
+            ready = wait(
+                [w["conn"] for w in self._workers]
+                + [w["process"].sentinel for w in self._workers],
+                timeout=POLL,
+            )
+            for i, worker in enumerate(self._workers):
+                replace = False
+                if worker["conn"] in ready:
+                    try:
+                        job_id, ok, value, pages, recycle = worker["conn"].recv()
+                    except (EOFError, OSError):
+                        replace = True
+                    else:
+                        if isinstance(value, MemoryError):
+                            status = "memory"
+                        else:
+                            status = "ok" if ok else "error"
+                        self._finish(worker, ok, value, pages, status)
+                        replace = recycle
+                elif worker["process"].sentinel in ready:
+                    replace = True
+
+                if replace:
+                    if worker["job"] is not None:
+                        self._finish(
+                            worker,
+                            False,
+                            WorkerLostError(
+                                "Worker {} exited with code {} while running a job.".format(
+                                    worker["process"].pid, worker["process"].exitcode
+                                )
+                            ),
+                            None,
+                            "lost",
+                        )
+                    worker["process"].join()
+                    worker["conn"].close()
+                    self._workers[i] = self._start_worker()
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """
+        Stop accepting jobs and stop the workers once the queued jobs have finished
+
+        Args:
+            wait: (boolean) (optional) wait for the jobs and workers. Default is True
+            cancel_pending: (boolean) (optional) cancel the jobs that have not started. Default is False
+
+        Returns: None
+
+        """
+        with self._condition:
+            self._closed = True
+            if cancel_pending:
+                for priority, job_id, job in self._pending:
+                    job.future.cancel()
+                self._pending = []
+            self._condition.notify_all()
+
+        if not wait:
+            return
+        self._dispatcher.join()
+        for worker in self._workers:
+            try:
+                worker["conn"].send(None)
+            except (OSError, ValueError):
+                pass
+            worker["process"].join()
+            worker["conn"].close()
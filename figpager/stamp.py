@@ -0,0 +1,291 @@
+"""
+Module file that contains deferred page stamping used by FigPager. Layout text with a {pages} placeholder is not
+drawn with the page. Only its position and font are kept and at close() the text is rendered on its own as a light
+transparent overlay that is drawn over the saved PDF pages or composited onto the saved raster pages.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to hold in memory overlays
+import io
+import os
+
+# used to render every distinct stamp of a PDF into one file
+from matplotlib.backends.backend_pdf import PdfPages
+# used to draw overlays outside of pyplot's figure manager
+from matplotlib.figure import Figure
+# used to composite overlays onto raster pages
+from PIL import Image, PngImagePlugin
+
+# raster file types that are stamped. They are encoded again without loss. jpeg and webp pages would lose quality
+STAMPED_RASTER_TYPES = ["png", "tif", "tiff"]
+
+
+def import_pypdf():
+    """
+    Import the optional pypdf dependency used to merge PDF pages
+
+    Returns: pypdf module
+
+    """
+
+    try:
+        import pypdf
+    except ImportError:
+        raise ImportError(
+            "Merging overlays onto PDF pages requires pypdf. Install it with pip install pypdf"
+        )
+    return pypdf
+
+
+def fill_page_numbers(txt, page, pages=None):
+    """
+    Replace the {page} and {pages} placeholders of a text. Other braces are left alone
+    Args:
+        txt: text with placeholders
+        page: (int) page number
+        pages: (int) (optional) number of pages. Default is None, {pages} is kept
+
+    Returns: text
+
+    """
+
+    txt = txt.replace("{page}", str(page))
+    if pages is not None:
+        txt = txt.replace("{pages}", str(pages))
+    return txt
+
+
+def stamp_figure(stamp, page, pages):
+    """
+    Draw the deferred texts of a page on a transparent figure of the page size
+    Args:
+        stamp: dict with the page size in inches and a list of (x, y, text, text keywords) in figure coordinates
+        page: (int) page number
+        pages: (int) number of pages
+
+    Returns: figure
+
+    """
+
+    fig = Figure(figsize=stamp["size"])
+    fig.patch.set_visible(False)
+    for x, y, txt, kwargs in stamp["texts"]:
+        fig.text(x, y, fill_page_numbers(txt, page, pages), **kwargs)
+    return fig
+
+
+def add_stream(writer, page, stream):
+    """
+    Add a new stream object to a PDF writer
+    Args:
+        writer: pypdf PdfWriter
+        page: a page of the writer
+        stream: pypdf stream object
+
+    Returns: indirect reference of the stream
+
+    """
+
+    if hasattr(writer, "add_object"):
+        return writer.add_object(stream)
+
+    # pypdf without a public add_object adds new streams to the writer as page contents. The page gets its own
+    # contents back
+    generic = import_pypdf().generic
+    contents = page.raw_get("/Contents") if "/Contents" in page else None
+    if contents is not None:
+        del page["/Contents"]
+    page.replace_contents(stream)
+    reference = page.raw_get("/Contents")
+    if contents is None:
+        del page["/Contents"]
+    else:
+        page[generic.NameObject("/Contents")] = contents
+    return reference
+
+
+def form_xobject(writer, page, source):
+    """
+    Copy a page into a PDF writer as a form XObject so it can be drawn on other pages. The content stream is
+    copied as it is, without parsing it
+    Args:
+        writer: pypdf PdfWriter
+        page: a page of the writer
+        source: pypdf page to copy
+
+    Returns: indirect reference of the form
+
+    """
+
+    generic = import_pypdf().generic
+
+    contents = source.get("/Contents")
+    contents = contents.get_object() if contents is not None else None
+    if isinstance(contents, generic.StreamObject):
+        # keeps the stream compressed
+        form = contents.clone(writer, force_duplicate=True)
+    else:
+        form = generic.DecodedStreamObject()
+        if contents is not None:
+            form.set_data(b"\n".join(c.get_object().get_data() for c in contents))
+    box = source.mediabox
+    form.update(
+        {
+            generic.NameObject("/Type"): generic.NameObject("/XObject"),
+            generic.NameObject("/Subtype"): generic.NameObject("/Form"),
+            generic.NameObject("/BBox"): generic.ArrayObject(
+                [
+                    generic.FloatObject(v)
+                    for v in [box.left, box.bottom, box.right, box.top]
+                ]
+            ),
+            generic.NameObject("/Resources"): source.get(
+                "/Resources", generic.DictionaryObject()
+            ).clone(writer),
+        }
+    )
+    if form.indirect_reference is not None:
+        return form.indirect_reference
+    return add_stream(writer, page, form)
+
+
+def stamp_pdf(path, stamps, pages):
+    """
+    Draw the deferred texts onto the pages of a saved PDF. Each distinct stamp is rendered once, all of them into
+    one PDF so their fonts are embedded once, and is drawn as a shared form XObject after the page content. The
+    changes are appended to the file as an incremental update, page content is not parsed or rewritten
+    Args:
+        path: PDF file path
+        stamps: dict of page number to stamp dicts
+        pages: (int) number of pages
+
+    Returns: None
+
+    """
+
+    pypdf = import_pypdf()
+    generic = pypdf.generic
+
+    # pages with the same texts share a stamp
+    distinct = {}
+    first = []
+    index = {}
+    for number in sorted(stamps):
+        stamp = stamps[number]
+        key = repr(
+            (
+                stamp["size"],
+                [
+                    (
+                        x,
+                        y,
+                        fill_page_numbers(txt, number, pages),
+                        sorted(kwargs.items()),
+                    )
+                    for x, y, txt, kwargs in stamp["texts"]
+                ],
+            )
+        )
+        if key not in distinct:
+            distinct[key] = len(first)
+            first.append(number)
+        index[number] = distinct[key]
+
+    buf = io.BytesIO()
+    with PdfPages(buf) as pdf:
+        for number in first:
+            pdf.savefig(stamp_figure(stamps[number], number, pages))
+    rendered = pypdf.PdfReader(buf).pages
+
+    writer = pypdf.PdfWriter(path, incremental=True)
+    forms = [None] * len(first)
+    # the page content is wrapped in q and Q so graphics state it leaves behind does not move the stamp
+    wrappers = {}
+    for number, page in enumerate(writer.pages, 1):
+        if number not in index:
+            continue
+        if forms[index[number]] is None:
+            forms[index[number]] = form_xobject(writer, page, rendered[index[number]])
+
+        resources = page.get("/Resources")
+        resources = generic.DictionaryObject(
+            resources.get_object() if resources is not None else {}
+        )
+        xobjects = generic.DictionaryObject(
+            resources["/XObject"] if "/XObject" in resources else {}
+        )
+        name = "/FpStamp"
+        while name in xobjects:
+            name += "_"
+        xobjects[generic.NameObject(name)] = forms[index[number]]
+        resources[generic.NameObject("/XObject")] = xobjects
+        page[generic.NameObject("/Resources")] = resources
+
+        for wrapper in ["q", "Q q {} Do Q".format(name)]:
+            if wrapper not in wrappers:
+                stream = generic.DecodedStreamObject()
+                stream.set_data(wrapper.encode("ascii"))
+                wrappers[wrapper] = add_stream(writer, page, stream)
+        contents = page.raw_get("/Contents") if "/Contents" in page else None
+        if contents is None:
+            contents = []
+        elif isinstance(contents.get_object(), generic.ArrayObject):
+            contents = list(contents.get_object())
+        else:
+            contents = [contents]
+        page[generic.NameObject("/Contents")] = generic.ArrayObject(
+            [wrappers["q"]] + contents + [wrappers["Q q {} Do Q".format(name)]]
+        )
+
+    # pypdf writes the original bytes followed by the update. Only the update is appended to the file
+    size = os.path.getsize(path)
+    buf = io.BytesIO()
+    writer.write(buf)
+    with open(path, "ab") as f:
+        f.write(buf.getvalue()[size:])
+
+
+def stamp_raster(path, stamp, page, pages):
+    """
+    Composite the deferred texts onto a saved png or tiff page. The page is saved again with its dpi, text
+    metadata and compression
+    Args:
+        path: raster file path
+        stamp: stamp dict of the page
+        page: (int) page number
+        pages: (int) number of pages
+
+    Returns: None
+
+    """
+
+    img = Image.open(path)
+    img.load()
+    fmt = img.format
+    if fmt not in ["PNG", "TIFF"]:
+        raise ValueError("Only png and tiff pages are stamped, not {}.".format(fmt))
+    info = {
+        k: img.info[k] for k in ["dpi", "compression", "icc_profile"] if k in img.info
+    }
+    if fmt == "PNG" and img.text:
+        info["pnginfo"] = PngImagePlugin.PngInfo()
+        for key, value in img.text.items():
+            info["pnginfo"].add_text(key, value)
+
+    dpi = img.size[0] / float(stamp["size"][0])
+    buf = io.BytesIO()
+    stamp_figure(stamp, page, pages).savefig(
+        buf, format="png", dpi=dpi, transparent=True
+    )
+    buf.seek(0)
+    overlay = Image.open(buf).convert("RGBA")
+    if overlay.size != img.size:
+        overlay = overlay.resize(img.size, Image.LANCZOS)
+
+    out = img.convert("RGBA")
+    out.alpha_composite(overlay)
+    if img.mode != "RGBA":
+        out = out.convert(img.mode)
+    out.save(path, format=fmt, **info)
@@ -0,0 +1,211 @@
+"""
+Module file that contains streaming reductions used by the FigPager plotting helpers. Inputs are numpy arrays,
+np.memmap arrays larger than memory or iterators of array chunks. Each reduction makes a single vectorized pass
+in bounded memory and returns only the aggregate that is drawn.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to drop memory mapped pages that have already been reduced
+import mmap
+
+import numpy as np
+
+# default number of samples reduced at a time. 4M float64 samples is 32 MB
+CHUNKSIZE = 2 ** 22
+
+
+def _release(data, start, stop):
+    """
+    Drop the resident pages of rows of a read only or shared np.memmap once they are reduced, so a full pass over
+    it does not grow RSS. Only the pages of those rows are dropped, which keeps the readahead of the next rows.
+    Copy on write maps are left alone because dropping their pages would discard changes.
+    Args:
+        data: input array
+        start: (int) first row
+        stop: (int) row after the last row
+
+    Returns: None
+
+    """
+
+    mapped = getattr(data, "_mmap", None)
+    if mapped is None or getattr(data, "mode", "c") == "c":
+        return
+    if not hasattr(mapped, "madvise") or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    rows = data[start:stop]
+    root = data
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    if not rows.size or not rows.flags.c_contiguous or not hasattr(root, "offset"):
+        return
+
+    # byte span of the rows in the map. np.memmap maps the file from the allocation granularity below its offset
+    begin = (
+        rows.ctypes.data - root.ctypes.data + root.offset % mmap.ALLOCATIONGRANULARITY
+    )
+    end = begin + rows.nbytes
+    # a page shared with the rows before is dropped and a page shared with the next rows is kept
+    begin = begin - begin % mmap.PAGESIZE
+    end = end - end % mmap.PAGESIZE
+    if end > begin:
+        mapped.madvise(mmap.MADV_DONTNEED, begin, end - begin)
+
+
+def iter_chunks(data, chunksize=CHUNKSIZE):
+    """
+    Yield array chunks from an array, np.memmap or an iterator of chunks
+    Args:
+        data: numpy array, np.memmap or iterable of array chunks
+        chunksize: (int) (optional) number of rows per chunk for array inputs
+
+    Returns: generator of numpy arrays
+
+    """
+
+    if isinstance(data, np.ndarray):
+        for start in range(0, len(data), chunksize):
+            yield np.asarray(data[start : start + chunksize])
+            _release(data, start, start + chunksize)
+    else:
+        for chunk in data:
+            yield np.asarray(chunk)
+
+
+def _iter_pairs(x, y, chunksize):
+    """
+    Yield x, y chunk pairs from two arrays or from an iterator of (x, y) chunks
+    """
+
+    if y is None:
+        for chunk in iter_chunks(x, chunksize):
+            yield chunk[0], chunk[1]
+    else:
+        for xc, yc in zip(iter_chunks(x, chunksize), iter_chunks(y, chunksize)):
+            yield xc, yc
+
+
+def streaming_range(data, chunksize=CHUNKSIZE):
+    """
+    Finite minimum and maximum of the data in one pass
+    Args:
+        data: numpy array, np.memmap or iterable of array chunks
+        chunksize: (int) (optional) number of samples per chunk for array inputs
+
+    Returns: (min, max)
+
+    """
+
+    lo = np.inf
+    hi = -np.inf
+    for chunk in iter_chunks(data, chunksize):
+        chunk = chunk[np.isfinite(chunk)]
+        if chunk.size:
+            lo = min(lo, chunk.min())
+            hi = max(hi, chunk.max())
+    if lo > hi:
+        raise ValueError("No finite values in data.")
+    return lo, hi
+
+
+def streaming_histogram(data, bins=10, range=None, chunksize=CHUNKSIZE):
+    """
+    Histogram of the data in bounded memory
+    Args:
+        data: numpy array, np.memmap or iterable of array chunks
+        bins: (int or sequence) (optional) number of bins or bin edges. Default is 10
+        range: (tuple) (optional) lower and upper range of the bins. Required for chunk iterators when bins
+        is an int. An extra pass finds it for arrays
+        chunksize: (int) (optional) number of samples per chunk for array inputs
+
+    Returns: counts, bin edges
+
+    """
+
+    if np.ndim(bins) == 0 and range is None:
+        if not isinstance(data, np.ndarray):
+            raise ValueError("range is required to histogram a chunk iterator.")
+        range = streaming_range(data, chunksize)
+
+    edges = np.histogram_bin_edges([], bins=bins, range=range)
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for chunk in iter_chunks(data, chunksize):
+        counts += np.histogram(chunk, bins=edges)[0]
+    return counts, edges
+
+
+def streaming_histogram2d(x, y=None, bins=10, range=None, chunksize=CHUNKSIZE):
+    """
+    2-D histogram (density) of paired samples in bounded memory
+    Args:
+        x: numpy array or np.memmap of x values, or an iterable of (x, y) chunks when y is None
+        y: (optional) numpy array or np.memmap of y values
+        bins: (int or [int, int] or [array, array]) (optional) bins as accepted by np.histogram2d
+        range: ([[xmin, xmax], [ymin, ymax]]) (optional) bin range. Required for chunk iterators when
+        bins are counts. An extra pass finds it for arrays
+        chunksize: (int) (optional) number of samples per chunk for array inputs
+
+    Returns: counts, x edges, y edges
+
+    """
+
+    if np.ndim(bins) == 0:
+        bins = [bins, bins]
+
+    if range is None and any(np.ndim(b) == 0 for b in bins):
+        if y is None:
+            raise ValueError("range is required to histogram a chunk iterator.")
+        range = [streaming_range(x, chunksize), streaming_range(y, chunksize)]
+    elif range is None:
+        range = [None, None]
+
+    xedges = np.histogram_bin_edges([], bins=bins[0], range=range[0])
+    yedges = np.histogram_bin_edges([], bins=bins[1], range=range[1])
+    counts = np.zeros((len(xedges) - 1, len(yedges) - 1), dtype=np.int64)
+    for xc, yc in _iter_pairs(x, y, chunksize):
+        counts += np.histogram2d(xc, yc, bins=[xedges, yedges])[0].astype(np.int64)
+    return counts, xedges, yedges
+
+
+def streaming_envelope(data, bins, length=None, chunksize=CHUNKSIZE):
+    """
+    Minimum and maximum of consecutive equal sized sample blocks in bounded memory
+    Args:
+        data: numpy array, np.memmap or iterable of array chunks
+        bins: (int) number of blocks, usually the pixel width of the axes
+        length: (int) (optional) total number of samples. Required for chunk iterators
+        chunksize: (int) (optional) number of samples per chunk for array inputs
+
+    Returns: block centre sample index, block minimum, block maximum
+
+    """
+
+    if length is None:
+        if not isinstance(data, np.ndarray):
+            raise ValueError("length is required for the envelope of a chunk iterator.")
+        length = len(data)
+
+    bins = int(max(1, min(bins, length)))
+    size = int(np.ceil(float(length) / bins))
+    bins = int(np.ceil(float(length) / size))
+
+    lo = np.full(bins, np.nan)
+    hi = np.full(bins, np.nan)
+    offset = 0
+    for chunk in iter_chunks(data, chunksize):
+        if not chunk.size:
+            continue
+        if offset + len(chunk) > length:
+            raise ValueError("The data has more than length={} samples.".format(length))
+        # chunk local start of each block touched by this chunk
+        first = offset // size
+        starts = np.r_[0, np.arange((first + 1) * size - offset, len(chunk), size)]
+        ids = first + np.arange(len(starts))
+        lo[ids] = np.fmin(lo[ids], np.fmin.reduceat(chunk, starts))
+        hi[ids] = np.fmax(hi[ids], np.fmax.reduceat(chunk, starts))
+        offset = offset + len(chunk)
+
+    centres = np.arange(bins) * size + (size - 1) / 2.0
+    return centres, lo, hi
@@ -0,0 +1,239 @@
+"""
+Module file that contains a text cache used by FigPager. Page furniture such as titles, the source path and
+watermarks repeats on every page, but matplotlib measures the text again for every new figure because its metric
+cache is kept per renderer, and Agg rasterizes every glyph again. CachedText is a Text subclass that keeps the
+measured layout across figures for identical string, font, size, rotation, alignment and dpi, and on Agg keeps
+the rendered glyph bitmaps of text drawn at the same canvas position so later pages replay them. Both rely on
+private matplotlib internals, so FigPager only uses CachedText when hooks_available() finds them.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to read the matplotlib version
+import re
+# used to guard the caches when pagers run in several threads
+import threading
+
+import matplotlib
+import numpy as np
+# used to resolve the font file of the text
+from matplotlib import font_manager
+# used to only cache glyphs of the Agg renderer
+from matplotlib.backends.backend_agg import RendererAgg
+# used as the base class of the cached text
+from matplotlib.text import Text
+
+# measured layouts and glyph bitmaps keyed by the text properties they depend on
+_layout_cache = {}
+_glyph_cache = {}
+# number of layouts and glyph runs kept in memory
+LAYOUT_CACHE_SIZE = 2048
+GLYPH_CACHE_SIZE = 1024
+_lock = threading.Lock()
+# cache statistics
+stats = {"hits": 0, "misses": 0, "glyph_hits": 0, "glyph_misses": 0}
+# first and last matplotlib releases, as (major, minor), the private hooks were tested with
+MATPLOTLIB_VERSIONS = ((3, 3), (3, 11))
+# result of hooks_available, checked once per process
+_hooks = None
+
+
+def hooks_available():
+    """
+    Check that this matplotlib is a tested release and has the private hooks the cache overrides: Text._get_layout
+    and draw_text_image of the C++ renderer kept in RendererAgg._renderer
+
+    Returns: (boolean) True if CachedText can be used
+
+    """
+
+    global _hooks
+    if _hooks is None:
+        version = tuple(int(v) for v in re.findall(r"\d+", matplotlib.__version__)[:2])
+        renderer = RendererAgg(1, 1, 72)
+        _hooks = (
+            MATPLOTLIB_VERSIONS[0] <= version <= MATPLOTLIB_VERSIONS[1]
+            and callable(getattr(Text, "_get_layout", None))
+            and callable(
+                getattr(getattr(renderer, "_renderer", None), "draw_text_image", None)
+            )
+        )
+    return _hooks
+
+
+def clear():
+    """
+    Empty the text caches and reset their statistics
+
+    Returns: None
+
+    """
+
+    _layout_cache.clear()
+    _glyph_cache.clear()
+    for k in stats:
+        stats[k] = 0
+
+
+def _put(cache, size, key, value):
+    """ Add a value to a cache, dropping the oldest entry when it is full """
+
+    with _lock:
+        if len(cache) >= size:
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+
+
+def _font_key(prop):
+    """ Font file and properties of a FontProperties. The file follows rcParams font family changes """
+
+    return font_manager.findfont(prop), hash(prop)
+
+
+class _GlyphRecorder:
+
+    """ Stand in for the Agg C++ renderer that records the glyph bitmaps drawn by RendererAgg.draw_text """
+
+    def __init__(self, renderer):
+        self._target = renderer
+        self.glyphs = []
+        # False if draw_text used anything but glyph bitmaps, i.e. boxes
+        self.complete = True
+
+    def draw_text_image(self, image, x, y, angle, gc):
+        self.glyphs.append((np.array(image, copy=True), x, y, angle))
+        self._target.draw_text_image(image, x, y, angle, gc)
+
+    def __getattr__(self, name):
+        self.complete = False
+        return getattr(self._target, name)
+
+
+class _GlyphCacheRenderer:
+
+    """ Agg renderer proxy that replays the glyph bitmaps of text drawn before at the same canvas position """
+
+    def __init__(self, base):
+        self.base = base
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+    def draw_text(self, gc, x, y, s, prop, angle, ismath=False, mtext=None):
+        base = self.base
+        if ismath:
+            return base.draw_text(gc, x, y, s, prop, angle, ismath=ismath, mtext=mtext)
+
+        key = (
+            s,
+            _font_key(prop),
+            angle,
+            x,
+            y,
+            base.width,
+            base.height,
+            base.dpi,
+            gc.get_antialiased(),
+            matplotlib.rcParams["text.hinting"],
+            matplotlib.rcParams["text.hinting_factor"],
+        )
+        for getter in ["get_fontfeatures", "get_language"]:
+            if mtext is not None and hasattr(mtext, getter):
+                key = key + (repr(getattr(mtext, getter)()),)
+
+        glyphs = _glyph_cache.get(key)
+        if glyphs is not None:
+            stats["glyph_hits"] = stats["glyph_hits"] + 1
+            for image, gx, gy, gangle in glyphs:
+                base._renderer.draw_text_image(image, gx, gy, gangle, gc)
+            return
+
+        stats["glyph_misses"] = stats["glyph_misses"] + 1
+        recorder = _GlyphRecorder(base._renderer)
+        base._renderer = recorder
+        try:
+            base.draw_text(gc, x, y, s, prop, angle, ismath=ismath, mtext=mtext)
+        finally:
+            base._renderer = recorder._target
+        if recorder.complete:
+            _put(_glyph_cache, GLYPH_CACHE_SIZE, key, recorder.glyphs)
+
+
+class CachedText(Text):
+
+    """ Text that reuses its measured layout and Agg glyph bitmaps across figures """
+
+    def _layout_key(self, renderer):
+        """
+        Properties the text layout depends on. None if the layout can not be shared
+
+        Args:
+            renderer: renderer the text is measured with
+
+        Returns: tuple or None
+
+        """
+        # wrapped text depends on the position in the figure
+        if self.get_wrap() or self.figure is None:
+            return None
+        return (
+            self.get_text(),
+            _font_key(self._fontproperties),
+            self.get_rotation(),
+            self.get_rotation_mode(),
+            self.get_horizontalalignment(),
+            self.get_verticalalignment(),
+            self._multialignment,
+            self._linespacing,
+            self.get_usetex(),
+            self.figure.dpi,
+            type(renderer),
+            matplotlib.rcParams["text.hinting"],
+            matplotlib.rcParams["text.hinting_factor"],
+        )
+
+    def _get_layout(self, renderer):
+        """
+        Text._get_layout with a cache shared by all figures. The layout is relative to the text position so it is
+        the same wherever the text is placed
+
+        Args:
+            renderer: renderer the text is measured with
+
+        Returns: rotated bbox, line layout, text box
+
+        """
+        if isinstance(renderer, _GlyphCacheRenderer):
+            renderer = renderer.base
+
+        key = self._layout_key(renderer)
+        if key is None:
+            return super(CachedText, self)._get_layout(renderer)
+
+        layout = _layout_cache.get(key)
+        if layout is not None:
+            stats["hits"] = stats["hits"] + 1
+            return layout
+
+        stats["misses"] = stats["misses"] + 1
+        layout = super(CachedText, self)._get_layout(renderer)
+        _put(_layout_cache, LAYOUT_CACHE_SIZE, key, layout)
+        return layout
+
+    def draw(self, renderer):
+        """
+        Text.draw that replays cached glyph bitmaps on the Agg renderer
+
+        Args:
+            renderer: renderer to draw with
+
+        Returns: None
+
+        """
+        if type(renderer) is not RendererAgg or self.get_path_effects():
+            return super(CachedText, self).draw(renderer)
+
+        super(CachedText, self).draw(_GlyphCacheRenderer(renderer))
+        # keep the real renderer for get_window_extent
+        self._renderer = renderer
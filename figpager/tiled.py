@@ -0,0 +1,347 @@
+"""
+Module file that contains tiled raster output used by FigPager for large pages at high dpi. The figure is rendered
+in horizontal bands of a fixed number of pixel rows and each band is compressed into the PNG or TIFF file before
+the next one is drawn, so memory use depends on the page width and band height, not on the page height. A0 at
+300 dpi is about 9900 by 14000 pixels, or 560 MB as a single RGBA buffer.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to render bands in memory
+import io
+# used to pack PNG and TIFF structures
+import struct
+# used to compress bands as they are rendered
+import zlib
+# used to restore image clipping after the bands are rendered
+from contextlib import contextmanager
+
+import matplotlib
+import numpy as np
+from matplotlib.image import AxesImage
+from matplotlib.transforms import Bbox
+
+# raster file types that are written in bands
+TILED_TYPES = ["png", "tif", "tiff"]
+# pixel rows per band
+BAND_ROWS = 512
+# zlib compression level. matplotlib writes PNG files with level 6 as well
+COMPRESS_LEVEL = 6
+
+
+def page_pixels(fig, dpi):
+    """
+    Pixel size of a figure rendered at a dpi, as Agg sizes its canvas
+
+    Returns: width and height in pixels
+
+    """
+
+    width, height = fig.get_size_inches()
+    return int(width * dpi), int(height * dpi)
+
+
+def _band_clip_box(image):
+    """
+    Clip box of an axes image limited to the canvas. matplotlib resamples an axes image for the whole of its clip
+    box, the axes by default, even where it is outside of the canvas
+    """
+
+    fig = image.get_figure()
+    box = image.clipbox or image.axes.bbox
+    clipped = Bbox.intersection(box, fig.bbox)
+    if clipped is None:
+        # an empty box skips the image
+        return Bbox.from_bounds(0, 0, 0, 0)
+    return clipped
+
+
+@contextmanager
+def _clip_images_to_canvas(fig):
+    """
+    Resample the axes images of a figure only where they are on the canvas while rendering bands
+    """
+
+    images = [image for image in fig.findobj(AxesImage) if image.get_clip_on()]
+    for image in images:
+        image.get_clip_box = lambda image=image: _band_clip_box(image)
+    try:
+        yield
+    finally:
+        for image in images:
+            del image.get_clip_box
+
+
+def render_bands(fig, dpi, rows=BAND_ROWS, **kwargs):
+    """
+    Render a figure in horizontal bands from the top of the page. Each band is cropped from the page with
+    bbox_inches, so only the band is rasterized
+
+    Args:
+        fig: figure instance
+        dpi: (int) render dpi
+        rows: (int) (optional) pixel rows per band. Default is BAND_ROWS
+        **kwargs: (optional) savefig keywords such as facecolor and transparent
+
+    Returns: generator of RGBA uint8 arrays of shape (band rows, width, 4)
+
+    """
+    width_in = fig.get_size_inches()[0]
+    width, height = page_pixels(fig, dpi)
+    with _clip_images_to_canvas(fig):
+        for band in _bands(fig, dpi, rows, width_in, width, height, kwargs):
+            yield band
+
+
+def _bands(fig, dpi, rows, width_in, width, height, kwargs):
+    """
+    Render the bands of render_bands
+    """
+
+    for top in range(0, height, rows):
+        n = min(rows, height - top)
+        # the canvas is n rows high and shows the page from bottom upwards. The extra half row keeps the
+        # truncated canvas height at n rows whatever the rounding of the inch extents
+        bottom = (height - top - n) / float(dpi)
+        box = Bbox.from_extents(0, bottom, width_in, bottom + (n + 0.5) / float(dpi))
+
+        buf = io.BytesIO()
+        fig.savefig(
+            buf, format="rgba", dpi=dpi, bbox_inches=box, pad_inches=0, **kwargs
+        )
+        band = np.frombuffer(buf.getvalue(), dtype=np.uint8)
+        if band.size != n * width * 4:
+            raise RuntimeError(
+                "Band of {} rows rendered to {} bytes instead of {}.".format(
+                    n, band.size, n * width * 4
+                )
+            )
+        yield band.reshape(n, width, 4)
+
+
+def _png_chunk(f, kind, data):
+    """
+    Write a PNG chunk
+    """
+
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind + data)
+    f.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def png_text(metadata=None):
+    """
+    PNG text entries as matplotlib's savefig writes them: a Software entry followed by the given metadata. Entries
+    set to None are left out
+
+    Args:
+        metadata: (dict) (optional) key/value pairs
+
+    Returns: dict of text entries
+
+    """
+    if metadata is None:
+        metadata = {}
+    text = dict(
+        {
+            "Software": "Matplotlib version{}, https://matplotlib.org/".format(
+                matplotlib.__version__
+            )
+        },
+        **metadata
+    )
+    return {key: value for key, value in text.items() if value is not None}
+
+
+def write_png(path, bands, width, height, dpi, metadata=None):
+    """
+    Write RGBA bands to a PNG file as they arrive. Rows use the PNG up filter
+
+    Args:
+        path: output file path
+        bands: iterable of RGBA uint8 arrays of shape (rows, width, 4) from the top of the image
+        width: (int) image width in pixels
+        height: (int) image height in pixels
+        dpi: (int) dpi stored in the file
+        metadata: (dict) (optional) tEXt key/value pairs. Default is the matplotlib Software entry
+
+    Returns: None
+
+    """
+    metadata = png_text(metadata)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        _png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        for key, value in metadata.items():
+            _png_chunk(
+                f,
+                b"tEXt",
+                key.encode("latin-1") + b"\0" + str(value).encode("latin-1"),
+            )
+        # pixels per meter
+        ppm = int(round(dpi / 0.0254))
+        _png_chunk(f, b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+
+        compressor = zlib.compressobj(COMPRESS_LEVEL)
+        previous = np.zeros(width * 4, dtype=np.uint8)
+        written = 0
+        for band in bands:
+            rows = band.reshape(len(band), width * 4)
+            # each row minus the row above wraps around modulo 256
+            filtered = np.empty((len(rows), width * 4 + 1), dtype=np.uint8)
+            filtered[:, 0] = 2
+            filtered[0, 1:] = rows[0] - previous
+            filtered[1:, 1:] = rows[1:] - rows[:-1]
+            previous = rows[-1].copy()
+            written = written + len(rows)
+
+            data = compressor.compress(filtered.tobytes())
+            if data:
+                _png_chunk(f, b"IDAT", data)
+        if written != height:
+            raise ValueError(
+                "{} rows written for an image of {} rows.".format(written, height)
+            )
+        _png_chunk(f, b"IDAT", compressor.flush())
+        _png_chunk(f, b"IEND", b"")
+
+
+# TIFF field types and the struct format of their values. A rational is two longs
+_SHORT = 3
+_LONG = 4
+_RATIONAL = 5
+_TIFF_FORMATS = {_SHORT: "H", _LONG: "I", _RATIONAL: "I"}
+
+
+def _write_ifd(f, entries):
+    """
+    Write a little endian TIFF image file directory at the end of the file. Values that do not fit in an entry
+    follow the directory
+
+    Args:
+        f: file open for writing
+        entries: list of (tag, field type, list of values) sorted by tag. Rationals are (numerator, denominator)
+
+    Returns: directory offset
+
+    """
+    offset = f.tell()
+    # directories start on a word boundary
+    if offset % 2:
+        f.write(b"\0")
+        offset = offset + 1
+
+    extra = offset + 2 + 12 * len(entries) + 4
+    head = [struct.pack("<H", len(entries))]
+    tail = []
+    for tag, kind, values in entries:
+        flat = [
+            v for value in values for v in (value if kind == _RATIONAL else [value])
+        ]
+        data = struct.pack("<" + _TIFF_FORMATS[kind] * len(flat), *flat)
+        if len(data) <= 4:
+            value = data.ljust(4, b"\0")
+        else:
+            value = struct.pack("<I", extra)
+            tail.append(data)
+            extra = extra + len(data)
+        head.append(struct.pack("<HHI", tag, kind, len(values)) + value)
+    head.append(struct.pack("<I", 0))
+    f.write(b"".join(head + tail))
+    return offset
+
+
+def write_tiff(path, bands, width, height, dpi, rows=BAND_ROWS):
+    """
+    Write RGBA bands to a deflate compressed TIFF file as they arrive. Each band is one strip
+
+    Args:
+        path: output file path
+        bands: iterable of RGBA uint8 arrays of shape (rows, width, 4) from the top of the image. Every band but
+        the last has the given number of rows
+        width: (int) image width in pixels
+        height: (int) image height in pixels
+        dpi: (int) dpi stored in the file
+        rows: (int) (optional) rows per band. Default is BAND_ROWS
+
+    Returns: None
+
+    """
+    offsets = []
+    counts = []
+    with open(path, "wb") as f:
+        # the directory offset is filled in once the strips are written
+        f.write(b"II*\0\0\0\0\0")
+        written = 0
+        for band in bands:
+            # horizontal differencing predictor, per sample and modulo 256
+            predicted = band.copy()
+            predicted[:, 1:] = band[:, 1:] - band[:, :-1]
+            data = zlib.compress(predicted.tobytes(), COMPRESS_LEVEL)
+            offsets.append(f.tell())
+            counts.append(len(data))
+            f.write(data)
+            written = written + len(band)
+        if written != height:
+            raise ValueError(
+                "{} rows written for an image of {} rows.".format(written, height)
+            )
+        if f.tell() >= 2 ** 32:
+            raise ValueError("Tiled TIFF pages are limited to 4 GB.")
+
+        entries = [
+            (256, _LONG, [width]),
+            (257, _LONG, [height]),
+            (258, _SHORT, [8, 8, 8, 8]),
+            # Adobe deflate
+            (259, _SHORT, [8]),
+            # RGB
+            (262, _SHORT, [2]),
+            (273, _LONG, offsets),
+            (277, _SHORT, [4]),
+            (278, _LONG, [rows]),
+            (279, _LONG, counts),
+            (282, _RATIONAL, [(int(round(dpi)), 1)]),
+            (283, _RATIONAL, [(int(round(dpi)), 1)]),
+            (284, _SHORT, [1]),
+            # inch
+            (296, _SHORT, [2]),
+            (317, _SHORT, [2]),
+            # unassociated alpha
+            (338, _SHORT, [2]),
+        ]
+        ifd = _write_ifd(f, entries)
+        f.seek(4)
+        f.write(struct.pack("<I", ifd))
+
+
+def save_tiled(fig, path, filetype, dpi, rows=BAND_ROWS, metadata=None, **kwargs):
+    """
+    Render a figure in bands and stream them into a PNG or TIFF file
+
+    Args:
+        fig: figure instance
+        path: output file path
+        filetype: (string) png, tif or tiff
+        dpi: (int) render dpi
+        rows: (int) (optional) pixel rows per band. Default is BAND_ROWS
+        metadata: (dict) (optional) PNG text metadata
+        **kwargs: (optional) savefig keywords such as facecolor and transparent
+
+    Returns: None
+
+    """
+    width, height = page_pixels(fig, dpi)
+    bands = render_bands(fig, dpi, rows, **kwargs)
+    if filetype == "png":
+        write_png(path, bands, width, height, dpi, metadata)
+    elif filetype in ["tif", "tiff"]:
+        write_tiff(path, bands, width, height, dpi, rows)
+    else:
+        raise ValueError(
+            "Tiled output supports {} files, not {}.".format(
+                ", ".join(TILED_TYPES), filetype
+            )
+        )
@@ -0,0 +1,400 @@
+"""
+Module file that contains a DirectoryQueue that hands FigPager page jobs to worker processes on other machines
+through a shared folder. The coordinator writes pickled jobs to the folder, workers started with run_worker() or
+"figpager worker FOLDER" claim a job by renaming it and write the result back. A claimed job whose worker stops
+touching it for the lease time is put back in the queue, so pages of a dead worker are drawn by another one.
+DirectoryQueue is a concurrent.futures.Executor and can be passed to ParallelPager as its executor.
+
+Jobs and results are pickles and unpickling runs code. Anyone who can write to the queue folder can run code on the
+workers and the coordinator. Keep the folder writable by trusted users only, or give the queue and the workers a
+shared key so every job and result is signed with HMAC-SHA256 and files without a valid signature are not unpickled.
+
+Written by Eben Pendleton
+MIT License
+"""
+
+# used to sign jobs and results
+import hashlib
+import hmac
+import os
+# used to move jobs and results between machines
+import pickle
+# used to name workers by host
+import socket
+import threading
+import time
+import traceback
+# used to keep the jobs of several coordinators apart
+import uuid
+from concurrent.futures import Executor, Future
+
+from .scheduler import WorkerLostError
+
+# seconds between folder scans
+POLL = 0.1
+# folder of a queue that holds the lease time for the workers
+LEASE_FILE = "lease"
+
+
+def _sign(key, data):
+    """
+    HMAC-SHA256 signature of data with a str or bytes key
+    """
+
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return hmac.new(key, data, hashlib.sha256).digest()
+
+
+def _write(path, value, key=None):
+    """
+    Pickle a value to a file atomically, so readers on other machines never see a partial file. The pickle is
+    preceded by its signature if a key is given
+    """
+
+    data = pickle.dumps(value)
+    if key is not None:
+        data = _sign(key, data) + data
+    # processes on different machines can share a pid
+    tmp = "{}.{}-{}.tmp".format(path, socket.gethostname(), os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read(path, key=None):
+    """
+    Unpickle a file written by _write. With a key the signature is checked first and a file that is not signed with
+    the key raises ValueError without being unpickled
+    """
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if key is not None:
+        size = hashlib.sha256().digest_size
+        signature, data = data[:size], data[size:]
+        if not hmac.compare_digest(signature, _sign(key, data)):
+            raise ValueError(
+                "{} is not signed with the queue key.".format(os.path.basename(path))
+            )
+    return pickle.loads(data)
+
+
+def _folders(folder):
+    """
+    Job, claimed job and result folders of a queue
+    """
+
+    return [os.path.join(folder, name) for name in ["jobs", "claimed", "results"]]
+
+
+class DirectoryQueue(Executor):
+
+    """ Executor that runs jobs on workers that share a folder """
+
+    def __init__(self, folder, lease=30, max_attempts=3, key=None):
+        """
+
+        Args:
+            folder: (string) queue folder visible to the coordinator and every worker, i.e. on a network share
+            lease: (float) (optional) seconds a claimed job may go without a heartbeat from its worker before it is
+            given to another worker. Workers touch their job every quarter lease. Default is 30
+            max_attempts: (int) (optional) times a job is handed out before it fails with WorkerLostError.
+            Default is 3
+            key: (string or bytes) (optional) secret shared with the workers that signs jobs and results. Results
+            without a valid signature fail their job with ValueError. Default is None, files are not signed and
+            anyone who can write to the folder can run code in this process
+        """
+
+        self.folder = folder
+        self.key = key
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.jobs_folder, self.claimed_folder, self.results_folder = _folders(folder)
+        for path in _folders(folder):
+            if not os.path.isdir(path):
+                os.makedirs(path)
+        with open(os.path.join(folder, LEASE_FILE), "w") as f:
+            f.write(str(lease))
+
+        # jobs handed out again after their worker was lost
+        self.requeued = 0
+
+        self._prefix = uuid.uuid4().hex[:12]
+        self._count = 0
+        # future, attempts and the last heartbeat seen by job id
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._monitor = threading.Thread(
+            target=self._watch, name="figpager-queue", daemon=True
+        )
+        self._monitor.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for a worker. fn and its arguments must be picklable and fn importable on the
+        workers. Jobs are claimed in submission order
+
+        Returns: concurrent.futures.Future
+
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit a job to a queue that is shut down.")
+            self._count = self._count + 1
+            job_id = "{}-{:06}".format(self._prefix, self._count)
+            future = Future()
+            self._jobs[job_id] = {"future": future, "attempts": 1, "heartbeat": None}
+        _write(
+            os.path.join(self.jobs_folder, job_id + ".job"),
+            (fn, args, kwargs),
+            self.key,
+        )
+        return future
+
+    def _collect(self):
+        """
+        Set the futures of finished jobs
+
+        Returns: None
+
+        """
+        for name in os.listdir(self.results_folder):
+            if not name.endswith(".result"):
+                continue
+            path = os.path.join(self.results_folder, name)
+            job_id = name[: -len(".result")]
+            if not job_id.startswith(self._prefix):
+                continue
+            try:
+                ok, value = _read(path, self.key)
+            except ValueError as e:
+                ok, value = False, e
+            os.remove(path)
+
+            with self._lock:
+                job = self._jobs.pop(job_id, None)
+            # a job given to another worker may finish twice
+            if job is None or not job["future"].set_running_or_notify_cancel():
+                continue
+            if ok:
+                job["future"].set_result(value)
+            else:
+                job["future"].set_exception(value)
+
+    def _expire(self):
+        """
+        Put claimed jobs whose worker stopped its heartbeat back in the queue. Heartbeats are timed with this
+        machine's clock, so clock differences between machines do not matter
+
+        Returns: None
+
+        """
+        now = time.time()
+        for name in os.listdir(self.claimed_folder):
+            job_id = name.split(".")[0]
+            path = os.path.join(self.claimed_folder, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if job["heartbeat"] is None or job["heartbeat"][0] != (name, mtime):
+                    job["heartbeat"] = ((name, mtime), now)
+                    continue
+                if now - job["heartbeat"][1] < self.lease:
+                    continue
+
+                job["heartbeat"] = None
+                try:
+                    if job["attempts"] >= self.max_attempts:
+                        os.remove(path)
+                        self._jobs.pop(job_id, None)
+                    else:
+                        os.replace(
+                            path, os.path.join(self.jobs_folder, job_id + ".job")
+                        )
+                        job["attempts"] = job["attempts"] + 1
+                        self.requeued = self.requeued + 1
+                        continue
+                except FileNotFoundError:
+                    # the worker finished in the meantime
+                    continue
+
+            if job["future"].set_running_or_notify_cancel():
+                job["future"].set_exception(
+                    WorkerLostError(
+                        "Job {} was lost by {} workers.".format(job_id, job["attempts"])
+                    )
+                )
+
+    def _drop_cancelled(self):
+        """
+        Remove queued jobs whose future was cancelled
+
+        Returns: None
+
+        """
+        with self._lock:
+            cancelled = [
+                k for k, job in self._jobs.items() if job["future"].cancelled()
+            ]
+            for job_id in cancelled:
+                del self._jobs[job_id]
+        for job_id in cancelled:
+            try:
+                os.remove(os.path.join(self.jobs_folder, job_id + ".job"))
+            except FileNotFoundError:
+                pass
+
+    def _watch(self):
+        """
+        Monitor thread. Scans the folder until the queue is shut down and every job is done
+
+        Returns: None
+
+        """
+        while True:
+            self._drop_cancelled()
+            self._collect()
+            self._expire()
+            with self._lock:
+                if self._shutdown and not self._jobs:
+                    return
+            time.sleep(POLL)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        Stop taking jobs. The workers keep running
+
+        Args:
+            wait: (boolean) (optional) wait for the submitted jobs. Default is True
+            cancel_futures: (boolean) (optional) cancel the jobs no worker has claimed. Default is False
+
+        Returns: None
+
+        """
+        with self._lock:
+            self._shutdown = True
+            jobs = list(self._jobs.values())
+        if cancel_futures:
+            for job in jobs:
+                job["future"].cancel()
+        if wait:
+            self._monitor.join()
+
+
+class _Heartbeat(threading.Thread):
+
+    """ Touch a claimed job file until stopped """
+
+    def __init__(self, path, interval):
+        threading.Thread.__init__(self, name="figpager-heartbeat", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                # the job was given to another worker
+                return
+
+
+def _claim(jobs_folder, claimed_folder, worker):
+    """
+    Claim the oldest queued job by renaming it. Only one worker succeeds in renaming a file
+
+    Returns: job id and claimed path or None
+
+    """
+
+    for name in sorted(os.listdir(jobs_folder)):
+        if not name.endswith(".job"):
+            continue
+        job_id = name[: -len(".job")]
+        path = os.path.join(claimed_folder, "{}.{}.job".format(job_id, worker))
+        try:
+            os.rename(os.path.join(jobs_folder, name), path)
+        except (FileNotFoundError, PermissionError):
+            continue
+        return job_id, path
+    return None
+
+
+def run_worker(
+    folder, idle=None, max_jobs=None, initializer=None, initargs=(), key=None
+):
+    """
+    Run queued jobs of a DirectoryQueue folder. Start one per CPU on each machine, i.e. with
+    "figpager worker FOLDER". Jobs are unpickled, so without a key anyone who can write to the folder can run code
+    in the worker
+
+    Args:
+        folder: (string) queue folder
+        idle: (float) (optional) return after this many seconds without a job. Default is None, run forever
+        max_jobs: (int) (optional) return after this many jobs. Default is None
+        initializer: (callable) (optional) called once before the first job, i.e. figpager.prewarm
+        initargs: (tuple) (optional) initializer arguments
+        key: (string or bytes) (optional) secret of the DirectoryQueue. Jobs without a valid signature fail with
+        ValueError without being unpickled. Default is None, jobs are not signed
+
+    Returns: number of jobs run
+
+    """
+    jobs_folder, claimed_folder, results_folder = _folders(folder)
+    worker = "{}-{}".format(socket.gethostname().split(".")[0], os.getpid())
+    if initializer is not None:
+        initializer(*initargs)
+
+    jobs = 0
+    waiting = time.time()
+    while max_jobs is None or jobs < max_jobs:
+        claim = (
+            _claim(jobs_folder, claimed_folder, worker)
+            if os.path.isdir(jobs_folder)
+            else None
+        )
+        if claim is None:
+            if idle is not None and time.time() - waiting >= idle:
+                break
+            time.sleep(POLL)
+            continue
+        job_id, path = claim
+
+        with open(os.path.join(folder, LEASE_FILE)) as f:
+            lease = float(f.read())
+        heartbeat = _Heartbeat(path, lease / 4.0)
+        heartbeat.start()
+        try:
+            fn, args, kwargs = _read(path, key)
+            result = (True, fn(*args, **kwargs))
+        except Exception as e:
+            try:
+                e.worker_traceback = traceback.format_exc()
+            except AttributeError:
+                pass
+            result = (False, e)
+        finally:
+            heartbeat.stopped.set()
+
+        result_path = os.path.join(results_folder, job_id + ".result")
+        try:
+            _write(result_path, result, key)
+        except Exception as e:
+            # results and errors that can not be pickled
+            _write(result_path, (False, RuntimeError(repr(e))), key)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        jobs = jobs + 1
+        waiting = time.time()
+    return jobs
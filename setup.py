@@ -30,15 +30,17 @@ setup(
     packages=["figpager"],
     include_package_data=True,
     package_data={"figpager": ["page_layout/*.ini"],},
+    python_requires=">=3.7",
     install_requires=["matplotlib",],
+    extras_require={"pdf": ["pypdf>=5.0"],},
+    entry_points={"console_scripts": ["figpager=figpager.__main__:main"],},
     long_description=read("README.md"),
     long_description_content_type="text/markdown",
     classifiers=[
         "Framework :: Matplotlib",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
-        "Programming Language :: Python :: 2.7",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
     ],
 )
@@ -0,0 +1,96 @@
+# Test of memory mapped and chunked data inputs
+import mmap
+import os
+
+import numpy as np
+import pytest
+
+from figpager import FigPager
+from figpager.streaming import iter_chunks, streaming_envelope
+
+
+class AdviceRecorder:
+
+    """ mmap stand in that records madvise calls """
+
+    def __init__(self, mapped):
+        self.mapped = mapped
+        self.calls = []
+
+    def madvise(self, option, start=0, length=None):
+        self.calls.append((start, length))
+        self.mapped.madvise(option, start, length)
+
+    def __getattr__(self, name):
+        return getattr(self.mapped, name)
+
+
+def test_main(tmp_path):
+    # Initalize with an output file
+    outfile = os.path.join(str(tmp_path), "out_10.pdf")
+
+    # write a memory mapped input
+    rng = np.random.RandomState(0)
+    data = np.memmap(
+        os.path.join(str(tmp_path), "data.dat"),
+        dtype="float64",
+        mode="w+",
+        shape=(100000,),
+    )
+    data[:] = rng.normal(0, 1, len(data))
+    data.flush()
+    data = np.memmap(os.path.join(str(tmp_path), "data.dat"), dtype="float64", mode="r")
+
+    fp = FigPager("letter", 2, 2, outfile=outfile, overwrite=True)
+
+    # histogram from a memmap in small chunks
+    ax, counts, edges = fp.add_histogram(data, bins=20, chunksize=1000)
+    ax.set_title("Histogram")
+    expected, expected_edges = np.histogram(np.asarray(data), bins=20)
+    assert np.array_equal(counts, expected)
+    assert np.allclose(edges, expected_edges)
+
+    # density from an iterator of (x, y) chunks
+    chunks = (
+        (data[i : i + 5000], data[::-1][i : i + 5000])
+        for i in range(0, len(data), 5000)
+    )
+    ax, counts, xedges, yedges = fp.add_density(
+        chunks, bins=50, range=[[-5, 5], [-5, 5]]
+    )
+    ax.set_title("Density")
+    assert counts.sum() == len(data)
+
+    # envelope from a chunk iterator
+    chunks = (data[i : i + 3000] for i in range(0, len(data), 3000))
+    ax, x, lo, hi = fp.add_envelope(chunks, bins=100, length=len(data), x_range=(0, 1))
+    ax.set_title("Envelope")
+    blocks = np.asarray(data).reshape(100, -1)
+    assert np.array_equal(lo, blocks.min(axis=1))
+    assert np.array_equal(hi, blocks.max(axis=1))
+    assert x[0] >= 0 and x[-1] <= 1
+
+    fp.close()
+
+    # an iterator longer than length fails clearly
+    chunks = (data[i : i + 3000] for i in range(0, len(data), 3000))
+    with pytest.raises(ValueError, match="more than length=1000"):
+        streaming_envelope(chunks, bins=10, length=1000)
+
+    # only the pages of the reduced chunk are dropped from memory
+    if hasattr(mmap, "MADV_DONTNEED"):
+        recorder = AdviceRecorder(data._mmap)
+        data._mmap = recorder
+        total = sum(chunk.sum() for chunk in iter_chunks(data, chunksize=5000))
+        data._mmap = recorder.mapped
+        assert np.isclose(total, np.asarray(data).sum())
+        assert len(recorder.calls) == len(data) // 5000
+        for number, (start, length) in enumerate(recorder.calls):
+            # the span ends within its chunk, never past it
+            assert start % mmap.PAGESIZE == 0 and length > 0
+            assert number * 5000 * 8 < start + length <= (number + 1) * 5000 * 8
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,94 @@
+# Test of streaming table pagination
+import glob
+import os
+
+from matplotlib.transforms import Bbox
+
+from figpager import FigPager
+
+
+def test_main(tmp_path):
+    # Initalize with an output file
+    outfile = os.path.join(str(tmp_path), "table.png")
+
+    fp = FigPager(
+        "letter",
+        1,
+        1,
+        layout="./tests/report.ini",
+        outfile=outfile,
+        orientation="portrait",
+        overwrite=True,
+        dpi=50,
+    )
+
+    pulled = []
+
+    def rows():
+        for i in range(500):
+            pulled.append(i)
+            yield [i, "site {}".format(i), i * 0.5]
+
+    # record how many rows were pulled each time a page is flipped
+    flips = []
+    add_page = fp.add_page
+
+    def spy(*args, **kwargs):
+        flips.append(len(pulled))
+        return add_page(*args, **kwargs)
+
+    fp.add_page = spy
+
+    count = fp.add_table(rows(), columns=["Row", "Site", "Value"], col_widths=[1, 2, 1])
+    fp.close()
+
+    assert count == 500
+    assert len(pulled) == 500
+
+    # the next page of rows is pulled just before each page flip and no more
+    rows_per_page = flips[1] - flips[0]
+    assert rows_per_page > 10
+    assert flips == [min(rows_per_page * (i + 2), 500) for i in range(len(flips))]
+
+    # one file per page
+    pages = glob.glob(os.path.join(str(tmp_path), "table*.png"))
+    assert len(pages) == len(flips) + 1 == -(-500 // rows_per_page)
+
+    # a table after a subplot starts on the next page and stays in the subplot area
+    fp = FigPager(
+        "letter",
+        1,
+        1,
+        layout="./tests/report.ini",
+        outfile=os.path.join(str(tmp_path), "mixed.png"),
+        orientation="portrait",
+        overwrite=True,
+        dpi=50,
+    )
+    fp.add_subplot().plot([0, 1], [0, 1])
+    rows = [
+        [i, "a very long site name that runs past its column " * 3, i] for i in range(5)
+    ]
+    assert fp.add_table(rows, columns=["Row", "Site", "Value"]) == 5
+    assert fp.pagecount == 1
+    assert not any(ax.lines for ax in fp.fig.axes)
+
+    renderer = fp.fig.canvas.get_renderer()
+    pars = fp.fig.subplotpars
+    area = Bbox([[pars.left, pars.bottom], [pars.right, pars.top]]).transformed(
+        fp.fig.transFigure
+    )
+    table = [t for t in fp.fig.texts if t.get_clip_box() is not None]
+    assert len(table) == 6
+    # the long cells run past the subplot area and are clipped to it
+    assert max(t.get_window_extent(renderer).x1 for t in table) > area.x1
+    for t in table:
+        shown = Bbox.intersection(t.get_window_extent(renderer), t.get_clip_box())
+        assert area.x0 - 1e-6 <= shown.x0 and shown.x1 <= area.x1 + 1e-6
+        assert area.y0 - 1e-6 <= shown.y0 and shown.y1 <= area.y1 + 1e-6
+    fp.close()
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
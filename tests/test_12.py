@@ -0,0 +1,88 @@
+# Test of multi format output from one render
+import os
+import pathlib
+
+import numpy as np
+from PIL import Image
+
+from figpager import FigPager
+
+
+def test_main(tmp_path):
+    tmp_path = pathlib.Path(tmp_path)
+    # Initalize with several output targets
+    pdf = os.path.join(str(tmp_path), "out_12.pdf")
+    png = os.path.join(str(tmp_path), "page.png")
+    thumb = os.path.join(str(tmp_path), "thumb.png")
+
+    fp = FigPager(
+        "letter",
+        2,
+        1,
+        outfile=[pdf, (png, 100), {"path": thumb, "dpi": 20}],
+        orientation="portrait",
+        overwrite=True,
+    )
+    assert fp.outfile == pdf
+    assert fp.multipage
+
+    x = np.linspace(0, 2 * np.pi, 400)
+    for r in range(2):
+        if r > 0:
+            fp.add_page()
+        ax = fp.add_subplot()
+        ax.plot(x, np.sin(x * (r + 1)))
+        ax.set_title("Page {}".format(r + 1))
+
+    fp.close()
+
+    assert os.path.isfile(pdf)
+    for path in [png, thumb]:
+        filename, ext = os.path.splitext(path)
+        assert os.path.isfile(path)
+        assert os.path.isfile("{}_02{}".format(filename, ext))
+
+    # raster sizes follow each target dpi
+    assert Image.open(png).size == (850, 1100)
+    assert Image.open(thumb).size == (170, 220)
+
+    # path objects are single file paths, alone or in a list
+    svg = tmp_path / "page.svg"
+    for outfile in [tmp_path / "path.pdf", [tmp_path / "paths.pdf", (svg, 50)]]:
+        fp = FigPager("letter", 1, 1, outfile=outfile, overwrite=True)
+        fp.add_subplot().plot([0, 1])
+        fp.close()
+    assert fp.outfile == str(tmp_path / "paths.pdf")
+    for path in ["path.pdf", "paths.pdf", "page.svg"]:
+        assert (tmp_path / path).is_file()
+
+    # metadata is kept in pages resampled from one render
+    png = str(tmp_path / "meta.png")
+    jpg = str(tmp_path / "meta.jpg")
+    fp = FigPager(
+        "letter",
+        1,
+        1,
+        outfile=[(png, 40), (jpg, 20)],
+        metadata={"Title": "Sites", "Author": "figpager"},
+        overwrite=True,
+    )
+    fp.add_subplot().plot([0, 1])
+    fp.close()
+    text = Image.open(png).text
+    assert text["Title"] == "Sites" and text["Author"] == "figpager"
+    assert text["Software"].startswith("Matplotlib")
+    exif = Image.open(jpg).getexif()
+    assert exif[0x010E] == "Sites" and exif[0x013B] == "figpager"
+
+    # a FigPager without an outfile keeps showing its pages
+    fp = FigPager("letter", 1, 1)
+    fp.add_subplot().plot([0, 1])
+    fp.add_page(outfile=str(tmp_path / "shown.png"))
+    fp._release()
+    assert not (tmp_path / "shown.png").exists()
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,49 @@
+# Test of draft and final variants from one render pass
+import os
+
+import numpy as np
+from PIL import Image
+
+from figpager import FigPager
+
+
+def draw(fp):
+    x = np.linspace(0, 2 * np.pi, 400)
+    ax = fp.add_subplot()
+    ax.plot(x, np.sin(x))
+    ax.set_title("Plot 1")
+    fp.text_at_label("Figure Title", "Figure 1")
+
+
+def test_main(tmp_path):
+    final = os.path.join(str(tmp_path), "final.png")
+    draft = os.path.join(str(tmp_path), "draft.png")
+    reference = os.path.join(str(tmp_path), "reference.png")
+
+    kwargs = dict(
+        layout="./tests/report.ini", orientation="portrait", overwrite=True, dpi=50
+    )
+
+    # one pass for both variants
+    fp = FigPager("letter", 3, 2, outfile=final, draft_outfile=draft, **kwargs)
+    draw(fp)
+    # the draft label and the draft watermark
+    assert len(fp.draft_artists) == 2
+    fp.close()
+
+    # a final only render for comparison
+    fp = FigPager("letter", 3, 2, outfile=reference, draft=False, **kwargs)
+    draw(fp)
+    fp.close()
+
+    final = np.asarray(Image.open(final))
+    draft = np.asarray(Image.open(draft))
+    reference = np.asarray(Image.open(reference))
+
+    assert np.array_equal(final, reference)
+    assert not np.array_equal(final, draft)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,46 @@
+# Test of page thumbnails and the page index
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from figpager import FigPager
+
+
+def test_main(tmp_path):
+    outfile = os.path.join(str(tmp_path), "out_14.pdf")
+    thumbnails = os.path.join(str(tmp_path), "thumbnails")
+
+    fp = FigPager(
+        "letter",
+        2,
+        1,
+        outfile=outfile,
+        orientation="portrait",
+        overwrite=True,
+        thumbnail_dir=thumbnails,
+        thumbnail_width=100,
+    )
+
+    x = np.linspace(0, 2 * np.pi, 400)
+    for r in range(3):
+        ax = fp.add_subplot()
+        ax.plot(x, np.sin(x))
+        ax.set_title("Plot {}".format(r + 1))
+
+    fp.close()
+
+    with open(os.path.join(thumbnails, "index.json")) as f:
+        index = json.load(f)["pages"]
+
+    assert [page["page"] for page in index] == [1, 2]
+    assert [s["title"] for s in index[0]["subplots"]] == ["Plot 1", "Plot 2"]
+    assert [s["label"] for s in index[1]["subplots"]] == ["(0,0, 3)"]
+    for page in index:
+        assert Image.open(page["thumbnail"]).size == (100, 129)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,67 @@
+# Test of the flat layout option index
+import os
+
+from figpager import FigPager
+
+
+def nested_option(config, paper_size, orientation, section, subsection, option):
+    # the nested config lookup the index replaces
+    try:
+        return config[section][subsection][option]
+    except KeyError:
+        try:
+            return config[section][subsection][paper_size.title()][orientation.title()][
+                option
+            ]
+        except KeyError:
+            return None
+
+
+def test_main(tmp_path):
+    outfile = os.path.join(str(tmp_path), "out_15.pdf")
+
+    fp = FigPager(
+        "letter",
+        3,
+        2,
+        layout="./tests/report.ini",
+        outfile=outfile,
+        orientation="portrait",
+        overwrite=True,
+    )
+
+    # every option of the layout matches the nested lookup
+    for (section, subsection, option), value in fp.options.items():
+        assert value == nested_option(
+            fp.config, "letter", "portrait", section, subsection, option
+        )
+
+    # paper size and orientation overrides are resolved
+    assert fp._parse_option("Watermark", "Draft Watermark", "text") == "DRAFT ONLY"
+    assert fp._parse_option("Images", "Example Logo", "image_position") == [0.25, 0.45]
+    assert fp._parse_option("Text", "Document Title", "missing") is None
+
+    # no override for landscape pages
+    fp.add_page(orientation="landscape")
+    assert fp._parse_option("Watermark", "Draft Watermark", "text") is None
+
+    # config changes are read without update_options, also in new and removed subsections
+    fp.config["Text"]["Document Title"]["text"] = "Document 2"
+    assert fp._parse_option("Text", "Document Title", "text") == "Document 2"
+    fp.config["Text"]["Extra"] = {"text": "Extra text"}
+    fp.config["Text"]["Extra"]["fontsize"] = 12.0
+    assert fp._parse_option("Text", "Extra", "fontsize") == 12.0
+    del fp.config["Text"]["Extra"]
+    assert fp._parse_option("Text", "Extra", "text") is None
+
+    # boxes are drawn from the index
+    assert fp._box_from_label("Note Box Top") is not None
+    fp.config["Boxes"]["Note Box Top"]["box_frame"] = False
+    assert fp._box_from_label("Note Box Top") is None
+
+    fp.close()
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,79 @@
+# Test of the metrics export
+import os
+
+import numpy as np
+
+from figpager import FigPager, Metrics
+
+
+def read_samples(path):
+    samples = {}
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_main(tmp_path):
+    textfile = os.path.join(str(tmp_path), "figpager.prom")
+    sent = []
+    metrics = Metrics(textfile=textfile, sink=sent.append)
+
+    x = np.linspace(0, 2 * np.pi, 400)
+    for outfile in ["out_16.pdf", "out_16.png"]:
+        fp = FigPager(
+            "letter",
+            2,
+            1,
+            layout="./tests/report.ini",
+            outfile=os.path.join(str(tmp_path), outfile),
+            orientation="portrait",
+            overwrite=True,
+            metrics=metrics,
+        )
+        for r in range(3):
+            ax = fp.add_subplot()
+            ax.plot(x, np.sin(x))
+        fp.close()
+
+    samples = read_samples(textfile)
+
+    assert samples["figpager_pages_rendered_total"] == 4
+    assert samples["figpager_subplots_created_total"] == 6
+    assert samples["figpager_draw_page_seconds_count"] == 4
+    assert samples['figpager_draw_page_seconds_bucket{le="+Inf"}'] == 4
+    assert samples["figpager_save_seconds_count"] == 4
+
+    # the pdf is one file and the png pages are out_16.png and out_16_02.png
+    assert samples['figpager_bytes_written_total{format="pdf"}'] == os.path.getsize(
+        os.path.join(str(tmp_path), "out_16.pdf")
+    )
+    assert samples['figpager_bytes_written_total{format="png"}'] == sum(
+        os.path.getsize(os.path.join(str(tmp_path), f))
+        for f in ["out_16.png", "out_16_02.png"]
+    )
+
+    # the second FigPager reads the layout and its images from the cache
+    hits = 'figpager_cache_hits_total{cache="layout"}'
+    misses = 'figpager_cache_misses_total{cache="layout"}'
+    assert samples.get(hits, 0) >= 1
+    assert samples.get(hits, 0) + samples.get(misses, 0) == 2
+    assert samples['figpager_cache_hits_total{cache="image"}'] >= 6
+
+    # the sink gets the same text on every close
+    assert len(sent) == 2
+    with open(textfile) as f:
+        assert sent[-1] == f.read()
+
+    openmetrics = metrics.render(openmetrics=True)
+    assert "# TYPE figpager_pages_rendered counter" in openmetrics
+    assert "figpager_pages_rendered_total 4" in openmetrics
+    assert openmetrics.endswith("# EOF\n")
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
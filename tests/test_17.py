@@ -0,0 +1,101 @@
+# Test that figures are released and memory stays bounded across pages
+# Set FIGPAGER_SOAK=1 (or a page count) to run the 10,000 page soak test
+import os
+import warnings
+
+import matplotlib.pyplot as plt
+import pytest
+
+from figpager import FigPager
+
+# largest RSS growth after the warm up pages
+SOAK_GROWTH = 2 ** 20
+
+
+def rss():
+    # resident set size in bytes
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def test_main(tmp_path):
+    plt.close("all")
+
+    outfile = os.path.join(str(tmp_path), "out_17.pdf")
+    fp = FigPager("a6", 1, 1, outfile=outfile, overwrite=True, dpi=72, leak_check=True)
+    for i in range(20):
+        ax = fp.add_subplot()
+        ax.plot([0, 1], [0, i])
+        fp.add_page()
+        # only the page being drawn is registered with pyplot
+        assert plt.get_fignums() == fp.open_figures()
+        assert len(plt.get_fignums()) == 1
+
+    # redrawing the page directly releases the previous figure
+    fp.draw_page()
+    ax = fp.add_subplot()
+    assert len(plt.get_fignums()) == 1
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        fp.close()
+
+    assert plt.get_fignums() == []
+    assert fp.leak_report["pages"] == 21
+    assert fp.leak_report["open_figures"] == []
+
+    # exceptions are raised and resources released without saving
+    with pytest.raises(RuntimeError):
+        with FigPager("a6", 1, 1, outfile=outfile, overwrite=True) as fp:
+            fp.add_subplot()
+            raise RuntimeError("report failed")
+    assert plt.get_fignums() == []
+    assert fp.closed
+    print("--Done!--")
+
+
+@pytest.mark.skipif(
+    not os.environ.get("FIGPAGER_SOAK") or not os.path.exists("/proc/self/statm"),
+    reason="set FIGPAGER_SOAK to run the soak test on Linux",
+)
+def test_soak(tmp_path):
+    pages = (
+        int(os.environ.get("FIGPAGER_SOAK"))
+        if os.environ.get("FIGPAGER_SOAK") != "1"
+        else 10000
+    )
+    warmup = min(200, pages // 5)
+    # pages at which RSS is compared with the warmed up RSS
+    checks = sorted(set([min(1000, pages), pages]))
+
+    plt.close("all")
+    # raster pages keep nothing per page, unlike the cross reference table of a multipage pdf
+    fp = FigPager(
+        "a6",
+        1,
+        1,
+        outfile=os.path.join(str(tmp_path), "soak.png"),
+        overwrite=True,
+        dpi=20,
+    )
+    growth = {}
+    for i in range(1, pages + 1):
+        ax = fp.add_subplot()
+        ax.plot([0, 1], [0, i])
+        fp.add_page()
+        assert len(plt.get_fignums()) == 1
+        if i == warmup:
+            start = rss()
+        elif i in checks:
+            growth[i] = rss() - start
+    fp.close()
+
+    assert plt.get_fignums() == []
+    # RSS stays flat after the warm up, so a small leak per page shows over the run
+    print("RSS growth in bytes from page {} by page: {}".format(warmup, growth))
+    for page, grown in growth.items():
+        assert grown < SOAK_GROWTH, page
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,46 @@
+# Test of worker prewarming
+import matplotlib.pyplot as plt
+import pytest
+
+from figpager import FigPager, Metrics, prewarm
+
+
+def test_main():
+    report = prewarm(
+        layouts=["default", "./tests/report.ini"],
+        paper_sizes=["letter", "A4"],
+        fonts=["DejaVu Sans"],
+    )
+
+    assert report["layouts"][1] == "./tests/report.ini"
+    assert report["images"] == ["./tests/1978.342_resized.jpg"]
+    assert report["paper_sizes"] == ["letter", "A4"]
+    assert "DejaVu Sans" in report["fonts"]
+    # the hidden pages are released
+    assert plt.get_fignums() == []
+
+    # a font that is not installed is reported instead of warming the default font
+    with pytest.warns(RuntimeWarning, match="No Such Font was not found"):
+        report = prewarm(fonts=["No Such Font"], formats=[])
+    assert report["fonts"]["No Such Font"] is None
+    assert report["fonts"]["sans-serif"] is not None
+
+    # the first page of a worker reads the layout and logo from the warm caches
+    metrics = Metrics()
+    fp = FigPager(
+        "letter",
+        2,
+        1,
+        layout="./tests/report.ini",
+        orientation="portrait",
+        metrics=metrics,
+    )
+    assert metrics.value("cache_hits", cache="layout") == 1
+    assert metrics.value("cache_hits", cache="image") == 2
+    assert metrics.value("cache_misses", cache="image") == 0
+    fp._release()
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,64 @@
+# Test of the text layout and glyph cache
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from figpager import FigPager, textcache
+
+
+def render_pages(text_cache):
+    fp = FigPager(
+        "letter",
+        2,
+        1,
+        layout="./tests/report.ini",
+        orientation="portrait",
+        dpi=100,
+        text_cache=text_cache,
+    )
+    pages = []
+    for page in range(3):
+        fp.draw_page()
+        fp.text_at_label("Figure Title", "Figure {}".format(page + 1))
+        ax = fp.add_subplot()
+        ax.plot([0, 1], [0, page])
+        buf = io.BytesIO()
+        fp.fig.savefig(buf, format="png", dpi=100)
+        pages.append(np.asarray(Image.open(buf)))
+    fp._release()
+    return pages
+
+
+def test_main():
+    textcache.clear()
+    reference = render_pages(False)
+    cached = render_pages(True)
+
+    # cached text is drawn pixel for pixel the same
+    for a, b in zip(reference, cached):
+        assert np.array_equal(a, b)
+
+    # repeated strings are measured and rasterized once
+    assert textcache.stats["hits"] > 0
+    assert textcache.stats["glyph_hits"] > textcache.stats["glyph_misses"]
+
+    # the cache is opt in and falls back to plain text without the private matplotlib hooks
+    assert textcache.hooks_available()
+    fp = FigPager("letter", 1, 1)
+    assert not fp.text_cache
+    fp._release()
+    textcache._hooks = False
+    try:
+        with pytest.warns(RuntimeWarning, match="without the cache"):
+            fp = FigPager("letter", 1, 1, text_cache=True)
+        assert not fp.text_cache
+        fp._release()
+    finally:
+        textcache._hooks = None
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,132 @@
+# Test of deferred "Page X of Y" stamping
+import os
+import warnings
+
+import numpy as np
+import pypdf
+import pytest
+from PIL import Image
+
+from figpager import FigPager
+
+LAYOUT = """[Layout]
+    [[Margin]]
+    source_path = False
+    source_path_position = 0.2, 0.1
+    margin_frame = False
+[Boxes]
+[Text]
+    [[Footer]]
+    text = 'Page {page} of {pages}'
+    text_position = 4.25, 0.5
+    horizontalalignment = center
+    fontcolor = black
+    fontsize = 10
+    [[Header]]
+    text = 'Sheet {page}'
+    text_position = 4.25, 10.5
+    horizontalalignment = center
+    fontcolor = black
+    fontsize = 10
+[Watermark]
+[Images]
+[Lines]
+"""
+
+
+def make_report(folder, outfile, text, pages, **kwargs):
+    layout = os.path.join(folder, "footer.ini")
+    with open(layout, "w") as f:
+        f.write(LAYOUT.replace("Page {page} of {pages}", text))
+
+    fp = FigPager(
+        "letter",
+        1,
+        1,
+        layout=layout,
+        outfile=[os.path.join(folder, outfile)],
+        orientation="portrait",
+        dpi=60,
+        overwrite=True,
+        **kwargs
+    )
+    for page in range(pages):
+        if page:
+            fp.add_page()
+        ax = fp.add_subplot()
+        ax.plot([0, 1], [0, page])
+    fp.close()
+    return fp
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+
+    fp = make_report(folder, "out_20.pdf", "Page {page} of {pages}", 3)
+    # only the small footer texts are kept until close
+    assert fp.stamps == {}
+    reader = pypdf.PdfReader(os.path.join(folder, "out_20.pdf"))
+    assert len(reader.pages) == 3
+    for number, page in enumerate(reader.pages, 1):
+        text = page.extract_text()
+        assert "Page {} of 3".format(number) in text
+        assert "Sheet {}".format(number) in text
+
+    # the stamps are appended as an incremental update and share their font
+    with open(os.path.join(folder, "out_20.pdf"), "rb") as f:
+        assert f.read().count(b"%%EOF") == 2
+    fonts = set()
+    for page in reader.pages:
+        form = page["/Resources"]["/XObject"]["/FpStamp"]
+        fonts.update(font.idnum for font in form["/Resources"]["/Font"].values())
+    assert len(fonts) == 1
+
+    # pages with the same text share one stamp
+    make_report(folder, "same_20.pdf", "{pages} pages", 3)
+    reader = pypdf.PdfReader(os.path.join(folder, "same_20.pdf"))
+    forms = set()
+    for page in reader.pages:
+        assert "3 pages" in page.extract_text()
+        forms.add(page["/Resources"]["/XObject"].raw_get("/FpStamp").idnum)
+    assert len(forms) == 1
+
+    # raster pages are stamped in place and match text drawn with the page
+    make_report(folder, "out_20.png", "Page {page} of {pages}", 2)
+    make_report(folder, "ref_20.png", "Page {page} of 2", 2)
+    for stamped, reference in [
+        ("out_20.png", "ref_20.png"),
+        ("out_20_02.png", "ref_20_02.png"),
+    ]:
+        a = np.asarray(Image.open(os.path.join(folder, stamped)), dtype=float)
+        b = np.asarray(Image.open(os.path.join(folder, reference)), dtype=float)
+        assert a.shape == b.shape
+        assert np.array_equal(a, b)
+
+    # stamped png pages keep their text metadata
+    make_report(folder, "tiled_20.png", "Page {page} of {pages}", 2, tiled=True)
+    assert "Software" in Image.open(os.path.join(folder, "tiled_20_02.png")).text
+
+    # jpeg and bbox_inches pages are not stamped and get ? as the page count
+    for name, kwargs in [
+        ("out_20.jpg", {}),
+        ("tight_20.png", {"bbox_inches": "tight"}),
+    ]:
+        with pytest.warns(RuntimeWarning, match="not stamped"):
+            fp = make_report(folder, name, "Page {page} of {pages}", 2, **kwargs)
+        assert fp.stamps == {}
+        stem, ext = os.path.splitext(name)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            make_report(folder, stem + "_ref" + ext, "Page {page} of ?", 2, **kwargs)
+        a = np.asarray(
+            Image.open(os.path.join(folder, stem + "_02" + ext)), dtype=float
+        )
+        b = np.asarray(
+            Image.open(os.path.join(folder, stem + "_ref_02" + ext)), dtype=float
+        )
+        assert np.array_equal(a, b)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main("/tmp/t20")
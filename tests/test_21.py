@@ -0,0 +1,77 @@
+# Test of putting a layout onto the pages of an existing PDF
+import os
+
+import matplotlib.pyplot as plt
+import pypdf
+from matplotlib.backends.backend_pdf import PdfPages
+from pypdf.annotations import Link
+
+from figpager import LayoutOverlay
+from figpager.__main__ import main
+
+
+def write_input(path):
+    # pages from another tool, one portrait, one landscape and one portrait page shown turned to landscape
+    with PdfPages(path) as pdf:
+        for number, size in enumerate([(8.5, 11), (11, 8.5), (8.5, 11)], 1):
+            fig = plt.figure(figsize=size)
+            fig.text(0.5, 0.5, "Input page {}".format(number))
+            pdf.savefig(fig)
+            plt.close(fig)
+
+    writer = pypdf.PdfWriter(clone_from=path)
+    writer.pages[2].rotate(90)
+    # a web link and a link to the last page
+    writer.add_annotation(0, Link(rect=(100, 100, 200, 150), url="https://example.com"))
+    writer.add_annotation(0, Link(rect=(100, 200, 200, 250), target_page_index=2))
+    writer.write(path)
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+    infile = os.path.join(folder, "plots.pdf")
+    write_input(infile)
+
+    # page numbers in the layout are stamped per page
+    layout = os.path.join(folder, "report.ini")
+    with open("./tests/report.ini") as f:
+        text = f.read().replace("text = ''", "text = 'Sheet {page} of {pages}'", 1)
+    with open(layout, "w") as f:
+        f.write(text)
+
+    outfile = os.path.join(folder, "framed.pdf")
+    assert main(["overlay", "--layout", layout, "-o", outfile, "-q", infile]) == 0
+
+    reader = pypdf.PdfReader(outfile)
+    assert len(reader.pages) == 3
+    assert [float(p.mediabox.width) for p in reader.pages] == [612, 792, 792]
+    for number, page in enumerate(reader.pages, 1):
+        text = page.extract_text()
+        assert "Input page {}".format(number) in text
+        assert "Document Title" in text
+        assert "Sheet {} of 3".format(number) in text
+        assert "/Contents" in page and "/FpPage" in page["/Resources"]["/XObject"]
+
+    # links move with the page content and point at the output pages
+    annots = [a.get_object() for a in reader.pages[0]["/Annots"]]
+    assert len(annots) == 2
+    assert annots[0]["/A"]["/URI"] == "https://example.com"
+    assert annots[1]["/Dest"][0] == reader.pages[2].indirect_reference
+    for annot in annots:
+        assert annot.raw_get("/P") == reader.pages[0].indirect_reference
+        left, bottom, right, top = [float(v) for v in annot["/Rect"]]
+        # scaled into the layout frame, so smaller than on the input page
+        assert 0 < right - left < 100 and 0 < top - bottom < 50
+    assert "/Annots" not in reader.pages[1]
+
+    # decorations are drawn once per page size and orientation
+    overlay = LayoutOverlay(layout, paper_size="letter")
+    for name in ["a.pdf", "b.pdf"]:
+        overlay.apply(infile, os.path.join(folder, name))
+    assert len(overlay.templates) == 2
+    assert plt.get_fignums() == []
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,77 @@
+# Test of a kept page skeleton updated in place
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+from figpager import FigPager
+
+
+def draw_report(folder, skeleton):
+    outfile = os.path.join(folder, "skeleton.png" if skeleton else "pages.png")
+    fp = FigPager(
+        "letter",
+        2,
+        1,
+        layout="./tests/report.ini",
+        outfile=outfile,
+        orientation="portrait",
+        dpi=72,
+        overwrite=True,
+        skeleton=skeleton,
+    )
+    x = np.linspace(0, 10, 200)
+    artists = {}
+    figures = set()
+    axes = set()
+    for site in range(3):
+        if site:
+            fp.add_page()
+        fp.text_at_label("Figure Title", "Site {}".format(site + 1))
+        figures.add(id(fp.fig))
+
+        ax = fp.add_subplot()
+        axes.add(id(ax))
+        y = np.sin(x * (site + 1)) * (site + 1)
+        if fp.reused_page:
+            artists["line"].set_data(x, y)
+            ax.relim()
+            ax.autoscale_view()
+        else:
+            artists["line"] = ax.plot(x, y)[0]
+        ax.set_title("Signal {}".format(site + 1))
+
+        ax = fp.add_subplot()
+        axes.add(id(ax))
+        data = np.outer(np.arange(4), np.arange(5)) * (site + 1)
+        if fp.reused_page:
+            artists["image"].set_array(data)
+            artists["image"].set_clim(data.min(), data.max())
+        else:
+            artists["image"] = ax.imshow(data)
+    fp.close()
+
+    stem = os.path.splitext(outfile)[0]
+    names = [outfile, stem + "_02.png", stem + "_03.png"]
+    return [np.asarray(Image.open(name)) for name in names], len(figures), len(axes)
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+    pages, figures, axes = draw_report(folder, False)
+    kept, kept_figures, kept_axes = draw_report(folder, True)
+
+    # one figure and one set of axes for the whole report
+    assert (figures, axes) == (3, 6)
+    assert (kept_figures, kept_axes) == (1, 2)
+    assert plt.get_fignums() == []
+
+    # updated pages look the same as redrawn pages
+    for a, b in zip(pages, kept):
+        assert np.array_equal(a, b)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
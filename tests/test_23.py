@@ -0,0 +1,65 @@
+# Test of previewing pages from cached bitmaps without an outfile
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from PIL import Image
+
+from figpager import FigPager, PageBrowser
+
+
+def test_main():
+    browser = PageBrowser(dpi=50, zoom=True, zoom_pages=2)
+    fp = FigPager(
+        "letter",
+        2,
+        1,
+        layout="./tests/report.ini",
+        orientation="portrait",
+        preview=browser,
+    )
+    for page in range(3):
+        if page:
+            fp.add_page()
+        ax = fp.add_subplot()
+        ax.plot(np.arange(10), np.arange(10) * (page + 1))
+        ax.set_title("Page {}".format(page + 1))
+    # pages are cached rather than shown one by one. With a non-interactive backend show() returns at once
+    fp.close()
+    assert len(browser) == 3
+    assert plt.get_fignums() == []
+
+    # pages are 8.5 x 11 inches at 50 dpi and differ from each other
+    images = [browser.image(page) for page in [1, 2, 3]]
+    assert images[0].shape == (550, 425, 4)
+    assert not np.array_equal(images[0], images[1])
+    assert browser.go(5) == 3
+    assert browser.go(0) == 1
+
+    # a zoomed page is rebuilt as a live figure that renders the same as its bitmap
+    fig = browser.figure(2)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=50)
+    assert np.array_equal(np.asarray(Image.open(buf)), images[1])
+    assert fig.axes[-1].get_title() == "Page 2"
+    plt.close("all")
+
+    # only the most recent pages are kept pickled
+    assert browser.figures[0] is None
+    with pytest.raises(ValueError, match="last 2 pages"):
+        browser.figure(1)
+
+    # by default only the bitmaps are kept
+    browser = PageBrowser(dpi=20)
+    fp = FigPager("letter", 1, 1, preview=browser)
+    fp.add_subplot().plot([0, 1])
+    fp.close()
+    assert browser.figures == [None]
+    with pytest.raises(ValueError, match="zoom=True"):
+        browser.figure(1)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,110 @@
+# Test of drawing pages in worker processes with arrays passed through shared memory
+import os
+
+import numpy as np
+import pytest
+
+from figpager import ParallelPager, SharedArrays
+from figpager.parallel import _render_job
+
+# shared memory is new in Python 3.8 and the pdf pages are merged with pypdf
+shared_memory = pytest.importorskip("multiprocessing.shared_memory")
+pypdf = pytest.importorskip("pypdf")
+
+
+def draw_series(fp, series, label, pages=1):
+    for page in range(pages):
+        if page:
+            fp.add_page()
+        ax = fp.add_subplot()
+        ax.plot(series[::1000])
+        ax.set_title(
+            "{} part {} read-only {}".format(
+                label, page + 1, not series.flags.writeable
+            )
+        )
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+    layout = os.path.join(folder, "report.ini")
+    with open("./tests/report.ini") as f:
+        text = f.read().replace("text = ''", "text = 'Sheet {page} of {pages}'", 1)
+    with open(layout, "w") as f:
+        f.write(text)
+
+    outfile = os.path.join(folder, "out.pdf")
+    data = np.random.rand(3, 1000000)
+    with ParallelPager(
+        "letter",
+        1,
+        1,
+        outfile=outfile,
+        processes=2,
+        layout=layout,
+        orientation="portrait",
+    ) as pp:
+        series = data[0]
+        handle = pp.share(series)
+        # an array is copied into shared memory once
+        assert pp.share(series) is handle
+        assert pp.shared.nbytes >= series.nbytes
+        pp.add_page(draw_series, handle, "Site A", pages=2)
+        pp.add_page(draw_series, handle, "Site B")
+        pp.add_page(draw_series, series=handle, label="Site C", pages=2)
+
+    # pages keep the submission order and are numbered across jobs
+    assert pp.pagecount == 5
+    reader = pypdf.PdfReader(outfile)
+    titles = [
+        "Site A part 1",
+        "Site A part 2",
+        "Site B part 1",
+        "Site C part 1",
+        "Site C part 2",
+    ]
+    for number, (page, title) in enumerate(zip(reader.pages, titles), 1):
+        text = page.extract_text()
+        assert title + " read-only True" in text
+        assert "Sheet {} of 5".format(number) in text
+
+    # shared memory and job files are removed at close
+    try:
+        shared_memory.SharedMemory(name=handle.name)
+        assert False, "shared memory was not unlinked"
+    except FileNotFoundError:
+        pass
+    assert sorted(os.listdir(folder)) == ["out.pdf", "report.ini"]
+
+    # a job run in this process leaves the segment to its owner, which unlinks it at close
+    with SharedArrays() as shared:
+        handle = shared.register(data[2])
+        options = {"paper_size": "letter", "nrows": 1, "ncols": 1, "dpi": 20}
+        pages, stamps = _render_job(
+            os.path.join(folder, "job.png"),
+            "job.py",
+            options,
+            draw_series,
+            (handle, "Job"),
+            {},
+        )
+        assert pages == 1
+        segment = shared_memory.SharedMemory(name=handle.name)
+        assert segment.size >= data[2].nbytes
+        segment.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=handle.name)
+    os.remove(os.path.join(folder, "job.png"))
+
+    # raster outputs get page number suffixes
+    outfile = os.path.join(folder, "out.png")
+    with ParallelPager("letter", 1, 1, outfile=outfile, processes=2, dpi=20) as pp:
+        pp.add_page(draw_series, pp.share(data[0]), "Site A", pages=2)
+        pp.add_page(draw_series, pp.share(data[1]), "Site B")
+    for name in ["out.png", "out_02.png", "out_03.png"]:
+        assert os.path.isfile(os.path.join(folder, name))
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
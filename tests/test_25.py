@@ -0,0 +1,104 @@
+# Test of asyncio pagers rendering side by side without blocking the event loop
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from figpager import AsyncFigPager, FigPager
+
+PAGES = 3
+
+
+def draw(fp, name, page):
+    ax = fp.add_subplot()
+    ax.plot(np.arange(50), np.sin(np.arange(50) * (page + 1)))
+    ax.set_title("{} {}".format(name, page + 1))
+    fp.text_at_label("Figure Title", name)
+
+
+def sync_report(outfile, name):
+    fp = FigPager(
+        "letter",
+        1,
+        1,
+        layout="./tests/report.ini",
+        outfile=outfile,
+        dpi=50,
+        overwrite=True,
+    )
+    for page in range(PAGES):
+        if page:
+            fp.add_page()
+        draw(fp, name, page)
+    fp.close()
+
+
+async def async_report(outfile, name, executor=None):
+    async with AsyncFigPager(
+        "letter",
+        1,
+        1,
+        layout="./tests/report.ini",
+        outfile=outfile,
+        dpi=50,
+        overwrite=True,
+        executor=executor,
+    ) as fp:
+        for page in range(PAGES):
+            if page:
+                await fp.add_page()
+            await fp.run(draw, name, page)
+
+
+async def heartbeat(stop, gaps):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.005)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def run_all(folder, executor):
+    stop = asyncio.Event()
+    gaps = []
+    beat = asyncio.ensure_future(heartbeat(stop, gaps))
+    await asyncio.gather(
+        async_report(os.path.join(folder, "a.png"), "Report A"),
+        async_report(os.path.join(folder, "b.png"), "Report B"),
+        async_report(os.path.join(folder, "c.png"), "Report C", executor),
+        async_report(os.path.join(folder, "d.png"), "Report D", executor),
+    )
+    stop.set()
+    await beat
+    return gaps
+
+
+def pages(outfile):
+    stem = os.path.splitext(outfile)[0]
+    names = [outfile] + ["{}_{:02}.png".format(stem, n) for n in range(2, PAGES + 1)]
+    return [np.asarray(Image.open(name)) for name in names]
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        gaps = asyncio.run(run_all(folder, executor))
+
+    # the loop kept running while the pages rendered
+    assert len(gaps) > 10
+
+    # concurrent pagers draw the same pages as one pager at a time
+    for name in ["a", "b", "c", "d"]:
+        reference = os.path.join(folder, "ref_{}.png".format(name))
+        sync_report(reference, "Report {}".format(name.upper()))
+        for a, b in zip(pages(reference), pages(os.path.join(folder, name + ".png"))):
+            assert np.array_equal(a, b)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
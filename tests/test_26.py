@@ -0,0 +1,121 @@
+# Test of the job scheduler priorities, memory limits, worker recycling and backpressure
+import os
+import queue
+import time
+
+import numpy as np
+
+from figpager import FigPager, Metrics, Scheduler, WorkerLostError
+
+
+def report(outfile, pages):
+    fp = FigPager("letter", 1, 1, outfile=outfile, dpi=20, overwrite=True)
+    for page in range(pages):
+        if page:
+            fp.add_page()
+        fp.add_subplot().plot([0, 1], [0, page])
+    fp.close()
+    return os.getpid()
+
+
+def wait(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def allocate(nbytes):
+    return np.ones(nbytes // 8).sum()
+
+
+def crash():
+    os._exit(3)
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+    metrics = Metrics()
+    with Scheduler(
+        workers=1, max_pending=2, max_pages_per_child=3, metrics=metrics
+    ) as scheduler:
+        # with the worker busy, the small job runs before the large one submitted earlier
+        blocker = scheduler.submit(wait, (0.5,), name="blocker")
+        large = scheduler.submit(
+            report, (os.path.join(folder, "large.png"), 2), priority=10
+        )
+        small = scheduler.submit(
+            report, (os.path.join(folder, "small.png"), 1), priority=0
+        )
+
+        # the queue is full
+        try:
+            scheduler.submit(wait, (0,), block=False)
+            assert False, "submit did not apply backpressure"
+        except queue.Full:
+            pass
+        try:
+            scheduler.submit(wait, (0,), timeout=0.05)
+            assert False, "submit did not time out"
+        except queue.Full:
+            pass
+
+        assert small.result() == blocker.result()
+        # the worker is replaced after 3 pages
+        assert large.result() == small.result()
+        after = scheduler.submit(wait, (0,))
+        assert after.result() != large.result()
+
+        # a job over its memory limit fails alone and its worker is replaced
+        over = scheduler.submit(allocate, (400 * 2 ** 20,), memory_limit=100 * 2 ** 20)
+        try:
+            over.result()
+            assert False, "memory limit was not applied"
+        except MemoryError:
+            pass
+        assert (
+            scheduler.submit(
+                allocate, (10 * 2 ** 20,), memory_limit=100 * 2 ** 20
+            ).result()
+            > 0
+        )
+
+        # a job that kills its worker fails and the next job runs on a new worker
+        lost = scheduler.submit(crash)
+        try:
+            lost.result()
+            assert False, "lost worker was not reported"
+        except WorkerLostError:
+            pass
+        assert scheduler.submit(wait, (0,)).result() > 0
+
+    names = [h["name"] for h in scheduler.history]
+    assert names[:3] == ["blocker", "report", "report"]
+    assert [h["priority"] for h in scheduler.history[1:3]] == [0, 10]
+    assert [h["pages"] for h in scheduler.history[:3]] == [0, 1, 2]
+    assert small.queue_seconds >= 0.4 and small.run_seconds > 0
+    assert large.queue_seconds > small.queue_seconds
+    assert [h["status"] for h in scheduler.history if h["status"] != "ok"] == [
+        "memory",
+        "lost",
+    ]
+    assert scheduler.workers_started == 4
+    assert metrics.value("job_run_seconds") == len(scheduler.history)
+    assert metrics.value("jobs_finished", status="memory") == 1
+
+    # the reserved worker does not start a large job, so a small job submitted later still runs first
+    with Scheduler(workers=2, reserved_workers=1) as scheduler:
+        busy = scheduler.submit(wait, (0.5,), priority=10)
+        large = scheduler.submit(wait, (0,), priority=10)
+        time.sleep(0.2)
+        small = scheduler.submit(wait, (0,))
+        assert large.result() == busy.result()
+        assert small.result() != busy.result()
+        assert small.run_seconds is not None and small.queue_seconds < 0.2
+
+    # workers can also be started with spawn
+    with Scheduler(workers=1, start_method="spawn") as scheduler:
+        assert scheduler.submit(wait, (0,)).result() != os.getpid()
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,123 @@
+# Test of drawing pages on workers that share a queue folder, standing in for several machines
+import os
+import subprocess
+import sys
+
+import pypdf
+
+from figpager import DirectoryQueue, ParallelPager
+from figpager.workqueue import _read, _write, run_worker
+
+
+def draw(fp, label, pages=1):
+    for page in range(pages):
+        if page:
+            fp.add_page()
+        ax = fp.add_subplot()
+        ax.plot([0, 1], [0, page])
+        ax.set_title("{} part {}".format(label, page + 1))
+
+
+def draw_once(fp, marker, label):
+    # the first worker to draw this page dies
+    if not os.path.isfile(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    draw(fp, label)
+
+
+def fail(fp):
+    raise ValueError("bad page")
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+    queue_folder = os.path.join(folder, "queue")
+    tests = os.path.dirname(os.path.abspath(__file__))
+
+    key_file = os.path.join(folder, "key")
+    with open(key_file, "wb") as f:
+        f.write(b"secret\n")
+    queue = DirectoryQueue(queue_folder, lease=1, key=b"secret")
+    workers = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "figpager",
+                "worker",
+                queue_folder,
+                "--path",
+                tests,
+                "--idle",
+                "5",
+                "--key-file",
+                key_file,
+                "-q",
+            ]
+        )
+        for i in range(3)
+    ]
+
+    outfile = os.path.join(folder, "out.pdf")
+    with ParallelPager("letter", 1, 1, outfile=outfile, executor=queue) as pp:
+        # arrays are sent with the job
+        assert pp.share([1, 2]) == [1, 2]
+        pp.add_page(draw, "Site A", pages=2)
+        pp.add_page(draw_once, os.path.join(folder, "marker"), "Site B")
+        pp.add_page(draw, "Site C")
+
+    # job errors are raised by the future
+    try:
+        queue.submit(fail, None).result()
+        assert False, "job error was not raised"
+    except ValueError:
+        pass
+
+    # the page of the dead worker was drawn by another worker and pages keep the submission order
+    assert queue.requeued == 1
+    assert pp.pagecount == 4
+    reader = pypdf.PdfReader(outfile)
+    titles = ["Site A part 1", "Site A part 2", "Site B part 1", "Site C part 1"]
+    for page, title in zip(reader.pages, titles):
+        assert title in page.extract_text()
+
+    # raster pages come back encoded
+    outfile = os.path.join(folder, "out.png")
+    with ParallelPager("letter", 1, 1, outfile=outfile, executor=queue, dpi=20) as pp:
+        pp.add_page(draw, "Site A", pages=2)
+    assert os.path.isfile(os.path.join(folder, "out_02.png"))
+
+    queue.shutdown()
+    for worker in workers:
+        worker.wait(30)
+    assert [worker.returncode for worker in workers].count(1) == 1
+    assert all(
+        not os.listdir(path)
+        for path in [queue.jobs_folder, queue.claimed_folder, queue.results_folder]
+    )
+    assert sorted(os.listdir(folder)) == [
+        "key",
+        "marker",
+        "out.pdf",
+        "out.png",
+        "out_02.png",
+        "queue",
+    ]
+
+    # a job that is not signed with the key is not unpickled
+    unsigned = os.path.join(folder, "unsigned")
+    for name in ["jobs", "claimed", "results"]:
+        os.makedirs(os.path.join(unsigned, name))
+    with open(os.path.join(unsigned, "lease"), "w") as f:
+        f.write("1")
+    _write(os.path.join(unsigned, "jobs", "forged.job"), (os.remove, (key_file,), {}))
+    assert run_worker(unsigned, max_jobs=1, key=b"secret") == 1
+    assert os.path.isfile(key_file)
+    ok, error = _read(os.path.join(unsigned, "results", "forged.result"), b"secret")
+    assert not ok and "not signed" in str(error)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,101 @@
+# Test of byte identical outputs across runs and processes with reproducible=True
+import hashlib
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pypdf
+
+from figpager import FigPager
+
+EXTENSIONS = ["pdf", "svg", "eps", "png"]
+
+
+def draw_report(folder, reproducible=True):
+    layout = os.path.join(folder, "report.ini")
+    with open("./tests/report.ini") as f:
+        text = f.read().replace("text = ''", "text = 'Sheet {page} of {pages}'", 1)
+    with open(layout, "w") as f:
+        f.write(text)
+
+    for ext in EXTENSIONS:
+        fp = FigPager(
+            "letter",
+            2,
+            1,
+            # {pages} is stamped at close on pdf and raster pages
+            layout=layout if ext in ["pdf", "png"] else "./tests/report.ini",
+            outfile=os.path.join(folder, "report." + ext),
+            dpi=30,
+            overwrite=True,
+            reproducible=reproducible,
+        )
+        for page in range(2):
+            if page:
+                fp.add_page()
+            ax = fp.add_subplot()
+            ax.plot(np.arange(20), np.arange(20) ** page, label="séries α")
+            ax.set_title("Page {}".format(page + 1))
+            ax.legend()
+            fp.add_subplot().imshow(np.arange(16.0).reshape(4, 4))
+        fp.close()
+
+
+def digests(folder):
+    names = sorted(n for n in os.listdir(folder) if not n.endswith(".ini"))
+    result = {}
+    for name in names:
+        with open(os.path.join(folder, name), "rb") as f:
+            result[name] = hashlib.sha256(f.read()).hexdigest()
+    return result
+
+
+def test_main(tmp_path):
+    folders = [os.path.join(str(tmp_path), name) for name in ["a", "b", "c", "d", "e"]]
+    for folder in folders:
+        os.makedirs(folder)
+
+    os.environ["SOURCE_DATE_EPOCH"] = "1700000000"
+    try:
+        draw_report(folders[0])
+        draw_report(folders[1])
+        # processes with their own hash seeds and font caches. The source path drawn on the pages is the
+        # script of the process, so both use the same one
+        script = "import sys; sys.path.insert(0, 'tests'); import test_28; test_28.draw_report({!r})"
+        for folder in folders[2:4]:
+            subprocess.check_call([sys.executable, "-c", script.format(folder)])
+    finally:
+        del os.environ["SOURCE_DATE_EPOCH"]
+    draw_report(folders[4], reproducible=False)
+
+    first = digests(folders[0])
+    assert len(first) == 7
+    assert digests(folders[1]) == first
+    assert digests(folders[3]) == digests(folders[2])
+    # the date differs without reproducible=True
+    assert digests(folders[4])["report.pdf"] != first["report.pdf"]
+
+    reader = pypdf.PdfReader(os.path.join(folders[0], "report.pdf"))
+    assert reader.metadata["/CreationDate"].startswith("D:20231114221320")
+    assert "Sheet 2 of 2" in reader.pages[1].extract_text()
+    with open(os.path.join(folders[0], "report.eps"), "rb") as f:
+        assert b"%%CreationDate: Tue Nov 14 22:13:20 2023" in f.read(1000)
+
+    # with a display set the backend is left to matplotlib. Agg stands in for the desktop backend
+    env = dict(
+        os.environ, DISPLAY=":0", MPLBACKEND="Agg", SOURCE_DATE_EPOCH="1700000000"
+    )
+    svg = os.path.join(str(tmp_path), "display.svg")
+    script = (
+        "from figpager import FigPager; fp = FigPager('letter', 1, 1, outfile={!r}, reproducible=True); "
+        "fp.add_subplot().plot([0, 1]); fp.close()"
+    )
+    subprocess.check_call([sys.executable, "-c", script.format(svg)], env=env)
+    with open(svg) as f:
+        assert "2023-11-14" in f.read()
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,97 @@
+# Test of tiled raster pages rendered in bands and streamed into png and tiff files
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from figpager import FigPager
+
+
+def draw_report(outfile, tiled, dpi=60, paper_size="letter"):
+    fp = FigPager(
+        paper_size,
+        2,
+        1,
+        layout="./tests/report.ini",
+        outfile=outfile,
+        orientation="portrait",
+        dpi=dpi,
+        overwrite=True,
+        tiled=tiled,
+    )
+    for page in range(2):
+        if page:
+            fp.add_page()
+        ax = fp.add_subplot()
+        ax.plot(np.sin(np.linspace(0, 20, 400) + page), lw=2)
+        ax.set_title("Page {}".format(page + 1))
+        fp.add_subplot().imshow(np.arange(64.0).reshape(8, 8))
+    fp.close()
+
+
+def peak_rss(outfile, tiled, height):
+    """
+    Peak resident memory in KB of a fresh process that draws the report on an 8 inch wide page
+    """
+
+    # Agg allocates its buffers outside the Python allocator, so the peak is read from the process. ru_maxrss
+    # keeps the peak of the parent across exec, VmHWM starts again
+    script = (
+        "import sys; sys.path.insert(0, {!r}); import test_29; "
+        "test_29.draw_report({!r}, {}, dpi=100, paper_size=(8, {})); "
+        "print([line.split()[1] for line in open('/proc/self/status') if line.startswith('VmHWM')][0])"
+    ).format(os.path.dirname(os.path.abspath(__file__)), outfile, tiled, height)
+    output = subprocess.check_output(
+        [sys.executable, "-c", script], stderr=subprocess.DEVNULL
+    )
+    assert Image.open(outfile).size == (800, height * 100)
+    return int(output.split()[-1])
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+    for ext in ["png", "tif"]:
+        whole = os.path.join(folder, "whole." + ext)
+        bands = os.path.join(folder, "bands." + ext)
+        draw_report(whole, False)
+        draw_report(bands, 100)
+        for suffix in ["", "_02"]:
+            a = Image.open(whole.replace("." + ext, suffix + "." + ext))
+            b = Image.open(bands.replace("." + ext, suffix + "." + ext))
+            assert a.size == b.size and b.mode == "RGBA"
+            assert round(b.info["dpi"][0]) == 60
+            diff = np.abs(np.asarray(a, dtype=int) - np.asarray(b, dtype=int)).max(
+                axis=-1
+            )
+            # bands only differ in the antialiasing of clipped line segments
+            assert (diff > 0).mean() < 0.01
+            assert diff.mean() < 0.5
+    print("--Done!--")
+
+
+@pytest.mark.skipif(
+    not os.path.exists("/proc/self/status"),
+    reason="peak memory is read from /proc on Linux",
+)
+def test_memory(tmp_path):
+    # band buffers grow with the page width but not with the page height. A whole 8 by 40 inch page buffer at 100
+    # dpi is 12.8 MB
+    folder = str(tmp_path)
+    growth = {}
+    for tiled in [True, False]:
+        peaks = [
+            peak_rss(os.path.join(folder, "tall_{}.png".format(height)), tiled, height)
+            for height in [10, 40]
+        ]
+        growth[tiled] = peaks[1] - peaks[0]
+    assert growth[False] > 12800
+    assert growth[True] < 4000
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
+    test_memory(".")
@@ -0,0 +1,88 @@
+# Test of the page pixel and byte budgets that lower the dpi of large pages
+import os
+import warnings
+
+import numpy as np
+from PIL import Image
+
+from figpager import FigPager
+
+
+def draw_report(outfile, **kwargs):
+    fp = FigPager(
+        "A3",
+        2,
+        1,
+        layout="./tests/report.ini",
+        outfile=outfile,
+        dpi=300,
+        overwrite=True,
+        **kwargs
+    )
+    x = np.linspace(0, 50, 2000)
+    ax = fp.add_subplot()
+    ax.plot(x, np.sin(x), x, np.cos(x / 3))
+    ax.set_title("Sites")
+    # a smooth image keeps the encoded size growing with the dpi
+    fp.add_subplot().imshow(
+        np.add.outer(np.arange(200.0), np.arange(200.0)), interpolation="bilinear"
+    )
+    fp.add_page(paper_size="A5", orientation="portrait")
+    fp.add_subplot().plot(x, np.sin(x))
+    fp.close()
+    return fp
+
+
+def test_main(tmp_path):
+    folder = str(tmp_path)
+
+    # the dpi follows the paper size of each page
+    outfile = os.path.join(folder, "pixels.png")
+    fp = draw_report(outfile, max_pixels=10 ** 6)
+    assert [page["targets"][0]["dpi"] for page in fp.page_stats] == [71, 144]
+    for name in [outfile, os.path.join(folder, "pixels_02.png")]:
+        img = Image.open(name)
+        assert img.size[0] * img.size[1] <= 10 ** 6
+    assert [page["page"] for page in fp.page_stats] == [1, 2]
+    assert fp.page_stats[1]["width_in"] < fp.page_stats[0]["width_in"]
+    # pages are only recorded with a budget
+    assert draw_report(os.path.join(folder, "none.png")).page_stats == []
+
+    # raster pages over the budget are saved again at a lower dpi
+    full = draw_report(os.path.join(folder, "full.png"), max_bytes_per_page=10 ** 9)
+    full_bytes = full.page_stats[0]["targets"][0]["bytes"]
+    budget = full_bytes // 4
+    outfile = os.path.join(folder, "bytes.png")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        fp = draw_report(outfile, max_bytes_per_page=budget)
+    stat = fp.page_stats[0]["targets"][0]
+    assert stat["dpi"] < 300 and stat["bytes"] <= budget
+    assert os.path.getsize(outfile) == stat["bytes"]
+    assert (
+        Image.open(outfile).size[0]
+        < Image.open(os.path.join(folder, "full.png")).size[0]
+    )
+
+    # pdf pages are sized in memory. Images in them follow the dpi
+    full = draw_report(os.path.join(folder, "full.pdf"), max_bytes_per_page=10 ** 9)
+    size = full.page_stats[0]["targets"][0]["bytes"]
+    with warnings.catch_warnings():
+        # the vector content of the page may not fit
+        warnings.simplefilter("ignore")
+        fp = draw_report(
+            os.path.join(folder, "bytes.pdf"), max_bytes_per_page=size // 2
+        )
+    stat = fp.page_stats[0]["targets"][0]
+    assert stat["dpi"] < 300 and stat["bytes"] < 0.7 * size
+
+    # a budget that vector content can not meet warns
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        draw_report(os.path.join(folder, "small.pdf"), max_bytes_per_page=1000)
+    assert any("over max_bytes_per_page" in str(w.message) for w in caught)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
@@ -0,0 +1,244 @@
+# Scale suite of pagination at production sizes. Each scenario runs in its own process and its wall time, peak
+# resident memory, open file handles and output size are written to a JSON report so releases can be compared.
+# FIGPAGER_SCALE=1 runs the production sizes, FIGPAGER_SCALE=N runs the pagination scenarios with N pages.
+# FIGPAGER_SCALE_REPORT sets the report path, scale_report.json by default
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+import time
+
+import matplotlib
+import pytest
+
+from figpager import FigPager, prewarm
+from figpager.figpager import load_paper_sizes
+
+# pages of the 10,000 page pagination scenarios
+PRODUCTION_PAGES = 10000
+
+
+def open_files():
+    # Linux only, like the resource module the scale suite imports when it runs
+    return len(os.listdir("/proc/self/fd"))
+
+
+class FileSampler(threading.Thread):
+
+    """ Sample the open file handles of this process until stopped """
+
+    def __init__(self, interval=0.02):
+        threading.Thread.__init__(self, daemon=True)
+        self.interval = interval
+        self.peak = open_files()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, open_files())
+
+
+def paginate(folder, pages, direction, nrows=2, ncols=2, paper_size="letter"):
+    fp = FigPager(
+        paper_size,
+        nrows,
+        ncols,
+        outfile=os.path.join(folder, "pages.pdf"),
+        dpi=72,
+        overwrite=True,
+    )
+    for i in range(pages * nrows * ncols):
+        ax = fp.add_subplot(direction=direction)
+        ax.plot([0, 1], [0, i])
+    fp.close()
+    assert fp.pagecount == pages
+    return {"pages": fp.pagecount, "subplots": pages * nrows * ncols}
+
+
+def png_numbering(folder, pages):
+    fp = FigPager(
+        "letter", 1, 1, outfile=os.path.join(folder, "page.png"), dpi=20, overwrite=True
+    )
+    for i in range(pages):
+        if i:
+            fp.add_page()
+        fp.add_subplot().plot([0, 1], [0, i])
+    fp.close()
+    expected = ["page.png"] + ["page_{:02}.png".format(n) for n in range(2, pages + 1)]
+    assert sorted(os.listdir(folder)) == sorted(expected)
+    return {"pages": fp.pagecount, "last_file": expected[-1]}
+
+
+def paper_size_page(folder, paper_size, orientation):
+    for ext in ["pdf", "png"]:
+        outfile = os.path.join(folder, "{}_{}.{}".format(paper_size, orientation, ext))
+        fp = FigPager(
+            paper_size,
+            2,
+            2,
+            outfile=outfile,
+            orientation=orientation,
+            dpi=30,
+            overwrite=True,
+        )
+        for i in range(4):
+            fp.add_subplot().plot([0, 1], [0, i])
+        fp.close()
+        width, height = fp.pagewidth_inch, fp.pageheight_inch
+        assert (width > height) == (orientation == "landscape") or width == height
+    return {"pages": 1, "width_in": width, "height_in": height}
+
+
+def measure(func, folder, args):
+    """
+    Run a scenario in this process and measure it
+    """
+    import resource
+
+    os.makedirs(folder)
+    # matplotlib keeps the fonts it has loaded open, so they are loaded before the file handles are counted
+    prewarm()
+    before = open_files()
+    sampler = FileSampler()
+    sampler.start()
+    start = time.perf_counter()
+    result = func(folder, *args)
+    seconds = time.perf_counter() - start
+    sampler.stopped.set()
+    sampler.join()
+
+    size = 0
+    files = 0
+    for name in os.listdir(folder):
+        size = size + os.path.getsize(os.path.join(folder, name))
+        files = files + 1
+    result.update(
+        seconds=round(seconds, 3),
+        # kilobytes on Linux
+        peak_rss_bytes=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        open_files_peak=sampler.peak - before,
+        open_files_after=open_files() - before,
+        output_bytes=size,
+        output_files=files,
+    )
+    return result
+
+
+def scenarios(scale):
+    pages = PRODUCTION_PAGES if scale == 1 else scale
+    found = [
+        ("pdf_{}_left_to_right".format(pages), paginate, (pages, "left-to-right")),
+        ("pdf_{}_top_to_bottom".format(pages), paginate, (pages, "top-to-bottom")),
+        (
+            "grid_20x20",
+            paginate,
+            (5 if scale == 1 else 1, "left-to-right", 20, 20, "A1"),
+        ),
+        (
+            "grid_20x20_top_to_bottom",
+            paginate,
+            (5 if scale == 1 else 1, "top-to-bottom", 20, 20, "A1"),
+        ),
+        ("png_numbering", png_numbering, (150 if scale == 1 else 105,)),
+    ]
+    for paper_size in load_paper_sizes()["paper_sizes"]:
+        for orientation in ["portrait", "landscape"]:
+            found.append(
+                (
+                    "paper_{}_{}".format(paper_size, orientation),
+                    paper_size_page,
+                    (paper_size, orientation),
+                )
+            )
+    return found
+
+
+def run_suite(folder, scale, report):
+    from concurrent.futures import ProcessPoolExecutor
+
+    # a fresh process per scenario so the peak memory is its own
+    context = multiprocessing.get_context("fork")
+    results = []
+    for name, func, args in scenarios(scale):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(
+                measure, func, os.path.join(folder, name), args
+            ).result()
+        result["name"] = name
+        results.append(result)
+        print(
+            "{:<32} {:>8.1f} s {:>8.0f} MB".format(
+                name, result["seconds"], result["peak_rss_bytes"] / 2 ** 20
+            )
+        )
+
+    try:
+        from importlib.metadata import version
+
+        figpager_version = version("figpager")
+    except Exception:
+        figpager_version = None
+    with open(report, "w") as f:
+        json.dump(
+            {
+                "figpager": figpager_version,
+                "matplotlib": matplotlib.__version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "scale": scale,
+                "scenarios": results,
+            },
+            f,
+            indent=2,
+        )
+    return results
+
+
+def test_main(tmp_path):
+    # subplots keep their positions on the pages after the first in both directions
+    for direction, order in [
+        ("left-to-right", [(0, 0), (0, 1), (1, 0), (1, 1)]),
+        ("top-to-bottom", [(0, 0), (1, 0), (0, 1), (1, 1)]),
+    ]:
+        fp = FigPager(
+            "letter",
+            2,
+            2,
+            outfile=os.path.join(str(tmp_path), direction + ".pdf"),
+            overwrite=True,
+        )
+        positions = []
+        for i in range(12):
+            spec = fp.add_subplot(direction=direction).get_subplotspec()
+            positions.append((spec.rowspan.start, spec.colspan.start))
+        fp.close()
+        assert fp.pagecount == 3
+        assert positions == order * 3, direction
+    print("--Done!--")
+
+
+@pytest.mark.skipif(
+    not os.environ.get("FIGPAGER_SCALE") or not os.path.exists("/proc/self/fd"),
+    reason="set FIGPAGER_SCALE to run the scale suite on Linux",
+)
+def test_scale(tmp_path):
+    scale = int(os.environ.get("FIGPAGER_SCALE"))
+    report = os.environ.get("FIGPAGER_SCALE_REPORT", "scale_report.json")
+    results = run_suite(str(tmp_path), scale, report)
+
+    assert len(results) == 5 + 2 * len(load_paper_sizes()["paper_sizes"])
+    for result in results:
+        # every file is closed at close()
+        assert result["open_files_after"] <= 0, result["name"]
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    os.environ.setdefault("FIGPAGER_SCALE", sys.argv[1] if len(sys.argv) > 1 else "1")
+    test_scale(tempfile.mkdtemp())
@@ -0,0 +1,99 @@
+# Test of the layouts against golden references rendered at low dpi. Set FIGPAGER_GOLDEN_UPDATE=1 to save the
+# current pages as the new references in tests/golden
+import os
+import time
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from figpager import FigPager, GoldenPages
+from figpager.golden import (hash_distance, perceptual_hash, render_page,
+                             tile_diff)
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# name, layout, paper size and orientation of each page set
+CASES = [
+    ("default_letter_portrait", "default", "letter", "portrait"),
+    ("default_a4_landscape", "default", "A4", "landscape"),
+    ("report_letter_portrait", "./tests/report.ini", "letter", "portrait"),
+    ("report_letter_landscape", "./tests/report.ini", "letter", "landscape"),
+]
+
+
+class FixedPathPager(FigPager):
+
+    """ FigPager that draws the same source path on every machine """
+
+    def get_caller_filepath(self):
+        return "tests/test_32.py"
+
+
+def draw_pages(layout, paper_size, orientation, golden, extra=None):
+    fp = FixedPathPager(
+        paper_size, 2, 2, layout=layout, orientation=orientation, golden=golden
+    )
+    x = np.linspace(0, 10, 200)
+    for i in range(8):
+        ax = fp.add_subplot()
+        if i == 3:
+            ax.imshow(np.add.outer(np.arange(20.0), np.arange(20.0)))
+        else:
+            ax.plot(x, np.sin(x + i), x, np.cos(x / (i + 1)))
+        ax.set_title("Site {}".format(i + 1))
+        if extra is not None and i == extra:
+            ax.set_xlabel("Distance (m)")
+    fp.close()
+    return fp
+
+
+def test_main(tmp_path):
+    # every layout matches its references
+    start = time.perf_counter()
+    for name, layout, paper_size, orientation in CASES:
+        golden = GoldenPages(GOLDEN, name)
+        draw_pages(layout, paper_size, orientation, golden)
+        results = golden.check()
+        assert len(results) == 2
+        assert (
+            all(r["status"] in ["identical", "within tolerance"] for r in results)
+            or golden.update
+        )
+    print("golden pages checked in {:.1f} s".format(time.perf_counter() - start))
+
+    # a new axis label is found on the page it was added to
+    name, layout, paper_size, orientation = CASES[2]
+    diff_dir = os.path.join(str(tmp_path), "diff")
+    golden = GoldenPages(GOLDEN, name, update=False, diff_dir=diff_dir)
+    draw_pages(layout, paper_size, orientation, golden, extra=5)
+    assert [r["status"] for r in golden.results][0] in ["identical", "within tolerance"]
+    assert golden.results[1]["status"] == "changed"
+    assert golden.results[1]["tiles_changed"] > 0
+    assert os.path.exists(os.path.join(diff_dir, name + "_002_diff.png"))
+    with pytest.raises(AssertionError, match="page 2 changed"):
+        golden.check()
+
+    # a different page count fails
+    golden = GoldenPages(GOLDEN, name, update=False)
+    fp = FixedPathPager(
+        paper_size, 2, 2, layout=layout, orientation=orientation, golden=golden
+    )
+    fp.add_subplot().plot([0, 1])
+    fp.close()
+    with pytest.raises(AssertionError, match="1 reference pages were not added"):
+        golden.check()
+
+    # small differences stay within the tolerance and the perceptual hash does not move
+    fig = Figure(figsize=(8.5, 11))
+    fig.add_subplot().plot([0, 1], [0, 1])
+    image = render_page(fig)
+    noise = np.random.default_rng(0).integers(-3, 4, image.shape)
+    noisy = np.clip(image + noise, 0, 255).astype(np.uint8)
+    assert tile_diff(image, noisy).max() < 4
+    assert hash_distance(perceptual_hash(image), perceptual_hash(noisy)) == 0
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
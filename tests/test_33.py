@@ -0,0 +1,85 @@
+# Test of the single pass layout parser against the two pass configobj path it replaced
+import os
+
+import configobj
+from validate import Validator
+
+from figpager import FigPager
+from figpager.figpager import LAYOUT_SPEC, float_list_value, load_layout
+
+LAYOUTS = [
+    os.path.join(FigPager.page_layout_path, name)
+    for name in sorted(os.listdir(FigPager.page_layout_path))
+    if name != "paper_sizes.ini"
+] + ["./tests/report.ini"]
+
+
+def configobj_layout(file):
+    """
+    Read and validate a layout as FigPager did before parse_layout. The configspec is built from the stripped
+    lines and the block comments are commented out in a second read of the file
+    """
+
+    with open(file, "r") as f:
+        data = f.read().replace("\r", "")
+    cfg = ""
+    block_comment = False
+    for t in [t.strip() for t in data.split("\n") if t != ""]:
+        t = t.strip().strip("'").replace("'", "")
+        if t[0:3] == '"""':
+            block_comment = not block_comment
+        if block_comment:
+            continue
+        if t[0] not in ["#", "["]:
+            if "=" in t:
+                key = t.split("=")[0].strip()
+                cfg = cfg + "\n" + key + " = " + LAYOUT_SPEC[key]
+        else:
+            cfg = cfg + "\n" + t
+
+    stream = []
+    block_comment = False
+    with open(file, "r") as f:
+        for line in f:
+            if line == '"""\n':
+                block_comment = not block_comment
+                line = "#" + line
+            elif block_comment:
+                line = "#" + line
+            stream.append(line)
+
+    vdt = Validator()
+    vdt.functions["float_list_value"] = float_list_value
+    config = configobj.ConfigObj(stream, configspec=cfg.split("\n"))
+    config.validate(vdt)
+    return config.dict()
+
+
+def test_main(tmp_path):
+    # the packaged layouts and a layout with a block comment load the same with both parsers
+    commented = os.path.join(str(tmp_path), "commented.ini")
+    with open("./tests/report.ini") as f:
+        text = f.read()
+    with open(commented, "w") as f:
+        f.write(
+            text.replace("[Boxes]", '"""\nnot_an_option = 1\n[Hidden]\n"""\n[Boxes]', 1)
+        )
+
+    assert len(LAYOUTS) > 1
+    for layout in LAYOUTS + [commented]:
+        assert load_layout(layout).dict() == configobj_layout(layout), layout
+    assert "Hidden" not in load_layout(commented)
+
+    # an mm layout converts the page size from mm to inches once
+    mm = os.path.join(str(tmp_path), "mm.ini")
+    with open(mm, "w") as f:
+        f.write(text.replace("figure_unit = 'inch'", "figure_unit = 'mm'", 1))
+    fp = FigPager((216, 279), 1, 1, layout=mm)
+    assert round(fp.pagewidth_inch, 2) == 8.50
+    assert round(fp.pageheight_inch, 2) == 10.98
+    fp._release()
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")
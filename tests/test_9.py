@@ -0,0 +1,58 @@
+# Test of pixel aware decimation of long line series
+import os
+
+import numpy as np
+
+from figpager import FigPager, minmax_decimate
+
+
+def test_main(tmp_path):
+    # Initalize with an output file
+    outfile = os.path.join(str(tmp_path), "out_9.pdf")
+
+    fp = FigPager("letter", 2, 2, outfile=outfile, overwrite=True, dpi=100)
+
+    x = np.linspace(0, 100, 1000000)
+    y = np.sin(x) + np.random.RandomState(0).normal(0, 0.1, len(x))
+
+    ax = fp.add_subplot(decimate=True)
+    (line,) = ax.plot(x, y, "k-")
+    ax.set_title("Decimated")
+
+    # at most four samples per pixel column and the extremes survive
+    assert len(line.get_xdata()) <= 4 * ax.decimate_oversample * ax.pixel_width()
+    assert len(line.get_xdata()) < len(x) / 10
+    assert line.get_ydata().min() == y.min()
+    assert line.get_ydata().max() == y.max()
+    assert line.get_xdata()[0] == x[0] and line.get_xdata()[-1] == x[-1]
+
+    # short series are left alone
+    ax = fp.add_subplot(decimate=True)
+    (line,) = ax.plot(y[:100])
+    assert len(line.get_ydata()) == 100
+
+    # non monotonic series are left alone
+    xs, ys = minmax_decimate(x[::-1], y, 10)
+    assert len(xs) == len(x)
+
+    # time series are decimated on their dates
+    dates = np.datetime64("2020-01-01T00:00") + np.arange(len(y)) * np.timedelta64(
+        1, "m"
+    )
+    ax = fp.add_subplot(decimate=True)
+    (line,) = ax.plot(dates, y)
+    assert len(line.get_xdata()) < len(dates) / 10
+    assert line.get_xdata().dtype == dates.dtype
+    assert line.get_xdata()[-1] == dates[-1] and line.get_ydata().max() == y.max()
+
+    # dates as objects are left alone
+    xs, ys = minmax_decimate(dates[:10000].astype(object), y[:10000], 10)
+    assert len(xs) == 10000
+
+    fp.close()
+    assert os.path.isfile(outfile)
+    print("--Done!--")
+
+
+if __name__ == "__main__":
+    test_main(".")